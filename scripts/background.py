@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+크기가 제한된 큐로 연결하는 백그라운드 처리 단계
+- prefetch: 이터러블을 백그라운드 스레드에서 미리 순회 (앞 단계)
+- BackgroundWorker: put으로 넘긴 항목을 백그라운드 스레드에서 처리 (뒷 단계)
+- 큐가 가득 차면 넣는 쪽이 기다림 (backpressure), 한 단계의 예외는 다른 단계에서 다시 발생
+"""
+
+import queue
+import threading
+
+_DONE = object()
+
+
+def _put(items: queue.Queue, item, stop) -> bool:
+    """stop()이 참이 될 때까지 넣기를 재시도 (넣었으면 True)"""
+    while not stop():
+        try:
+            items.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(iterable, maxsize: int = 2, name: str = "prefetch"):
+    """iterable을 백그라운드 스레드에서 순회하며 최대 maxsize개까지 미리 준비해 yield
+
+    순회 중 발생한 예외는 소비하는 쪽에서 다시 발생한다.
+    소비를 중단하면(제너레이터 close) 백그라운드 스레드도 멈춘다.
+    """
+    items = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(items, (item, None), stopped.is_set):
+                    return
+            _put(items, (_DONE, None), stopped.is_set)
+        except BaseException as e:
+            _put(items, (_DONE, e), stopped.is_set)
+
+    threading.Thread(target=produce, name=name, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+class BackgroundWorker:
+    """put으로 넘긴 항목을 백그라운드 스레드에서 handler(item)로 처리
+
+    handler가 예외를 내면 처리를 멈추고 다음 put / close에서 예외가 다시 발생한다.
+    """
+
+    def __init__(self, handler, maxsize: int = 2, name: str = "worker"):
+        self.handler = handler
+        self.items = queue.Queue(maxsize=max(1, maxsize))
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.items.get()
+            if item is _DONE:
+                return
+            try:
+                self.handler(item)
+            except BaseException as e:
+                self.error = e
+                return
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def put(self, item):
+        if not _put(self.items, item, lambda: self.error is not None):
+            self._raise_error()
+
+    def close(self):
+        """남은 항목을 모두 처리할 때까지 기다림"""
+        _put(self.items, _DONE, lambda: self.error is not None)
+        self._thread.join()
+        self._raise_error()
+
+    def abort(self):
+        """남은 항목을 처리하지 않고 멈춤 (예외 발생 시 정리용)"""
+        while True:
+            try:
+                self.items.get_nowait()
+            except queue.Empty:
+                break
+        _put(self.items, _DONE, lambda: self.error is not None)
+        self._thread.join()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Notion exporter 오프라인 벤치마크
+- 가짜 Notion 서버(fake_notion.py)를 띄우고 exporter를 모드별로 실행
+- 모드별 페이지/초, 페이지당 API 호출 수, 재시도 수를 비교
+- 각 실행은 임시 디렉토리(NOTION_EXPORT_DIR)에서 별도 프로세스로 수행되어 data/를 건드리지 않음
+
+사용 예:
+    python scripts/benchmark_exporter.py --pages 300 --latency-ms 100
+    python scripts/benchmark_exporter.py --modes sync,async --error-rate 0.05
+    python scripts/benchmark_exporter.py --replay data/notion_recording.jsonl
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fake_notion import FakeNotionServer, add_fault_args, add_workspace_args, fault_kwargs, workspace_from_args
+
+EXPORTER = Path(__file__).parent / "notion_exporter.py"
+
+# 모드 이름 → (exporter 인자, 블록 캐시를 미리 채울지 여부)
+MODES = {
+    "sync": ([], False),
+    "async": (["--async"], False),
+    "cached": (["--async"], True),  # 블록 캐시가 채워진 상태의 전체 export
+}
+
+
+def run_exporter(base_url: str, data_dir: Path, exporter_args: list, args) -> dict:
+    """exporter를 별도 프로세스로 실행하고 export_stats 반환"""
+    env = {
+        **os.environ,
+        "NOTION_TOKEN": "fake-benchmark-token",
+        "NOTION_BASE_URL": base_url,
+        "NOTION_EXPORT_DIR": str(data_dir),
+        "NOTION_RATE_LIMIT": str(args.client_rate),
+        "NOTION_RATE_BURST": str(max(3, args.concurrency)),
+    }
+    command = [sys.executable, str(EXPORTER), *exporter_args, "--concurrency", str(args.concurrency)]
+    with open(data_dir / "exporter.log", "a", encoding="utf-8") as log:
+        result = subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"exporter failed ({' '.join(exporter_args) or 'sync'}), see {data_dir / 'exporter.log'}")
+
+    stats_files = sorted(data_dir.glob("export_stats_*.json"), key=lambda p: p.stat().st_mtime)
+    with open(stats_files[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def summarize(mode: str, stats: dict, server_requests: int) -> dict:
+    endpoints = stats["telemetry"]["endpoints"]
+    api_calls = sum(e["calls"] for e in endpoints.values())
+    retries = sum(e["retries"] for e in endpoints.values())
+    pages = stats["total_pages"] + stats["db_items_with_content"]
+    elapsed = stats["elapsed_seconds"]
+    return {
+        "mode": mode,
+        "pages": pages,
+        "elapsed_seconds": elapsed,
+        "pages_per_second": round(pages / elapsed, 2) if elapsed else 0.0,
+        "api_calls": api_calls,
+        "api_calls_per_page": round(api_calls / pages, 2) if pages else 0.0,
+        "server_requests": server_requests,
+        "retries": retries,
+        "rate_limit_sleep_seconds": stats["telemetry"]["sleep_seconds"],
+        "errors": len(stats["errors"]),
+        "endpoints": {name: e["calls"] for name, e in endpoints.items()},
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Notion exporter 오프라인 벤치마크")
+    parser.add_argument(
+        "--modes", default=",".join(MODES),
+        help=f"실행할 모드 (쉼표 구분, 기본값: {','.join(MODES)})",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="비동기 모드 동시 요청 수")
+    parser.add_argument(
+        "--client-rate", type=float, default=100.0,
+        help="exporter 측 초당 요청 제한 (NOTION_RATE_LIMIT, 기본값: 100)",
+    )
+    parser.add_argument("--replay", help="합성 워크스페이스 대신 녹화 파일(JSONL) 재생")
+    parser.add_argument("--output", help="결과를 JSON으로 저장할 경로")
+    add_workspace_args(parser)
+    add_fault_args(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        raise SystemExit(f"Unknown modes: {', '.join(unknown)} (choose from {', '.join(MODES)})")
+
+    workspace = None if args.replay else workspace_from_args(args)
+    server = FakeNotionServer(("127.0.0.1", 0), workspace=workspace, replay=args.replay, **fault_kwargs(args))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print("=" * 60)
+    print("Notion Exporter Benchmark")
+    print("=" * 60)
+    if workspace is not None:
+        blocks = sum(len(b) for b in workspace["children"].values())
+        print(f"Workspace: {len(workspace['pages'])} pages, {len(workspace['databases'])} databases, {blocks} blocks")
+    else:
+        print(f"Workspace: replay {args.replay} ({len(server.recordings)} responses)")
+    print(f"Latency: {args.latency_ms:g}ms ±{args.jitter_ms:g}ms, 429 rate: {args.error_rate:g}, "
+          f"server rate limit: {args.rate_limit or 'none'}")
+
+    results = []
+    try:
+        for mode in modes:
+            exporter_args, warm_cache = MODES[mode]
+            with tempfile.TemporaryDirectory(prefix=f"notion_bench_{mode}_") as tmp:
+                data_dir = Path(tmp)
+                if warm_cache:
+                    print(f"\n[{mode}] warming block cache...")
+                    run_exporter(server.base_url, data_dir, exporter_args, args)
+                else:
+                    exporter_args = [*exporter_args, "--no-cache"]
+
+                print(f"[{mode}] running exporter...")
+                requests_before = server.stats["requests"]
+                started = time.time()
+                stats = run_exporter(server.base_url, data_dir, exporter_args, args)
+                result = summarize(mode, stats, server.stats["requests"] - requests_before)
+                result["process_seconds"] = round(time.time() - started, 3)
+                results.append(result)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print("\n" + "=" * 60)
+    print(f"{'mode':<8} {'pages':>6} {'time(s)':>8} {'pages/s':>8} {'calls':>7} {'calls/page':>10} {'retries':>7}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['pages']:>6} {r['elapsed_seconds']:>8.2f} {r['pages_per_second']:>8.2f} "
+              f"{r['api_calls']:>7} {r['api_calls_per_page']:>10.2f} {r['retries']:>7}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
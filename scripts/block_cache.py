@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Notion 블록 캐시 (SQLite)
+- (page_id, last_edited_time) → 페이지의 평탄화된 블록 목록
+- 블록 목록은 내용 해시(sha256)로 저장되어 동일한 내용은 한 번만 보관
+- 용량 초과 시 이전 버전부터, 그다음 오래 사용되지 않은 순으로 제거
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+from page_store import DATA_DIR
+from serialization import dumps, loads
+
+# 캐시 저장 경로
+BLOCK_CACHE_FILE = DATA_DIR / "block_cache.sqlite"
+
+# 최대 캐시 크기 (압축 후 기준)
+BLOCK_CACHE_MAX_MB = int(os.environ.get("BLOCK_CACHE_MAX_MB", 512))
+
+# 블록 수집 정책이 바뀌면 올려서 기존 캐시를 무효화
+# (3: 다른 페이지의 동기화 원본을 포함한 페이지는 캐시하지 않음 → 이전에 저장된 항목 제거)
+BLOCK_CACHE_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    page_id TEXT NOT NULL,
+    last_edited_time TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (page_id, last_edited_time)
+);
+CREATE INDEX IF NOT EXISTS versions_hash ON versions (hash);
+"""
+
+
+class BlockCache:
+    def __init__(self, path: Path = BLOCK_CACHE_FILE, max_mb: int = BLOCK_CACHE_MAX_MB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        # 샤드 worker 프로세스들이 동시에 읽고 쓸 수 있도록 WAL 모드 사용
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._check_version()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "evicted": 0,
+        }
+
+    def _check_version(self):
+        """캐시 포맷/수집 정책 버전이 다르면 전체 초기화"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row and int(row[0]) == BLOCK_CACHE_VERSION:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM versions")
+            self.conn.execute("DELETE FROM blobs")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                (str(BLOCK_CACHE_VERSION),),
+            )
+
+    def get(self, page_id: str, last_edited_time: str):
+        """캐시된 블록 목록 반환 (없으면 None)"""
+        row = self.conn.execute("""
+            SELECT b.data FROM versions v JOIN blobs b ON v.hash = b.hash
+            WHERE v.page_id = ? AND v.last_edited_time = ?
+        """, (page_id, last_edited_time)).fetchone()
+
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE versions SET accessed_at = ? WHERE page_id = ? AND last_edited_time = ?",
+                (time.time(), page_id, last_edited_time),
+            )
+        self.stats["hits"] += 1
+        return loads(zlib.decompress(row[0]))
+
+    def put(self, page_id: str, last_edited_time: str, blocks: list):
+        """블록 목록 저장"""
+        raw = dumps(blocks)
+        digest = hashlib.sha256(raw).hexdigest()
+        data = zlib.compress(raw, 6)
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, data, size) VALUES (?, ?, ?)",
+                (digest, data, len(data)),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO versions (page_id, last_edited_time, hash, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (page_id, last_edited_time, digest, time.time()),
+            )
+        self.stats["stored"] += 1
+
+    def size_bytes(self) -> int:
+        """압축된 블롭 총 크기"""
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self) -> int:
+        """최대 크기를 넘으면 이전 버전 → 오래 사용되지 않은 버전 순으로 제거"""
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        candidates = self.conn.execute("""
+            SELECT v.page_id, v.last_edited_time, v.hash,
+                   v.last_edited_time = (
+                       SELECT MAX(v2.last_edited_time) FROM versions v2
+                       WHERE v2.page_id = v.page_id
+                   ) AS is_latest
+            FROM versions v
+            ORDER BY is_latest ASC, v.accessed_at ASC
+        """).fetchall()
+
+        evicted = 0
+        with self.conn:
+            for page_id, last_edited_time, digest, _ in candidates:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute(
+                    "DELETE FROM versions WHERE page_id = ? AND last_edited_time = ?",
+                    (page_id, last_edited_time),
+                )
+                evicted += 1
+
+                # 더 이상 참조되지 않는 블롭 삭제
+                still_used = self.conn.execute(
+                    "SELECT 1 FROM versions WHERE hash = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if not still_used:
+                    size = self.conn.execute(
+                        "SELECT size FROM blobs WHERE hash = ?", (digest,)
+                    ).fetchone()
+                    self.conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+                    total -= size[0] if size else 0
+
+        self.stats["evicted"] += evicted
+        return evicted
+
+    def report(self) -> dict:
+        """export_stats에 기록할 캐시 통계"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "size_bytes": self.size_bytes(),
+        }
+
+    def close(self):
+        self.conn.close()
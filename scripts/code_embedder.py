@@ -20,6 +20,9 @@ from qdrant_client.models import Distance, VectorParams, PointStruct, PayloadSch
 from FlagEmbedding import BGEM3FlagModel
 from tqdm import tqdm
 
+from embedding_cache import EmbeddingCache
+from token_batching import encode_in_batches, token_lengths
+
 # 경로 설정
 KIDSNOTE_IOS_PATH = Path.home() / "Dev" / "Repo" / "kidsnote_ios" / "Sources"
 DATA_DIR = Path.home() / ".claude" / "notion-graph" / "data"
@@ -31,11 +34,18 @@ COLLECTION_NAME = "kidsnote_ios"
 VECTOR_DIM = 1024  # BGE-M3 dense 벡터 차원
 
 # 배치 설정
-BATCH_SIZE = 4  # CPU에서 안정적인 크기
+EMBED_WINDOW = int(os.environ.get("EMBED_WINDOW", 64))  # 길이순으로 다시 묶을 파일 수 (배치 크기는 토큰 예산으로 결정)
 MAX_TEXT_LENGTH = 4096  # 코드는 긴 파일이 많으므로 늘림
 MAX_CHARS = 8000  # BGE-M3 토큰 제한 고려
 UPSERT_BATCH_SIZE = 20
 
+# 임베딩 모델 / 캐시 설정 (바뀌지 않은 파일은 다시 인코딩하지 않음, EMBEDDING_CACHE=0이면 캐시 사용 안 함)
+MODEL_NAME = "BAAI/bge-m3"
+EMBEDDING_CACHE_ENABLED = os.environ.get("EMBEDDING_CACHE", "1") != "0"
+EMBEDDING_CACHE_FILE = DATA_DIR / "embedding_cache.sqlite"
+
+_embedding_cache = None
+
 
 def find_swift_files(source_dir: Path) -> list[Path]:
     """Sources 디렉토리에서 Swift 파일 찾기"""
@@ -137,7 +147,7 @@ def file_to_uuid(file_path: str) -> str:
 def init_model() -> BGEM3FlagModel:
     """BGE-M3 모델 초기화"""
     print("Loading BGE-M3 model...")
-    model = BGEM3FlagModel('BAAI/bge-m3', use_fp16=True)
+    model = BGEM3FlagModel(MODEL_NAME, use_fp16=True)
     print("Model loaded successfully")
     return model
 
@@ -182,8 +192,30 @@ def init_qdrant(recreate: bool = True) -> QdrantClient:
     return client
 
 
+def get_embedding_cache():
+    """임베딩 캐시 (처음 사용할 때 열림, 비활성화 시 None)"""
+    global _embedding_cache
+    if _embedding_cache is None and EMBEDDING_CACHE_ENABLED:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_FILE, MODEL_NAME, MAX_TEXT_LENGTH)
+    return _embedding_cache
+
+
 def embed_batch(model: BGEM3FlagModel, texts: list[str]) -> list[list[float]]:
-    """배치 임베딩"""
+    """배치 임베딩 (캐시에 있는 텍스트는 다시 인코딩하지 않음)"""
+    cache = get_embedding_cache()
+    if cache is None:
+        return encode_bucketed(model, texts)
+    return cache.embed(texts, lambda missing: encode_bucketed(model, missing))
+
+
+def encode_bucketed(model: BGEM3FlagModel, texts: list[str]) -> list[list[float]]:
+    """토큰 길이가 비슷한 텍스트끼리 토큰 예산 안에서 묶어 인코딩 (결과는 입력 순서)"""
+    lengths = token_lengths(getattr(model, "tokenizer", None), texts, MAX_TEXT_LENGTH)
+    return encode_in_batches(texts, lambda batch: encode_texts(model, batch), lengths)
+
+
+def encode_texts(model: BGEM3FlagModel, texts: list[str]) -> list[list[float]]:
+    """BGE-M3 dense 인코딩"""
     result = model.encode(
         texts,
         batch_size=len(texts),
@@ -238,8 +270,8 @@ def process_files(
     # 배치 임베딩
     points = []
 
-    for i in tqdm(range(0, len(valid_files), BATCH_SIZE), desc="Embedding"):
-        batch = valid_files[i:i + BATCH_SIZE]
+    for i in tqdm(range(0, len(valid_files), EMBED_WINDOW), desc="Embedding"):
+        batch = valid_files[i:i + EMBED_WINDOW]
         batch_texts = [item[3] for item in batch]
 
         try:
@@ -269,7 +301,7 @@ def process_files(
 
         except Exception as e:
             print(f"\nError processing batch: {e}")
-            stats["errors"] += BATCH_SIZE
+            stats["errors"] += len(batch)
             continue
 
         # 주기적으로 업서트
@@ -287,6 +319,10 @@ def process_files(
         client.upsert(collection_name=COLLECTION_NAME, points=points)
 
     stats["modules"] = sorted(stats["modules"])
+    cache = get_embedding_cache()
+    if cache is not None:
+        cache.evict()
+        stats["embedding_cache"] = cache.report()
     return stats
 
 
@@ -377,6 +413,10 @@ def main():
     print(f"Skipped (empty): {stats['skipped_empty']}")
     print(f"Errors: {stats['errors']}")
     print(f"Modules: {len(stats['modules'])}")
+    if "embedding_cache" in stats:
+        cache_stats = stats["embedding_cache"]
+        print(f"Embedding cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+              f"(hit rate {cache_stats['hit_rate']:.1%})")
     print(f"Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
 
     # 6. 컬렉션 정보 확인
@@ -392,6 +432,7 @@ def main():
         "processed": stats["processed"],
         "modules": stats["modules"],
         "duration_seconds": duration,
+        "embedding_cache": stats.get("embedding_cache"),
         "collection_name": COLLECTION_NAME,
         "vector_dim": VECTOR_DIM
     }, DATA_DIR / "code_embedding_stats.json")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+임베딩 캐시 (SQLite)
+- (모델 ID, max_length, 정규화한 텍스트 해시) → dense 벡터 (float16으로 저장)
+- 캐시에 없는 텍스트만 모델로 인코딩 (vector_store.py / code_embedder.py의 embed_batch)
+- 용량 초과 시 오래 사용되지 않은 순으로 제거
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 최대 캐시 크기 (벡터 기준, 1024차원 float16 벡터 하나가 2KB)
+EMBEDDING_CACHE_MAX_MB = int(os.environ.get("EMBEDDING_CACHE_MAX_MB", 1024))
+
+# 키/저장 형식이 바뀌면 올려서 기존 캐시를 무효화
+EMBEDDING_CACHE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed_at);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """공백 차이는 토크나이저 결과에 영향이 없으므로 연속 공백/줄바꿈을 한 칸으로 정규화"""
+    return " ".join((text or "").split())
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path, model_id: str, max_length: int, max_mb: int = EMBEDDING_CACHE_MAX_MB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_id = model_id
+        self.max_length = max_length
+        self.max_bytes = max_mb * 1024 * 1024
+        # pipeline.py에서는 임베딩 스레드가 사용 (한 번에 한 스레드만 접근)
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._check_version()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "evicted": 0,
+        }
+
+    def _check_version(self):
+        """캐시 포맷 버전이 다르면 전체 초기화"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row and int(row[0]) == EMBEDDING_CACHE_VERSION:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM embeddings")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                (str(EMBEDDING_CACHE_VERSION),),
+            )
+
+    def key(self, text: str) -> str:
+        data = f"{self.model_id}\0{self.max_length}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def get_many(self, keys: list) -> dict:
+        """캐시된 벡터 {key: 벡터} (없는 키는 제외)"""
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+        if found:
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+        return found
+
+    def put_many(self, items: dict):
+        """{key: 벡터} 저장"""
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float16).tobytes()
+            rows.append((key, self.model_id, blob, len(blob), now))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.stats["stored"] += len(rows)
+
+    def embed(self, texts: list, encode) -> list:
+        """캐시에 없는 텍스트만 encode(텍스트 목록 → 벡터 목록)로 인코딩해 입력 순서대로 반환
+
+        같은 배치 안의 중복 텍스트는 한 번만 인코딩한다.
+        """
+        keys = [self.key(text) for text in texts]
+        vectors = self.get_many(list(set(keys)))
+        self.stats["hits"] += sum(1 for key in keys if key in vectors)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        self.stats["misses"] += len(texts) - sum(1 for key in keys if key in vectors)
+
+        if missing:
+            encoded = dict(zip(missing, encode(list(missing.values()))))
+            self.put_many(encoded)
+            vectors.update(encoded)
+        return [vectors[key] for key in keys]
+
+    def size_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def evict(self) -> int:
+        """최대 크기를 넘으면 오래 사용되지 않은 벡터부터 제거"""
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM embeddings ORDER BY accessed_at ASC"):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+        with self.conn:
+            self.conn.executemany("DELETE FROM embeddings WHERE key = ?", keys)
+
+        self.stats["evicted"] += len(keys)
+        return len(keys)
+
+    def report(self) -> dict:
+        """캐시 통계"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "size_bytes": self.size_bytes(),
+        }
+
+    def close(self):
+        self.conn.close()
@@ -191,16 +191,19 @@ def hybrid_search_demo():
             return_colbert_vecs=False
         )['dense_vecs'][0].tolist()
 
-        results = qdrant.query_points(
+        # 청크 포인트를 페이지(notion_id)별로 묶어 가장 가까운 청크 점수로 순위
+        results = qdrant.query_points_groups(
             collection_name=COLLECTION_NAME,
             query=vec,
+            group_by="notion_id",
+            group_size=1,
             limit=3,
             with_payload=True,
             query_filter=word_filter
         )
 
         seed_ids = []
-        for i, hit in enumerate(results.points, 1):
+        for i, hit in enumerate((group.hits[0] for group in results.groups), 1):
             title = hit.payload.get('title', 'Untitled')
             notion_id = hit.payload.get('notion_id', '')
             score = hit.score
@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+로컬 가짜 Notion API 서버 (exporter 오프라인 벤치마크/회귀 테스트용)
+- search, blocks.children.list, databases.retrieve, databases.query 구현
+- 워크스페이스: 크기/트리 깊이를 지정한 합성 데이터, 또는 녹화 파일 재생
+- 응답 지연과 429(Retry-After) 주입, 서버 측 초당 요청 제한
+- --record: 실제 Notion API로 프록시하면서 응답을 녹화
+- --churn-interval: 주기적으로 임의 페이지를 수정 (sync_daemon.py 테스트용)
+
+사용 예:
+    python scripts/fake_notion.py --pages 500 --depth 3 --latency-ms 150
+    python scripts/fake_notion.py --record data/notion_recording.jsonl
+    python scripts/fake_notion.py --replay data/notion_recording.jsonl
+    python scripts/fake_notion.py --churn-interval 5
+    NOTION_BASE_URL=http://127.0.0.1:8765 NOTION_TOKEN=fake python scripts/notion_exporter.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+NOTION_API_URL = "https://api.notion.com"
+DEFAULT_PORT = 8765
+MAX_PAGE_SIZE = 100
+
+# 합성 블록에 사용할 타입 (자식을 가질 수 있는 타입은 toggle)
+TEXT_BLOCK_TYPES = ["paragraph", "heading_2", "bulleted_list_item", "to_do", "quote"]
+
+# 합성 데이터베이스 아이템의 Status 선택지
+STATUSES = ["Not started", "In progress", "Done"]
+
+LOREM = (
+    "notion export benchmark workspace page block content vector graph "
+    "embedding database query search latency cursor child synced tree"
+).split()
+
+
+def text_item(text: str) -> dict:
+    """실제 API와 같은 모양의 rich_text 항목 (서식 정보 포함)"""
+    return {
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": {
+            "bold": False, "italic": False, "strikethrough": False,
+            "underline": False, "code": False, "color": "default",
+        },
+        "plain_text": text,
+        "href": None,
+    }
+
+
+def generate_workspace(
+    pages: int = 200,
+    blocks_per_page: int = 40,
+    depth: int = 2,
+    fanout: int = 3,
+    nested_ratio: float = 0.1,
+    databases: int = 2,
+    items_per_db: int = 50,
+    seed: int = 0,
+) -> dict:
+    """합성 워크스페이스 생성 (같은 seed면 항상 같은 결과)
+
+    반환값: {"pages": [...], "children": {block_id: [...]}, "databases": {id: db}, "items": {db_id: [...]}}
+    데이터베이스 아이템도 실제 Notion처럼 search 결과에 포함된다.
+    """
+    rnd = random.Random(seed)
+    counter = [0]
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def new_id() -> str:
+        counter[0] += 1
+        return f"{seed:08x}-0000-4000-8000-{counter[0]:012x}"
+
+    def timestamp(offset_minutes: int) -> str:
+        return (base_time + timedelta(minutes=offset_minutes)).strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+    def rich_text(words: int) -> list:
+        text = " ".join(rnd.choice(LOREM) for _ in range(words))
+        return [text_item(text)]
+
+    children = {}
+
+    def make_blocks(count: int, level: int) -> list:
+        blocks = []
+        for _ in range(count):
+            block_id = new_id()
+            if level < depth and rnd.random() < nested_ratio:
+                block = {
+                    "object": "block", "id": block_id, "type": "toggle", "has_children": True,
+                    "toggle": {"rich_text": rich_text(4)},
+                }
+                children[block_id] = make_blocks(fanout, level + 1)
+            else:
+                block_type = rnd.choice(TEXT_BLOCK_TYPES)
+                block = {
+                    "object": "block", "id": block_id, "type": block_type, "has_children": False,
+                    block_type: {"rich_text": rich_text(rnd.randint(5, 30))},
+                }
+            blocks.append(block)
+        return blocks
+
+    def make_page(title: str, parent: dict, properties: dict = None) -> dict:
+        page_id = new_id()
+        edited = rnd.randint(0, 60 * 24 * 365)
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": timestamp(edited // 2),
+            "last_edited_time": timestamp(edited),
+            "parent": parent,
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+            "properties": {
+                "title": {"id": "title", "type": "title", "title": [
+                    text_item(title)
+                ]},
+                **(properties or {}),
+            },
+        }
+        children[page_id] = make_blocks(rnd.randint(blocks_per_page // 2, blocks_per_page * 3 // 2), 0)
+        return page
+
+    all_pages = [make_page(f"Page {i}", {"type": "workspace", "workspace": True}) for i in range(pages)]
+
+    db_objects, db_items = {}, {}
+    for d in range(databases):
+        db_id = new_id()
+        db_objects[db_id] = {
+            "object": "database",
+            "id": db_id,
+            "title": [text_item(f"Database {d}")],
+            "parent": {"type": "workspace", "workspace": True},
+            "properties": {
+                "Name": {"id": "title", "type": "title", "title": {}},
+                "Tags": {"id": "tags", "type": "multi_select", "multi_select": {"options": []}},
+                "Status": {"id": "status", "type": "select", "select": {"options": [
+                    {"id": f"opt-{status}", "name": status, "color": "default"} for status in STATUSES
+                ]}},
+                "Due": {"id": "due", "type": "date", "date": {}},
+                "Estimate": {"id": "estimate", "type": "number", "number": {"format": "number"}},
+                "Done": {"id": "done", "type": "checkbox", "checkbox": {}},
+                "Link": {"id": "link", "type": "url", "url": {}},
+                "Owner": {"id": "owner", "type": "people", "people": {}},
+                "Related": {"id": "related", "type": "relation",
+                            "relation": {"database_id": db_id, "type": "single_property", "single_property": {}}},
+            },
+        }
+        items = []
+        for i in range(items_per_db):
+            tag = rnd.choice(LOREM)
+            status = rnd.choice(STATUSES)
+            owner = f"user-{rnd.randint(1, 5)}"
+            items.append(make_page(
+                f"Item {d}-{i}",
+                {"type": "database_id", "database_id": db_id},
+                {
+                    "Tags": {"id": "tags", "type": "multi_select",
+                             "multi_select": [{"id": f"opt-{tag}", "name": tag, "color": "default"}]},
+                    "Status": {"id": "status", "type": "select",
+                               "select": {"id": f"opt-{status}", "name": status, "color": "default"}},
+                    "Due": {"id": "due", "type": "date",
+                            "date": {"start": timestamp(rnd.randint(0, 60 * 24 * 365))[:10], "end": None,
+                                     "time_zone": None}},
+                    "Estimate": {"id": "estimate", "type": "number", "number": rnd.randint(1, 13)},
+                    "Done": {"id": "done", "type": "checkbox", "checkbox": status == "Done"},
+                    "Link": {"id": "link", "type": "url", "url": f"https://example.com/{d}/{i}"},
+                    "Owner": {"id": "owner", "type": "people", "people": [
+                        {"object": "user", "id": f"{owner}-id", "name": owner, "avatar_url": None,
+                         "type": "person", "person": {"email": f"{owner}@example.com"}}
+                    ]},
+                    "Related": {"id": "related", "type": "relation", "has_more": False,
+                                "relation": [{"id": items[-1]["id"]}] if items else []},
+                },
+            ))
+        db_items[db_id] = items
+        all_pages.extend(items)
+
+    rnd.shuffle(all_pages)
+    return {"pages": all_pages, "children": children, "databases": db_objects, "items": db_items}
+
+
+def notion_now() -> str:
+    """현재 시각 (Notion처럼 last_edited_time은 분 단위로 내림)"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+
+def paragraph_block(text: str) -> dict:
+    return {
+        "object": "block", "id": str(uuid.uuid4()), "type": "paragraph", "has_children": False,
+        "paragraph": {"rich_text": [text_item(text)]},
+    }
+
+
+def paginate(items: list, start_cursor, page_size) -> dict:
+    """커서(목록 내 위치) 기반 페이지네이션 응답"""
+    start = int(start_cursor or 0)
+    size = min(int(page_size or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+    has_more = start + size < len(items)
+    return {
+        "object": "list",
+        "results": items[start:start + size],
+        "has_more": has_more,
+        "next_cursor": str(start + size) if has_more else None,
+    }
+
+
+def error_body(status: int, code: str, message: str) -> dict:
+    return {"object": "error", "status": status, "code": code, "message": message}
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """녹화/재생 조회 키 (쿼리 파라미터와 body JSON을 정규화)"""
+    parts = urlsplit(path)
+    query = sorted(parse_qsl(parts.query))
+    payload = json.loads(body) if body else None
+    return json.dumps([method, parts.path, query, payload], sort_keys=True)
+
+
+class FakeNotionServer(ThreadingHTTPServer):
+    """가짜 Notion API 서버
+
+    workspace / replay / upstream(녹화) 중 하나를 응답 소스로 사용한다.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", DEFAULT_PORT),
+        workspace: dict = None,
+        replay: str = None,
+        record: str = None,
+        upstream: str = NOTION_API_URL,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        rate_limit: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(address, FakeNotionHandler)
+        self.workspace = workspace
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = max(1.0, rate_limit)
+        self._last = time.monotonic()
+
+        self.recordings = {}
+        if replay:
+            with open(replay, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.recordings[entry["key"]] = entry
+
+        self.upstream = None
+        self.record_file = None
+        if record:
+            self.upstream = httpx.Client(base_url=upstream, timeout=60)
+            self.record_file = open(record, "a", encoding="utf-8")
+
+        self.stats = {"requests": 0, "injected_429": 0, "rate_limited": 0, "edits": 0, "endpoints": {}}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["endpoints"][endpoint] = self.stats["endpoints"].get(endpoint, 0) + 1
+
+    def throttle(self):
+        """429로 응답해야 하면 사유를 반환 (주입된 오류 또는 서버 측 속도 제한)"""
+        with self._lock:
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._last) * self.rate_limit)
+                self._last = now
+                if self._tokens < 1:
+                    self.stats["rate_limited"] += 1
+                    return "rate limit exceeded"
+                self._tokens -= 1
+            if self.error_rate and self._rnd.random() < self.error_rate:
+                self.stats["injected_429"] += 1
+                return "injected rate limit"
+        return None
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._rnd.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def record(self, key: str, status: int, body: dict):
+        with self._lock:
+            self.record_file.write(json.dumps({"key": key, "status": status, "body": body}, ensure_ascii=False))
+            self.record_file.write("\n")
+            self.record_file.flush()
+
+    def random_text(self, words: int = 12) -> str:
+        with self._lock:
+            return " ".join(self._rnd.choice(LOREM) for _ in range(words))
+
+    def edit_page(self, page_id: str = None, text: str = None) -> str:
+        """페이지 첫 블록을 바꾸고 last_edited_time 갱신 (page_id가 없으면 임의 페이지)"""
+        text = text or self.random_text()
+        with self._lock:
+            ws = self.workspace
+            if page_id:
+                page = next((p for p in ws["pages"] if p["id"] == page_id), None)
+            else:
+                page = self._rnd.choice(ws["pages"])
+            if page is None:
+                raise KeyError(page_id)
+            # 목록을 통째로 교체해 진행 중인 응답이 중간 상태를 보지 않게 함
+            ws["children"][page["id"]] = [paragraph_block(text)] + ws["children"][page["id"]][1:]
+            page["last_edited_time"] = notion_now()
+            self.stats["edits"] += 1
+        return page["id"]
+
+    def add_page(self, title: str, text: str = None) -> str:
+        """워크스페이스 최상위에 새 페이지 추가"""
+        text = text or self.random_text()
+        page_id = str(uuid.uuid4())
+        now = notion_now()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": now,
+            "last_edited_time": now,
+            "parent": {"type": "workspace", "workspace": True},
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+            "properties": {
+                "title": {"id": "title", "type": "title", "title": [
+                    text_item(title)
+                ]},
+            },
+        }
+        with self._lock:
+            ws = self.workspace
+            ws["children"][page_id] = [paragraph_block(text)]
+            ws["pages"] = [page] + ws["pages"]
+            self.stats["edits"] += 1
+        return page_id
+
+    def remove_page(self, page_id: str):
+        """페이지 삭제 (search 결과와 데이터베이스 목록에서 제외)"""
+        with self._lock:
+            ws = self.workspace
+            ws["pages"] = [p for p in ws["pages"] if p["id"] != page_id]
+            for db_id, items in ws["items"].items():
+                ws["items"][db_id] = [p for p in items if p["id"] != page_id]
+            self.stats["edits"] += 1
+
+    def start_churn(self, interval: float):
+        """interval초마다 임의 페이지 하나를 수정하는 백그라운드 스레드 시작"""
+        def churn():
+            while True:
+                time.sleep(interval)
+                page_id = self.edit_page()
+                print(f"  edited {page_id} at {datetime.now().strftime('%H:%M:%S')}")
+
+        threading.Thread(target=churn, daemon=True).start()
+
+    def server_close(self):
+        super().server_close()
+        if self.record_file is not None:
+            self.record_file.close()
+        if self.upstream is not None:
+            self.upstream.close()
+
+
+class FakeNotionHandler(BaseHTTPRequestHandler):
+    server: FakeNotionServer
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 stderr에 로그를 남기지 않음
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_api(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split("/") if s]
+        if segments[:1] != ["v1"]:
+            self.send_json(404, error_body(404, "object_not_found", f"Unknown path {parts.path}"))
+            return
+        segments = segments[1:]
+
+        endpoint = self.endpoint_name(method, segments)
+        self.server.count(endpoint)
+
+        reason = self.server.throttle()
+        if reason:
+            self.send_json(
+                429, error_body(429, "rate_limited", reason),
+                {"Retry-After": f"{self.server.retry_after:g}"},
+            )
+            return
+
+        delay = self.server.delay()
+        if delay:
+            time.sleep(delay)
+
+        key = request_key(method, self.path, raw_body)
+        if self.server.upstream is not None:
+            self.proxy(method, raw_body, key)
+        elif self.server.recordings:
+            entry = self.server.recordings.get(key)
+            if entry is None:
+                self.send_json(404, error_body(404, "object_not_found", f"No recording for {method} {self.path}"))
+            else:
+                self.send_json(entry["status"], entry["body"])
+        else:
+            body = json.loads(raw_body) if raw_body else {}
+            query = dict(parse_qsl(parts.query))
+            status, response = self.serve_workspace(method, segments, query, body)
+            self.send_json(status, response)
+
+    @staticmethod
+    def endpoint_name(method: str, segments: list) -> str:
+        if segments == ["search"]:
+            return "search"
+        if len(segments) == 3 and segments[0] == "blocks" and segments[2] == "children":
+            return "blocks.children.list"
+        if len(segments) == 3 and segments[0] == "databases" and segments[2] == "query":
+            return "databases.query"
+        if len(segments) == 2 and segments[0] == "databases":
+            return "databases.retrieve"
+        return f"{method} /{'/'.join(segments)}"
+
+    def serve_workspace(self, method: str, segments: list, query: dict, body: dict) -> tuple:
+        ws = self.server.workspace
+        endpoint = self.endpoint_name(method, segments)
+
+        if endpoint == "search" and method == "POST":
+            pages = ws["pages"]
+            sort = body.get("sort")
+            if sort and sort.get("timestamp") == "last_edited_time":
+                pages = sorted(
+                    pages, key=lambda p: p["last_edited_time"],
+                    reverse=sort.get("direction") == "descending",
+                )
+            return 200, paginate(pages, body.get("start_cursor"), body.get("page_size"))
+
+        if endpoint == "blocks.children.list" and method == "GET":
+            block_id = segments[1]
+            if block_id not in ws["children"]:
+                return 404, error_body(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+            return 200, paginate(ws["children"][block_id], query.get("start_cursor"), query.get("page_size"))
+
+        if endpoint == "databases.retrieve" and method == "GET":
+            db = ws["databases"].get(segments[1])
+            if db is None:
+                return 404, error_body(404, "object_not_found", f"Could not find database with ID: {segments[1]}.")
+            return 200, db
+
+        if endpoint == "databases.query" and method == "POST":
+            items = ws["items"].get(segments[1])
+            if items is None:
+                return 404, error_body(404, "object_not_found", f"Could not find database with ID: {segments[1]}.")
+            return 200, paginate(items, body.get("start_cursor"), body.get("page_size"))
+
+        return 400, error_body(400, "invalid_request_url", f"Unsupported endpoint {method} {self.path}")
+
+    def proxy(self, method: str, raw_body: bytes, key: str):
+        """실제 Notion API로 전달하고 성공 응답을 녹화"""
+        headers = {
+            name: self.headers[name]
+            for name in ("Authorization", "Notion-Version", "Content-Type")
+            if self.headers.get(name)
+        }
+        response = self.server.upstream.request(method, self.path, content=raw_body, headers=headers)
+        body = response.json()
+        if response.status_code == 200:
+            self.server.record(key, response.status_code, body)
+        retry_after = response.headers.get("Retry-After")
+        self.send_json(response.status_code, body, {"Retry-After": retry_after} if retry_after else None)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="로컬 가짜 Notion API 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_workspace_args(parser)
+    add_fault_args(parser)
+    parser.add_argument("--replay", help="녹화 파일(JSONL)을 재생")
+    parser.add_argument("--record", help="실제 Notion API로 프록시하면서 응답을 JSONL로 녹화")
+    parser.add_argument("--upstream", default=NOTION_API_URL, help="녹화 시 프록시할 API 주소")
+    parser.add_argument(
+        "--churn-interval", type=float, default=0.0,
+        help="합성 워크스페이스의 임의 페이지를 이 간격(초)마다 수정 (0이면 수정 없음)",
+    )
+    return parser.parse_args()
+
+
+def add_workspace_args(parser):
+    """합성 워크스페이스 옵션 (benchmark_exporter.py와 공유)"""
+    parser.add_argument("--pages", type=int, default=200, help="일반 페이지 수")
+    parser.add_argument("--blocks-per-page", type=int, default=40, help="페이지당 평균 최상위 블록 수")
+    parser.add_argument("--depth", type=int, default=2, help="중첩 블록 최대 깊이")
+    parser.add_argument("--fanout", type=int, default=3, help="중첩 블록당 자식 수")
+    parser.add_argument("--nested-ratio", type=float, default=0.1, help="자식을 가진 블록 비율")
+    parser.add_argument("--databases", type=int, default=2, help="데이터베이스 수")
+    parser.add_argument("--items-per-db", type=int, default=50, help="데이터베이스당 아이템 수")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def add_fault_args(parser):
+    """지연/오류 주입 옵션 (benchmark_exporter.py와 공유)"""
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="응답마다 추가할 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="지연 시간 변동폭 (±ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429를 주입할 요청 비율 (0~1)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 응답의 Retry-After (초)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="서버 측 초당 요청 제한 (0이면 없음)")
+
+
+def workspace_from_args(args) -> dict:
+    return generate_workspace(
+        pages=args.pages,
+        blocks_per_page=args.blocks_per_page,
+        depth=args.depth,
+        fanout=args.fanout,
+        nested_ratio=args.nested_ratio,
+        databases=args.databases,
+        items_per_db=args.items_per_db,
+        seed=args.seed,
+    )
+
+
+def fault_kwargs(args) -> dict:
+    return {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "retry_after": args.retry_after,
+        "rate_limit": args.rate_limit,
+        "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    workspace = None if args.replay or args.record else workspace_from_args(args)
+    server = FakeNotionServer(
+        (args.host, args.port),
+        workspace=workspace,
+        replay=args.replay,
+        record=args.record,
+        upstream=args.upstream,
+        **fault_kwargs(args),
+    )
+
+    if workspace is not None:
+        source = (f"synthetic workspace ({len(workspace['pages'])} pages, "
+                  f"{sum(len(b) for b in workspace['children'].values())} blocks)")
+    elif args.replay:
+        source = f"replay {args.replay} ({len(server.recordings)} responses)"
+    else:
+        source = f"recording {args.upstream} → {args.record}"
+
+    print(f"Fake Notion API listening on {server.base_url} ({source})")
+    print(f"  NOTION_BASE_URL={server.base_url} NOTION_TOKEN=fake python scripts/notion_exporter.py")
+    if args.churn_interval > 0 and workspace is not None:
+        print(f"Editing a random page every {args.churn_interval:g}s")
+        server.start_churn(args.churn_interval)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nServed {server.stats['requests']} requests: {server.stats['endpoints']}")
@@ -4,20 +4,21 @@ Neo4j 그래프 구축
 Notion 페이지 → Node/Relationship 변환
 """
 
-import json
+import argparse
 import os
-from pathlib import Path
 from datetime import datetime
 from neo4j import GraphDatabase
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+from notion_properties import graph_properties
+from page_store import DATA_DIR, PageReader, get_page_hashes, resolve_pages_path
+
 # 환경 변수 로드
 load_dotenv()
 
 # 경로 설정
-DATA_DIR = Path(__file__).parent.parent / "data"
-PAGES_FILE = DATA_DIR / "pages.json"
+PAGES_FILE = resolve_pages_path(DATA_DIR)
 
 # Neo4j 설정
 NEO4J_URI = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
@@ -31,12 +32,10 @@ if not NEO4J_PASSWORD:
     )
 
 
-def load_pages() -> list[dict]:
-    """pages.json 로드"""
-    print(f"Loading pages from {PAGES_FILE}...")
-    with open(PAGES_FILE, "r", encoding="utf-8") as f:
-        pages = json.load(f)
-    print(f"Loaded {len(pages)} pages")
+def load_pages() -> PageReader:
+    """페이지 저장소 열기 (순회할 때마다 한 줄씩 스트리밍으로 읽음)"""
+    pages = PageReader(PAGES_FILE)
+    print(f"Streaming pages from {PAGES_FILE} ({len(pages)} pages)")
     return pages
 
 
@@ -86,40 +85,38 @@ def create_constraints(driver):
     print("Constraints and indexes created")
 
 
-def create_page_nodes(driver, pages: list[dict]) -> dict:
+def page_properties(page: dict) -> dict:
+    """Page 노드 속성 (변경 감지용 필드 해시와 Notion 속성 값 prop_* 포함)"""
+    parent = page.get("parent", {})
+    hashes = get_page_hashes(page)
+    return {
+        "id": page["id"],
+        "title": page.get("title", "Untitled"),
+        "url": page.get("url", ""),
+        "wordCount": page.get("word_count", 0),
+        "blockCount": page.get("block_count", 0),
+        "createdAt": page.get("created_time", ""),
+        "updatedAt": page.get("last_edited_time", ""),
+        "parentId": parent.get("page_id", "") or parent.get("database_id", ""),
+        "parentType": parent.get("type", ""),
+        "titleHash": hashes["title"],
+        "contentHash": hashes["content"],
+        "linksHash": hashes["links"],
+        "tagsHash": hashes["tags"],
+        **graph_properties(page),
+    }
+
+
+def create_page_nodes(driver, pages: PageReader, quiet: bool = False) -> dict:
     """Page 노드 생성"""
-    print("\nCreating Page nodes...")
+    if not quiet:
+        print("\nCreating Page nodes...")
     stats = {"created": 0, "errors": 0}
 
     with driver.session() as session:
-        for page in tqdm(pages, desc="Creating Pages"):
+        for page in (pages if quiet else tqdm(pages, desc="Creating Pages")):
             try:
-                created = page.get("created_time", "")
-                updated = page.get("last_edited_time", "")
-
-                session.run("""
-                    CREATE (p:Page {
-                        id: $id,
-                        title: $title,
-                        url: $url,
-                        wordCount: $wordCount,
-                        blockCount: $blockCount,
-                        createdAt: $created,
-                        updatedAt: $updated,
-                        parentId: $parentId,
-                        parentType: $parentType
-                    })
-                """,
-                    id=page["id"],
-                    title=page.get("title", "Untitled"),
-                    url=page.get("url", ""),
-                    wordCount=page.get("word_count", 0),
-                    blockCount=page.get("block_count", 0),
-                    created=created,
-                    updated=updated,
-                    parentId=page.get("parent", {}).get("page_id", "") or page.get("parent", {}).get("database_id", ""),
-                    parentType=page.get("parent", {}).get("type", "")
-                )
+                session.run("CREATE (p:Page $props)", props=page_properties(page))
                 stats["created"] += 1
             except Exception as e:
                 stats["errors"] += 1
@@ -129,19 +126,45 @@ def create_page_nodes(driver, pages: list[dict]) -> dict:
     return stats
 
 
-def create_relationships(driver, pages: list[dict]) -> dict:
+def collect_parents(pages: PageReader) -> tuple:
+    """페이지 ID 집합과 본문의 child_page / child_database 블록으로 기록된 부모 관계
+
+    토글·컬럼 안의 하위 페이지는 parent가 block_id라 parent 필드만으로는 알 수 없다.
+    """
+    page_ids = set()
+    block_parents = {}
+    database_parents = {}
+    for page in pages:
+        page_ids.add(page["id"])
+        for child_id in page.get("child_pages", []):
+            block_parents[child_id] = page["id"]
+        for db_id in page.get("child_databases", []):
+            database_parents[db_id] = page["id"]
+    return page_ids, block_parents, database_parents
+
+
+def resolve_parent_id(page: dict, block_parents: dict, database_parents: dict) -> str:
+    """CHILD_OF 관계의 부모 페이지 ID"""
+    parent = page.get("parent", {})
+    return (
+        parent.get("page_id", "")
+        or block_parents.get(page["id"], "")
+        or database_parents.get(parent.get("database_id", ""), "")
+    )
+
+
+def create_relationships(driver, pages: PageReader) -> dict:
     """관계 생성"""
     print("\nCreating relationships...")
     stats = {"child_of": 0, "links_to": 0, "errors": 0}
 
-    # 페이지 ID 집합
-    page_ids = {page["id"] for page in pages}
+    page_ids, block_parents, database_parents = collect_parents(pages)
 
     with driver.session() as session:
         for page in tqdm(pages, desc="Creating Relationships"):
             try:
                 # 부모-자식 관계 (CHILD_OF)
-                parent_id = page.get("parent", {}).get("page_id", "")
+                parent_id = resolve_parent_id(page, block_parents, database_parents)
                 if parent_id and parent_id in page_ids:
                     result = session.run("""
                         MATCH (child:Page {id: $childId})
@@ -172,7 +195,7 @@ def create_relationships(driver, pages: list[dict]) -> dict:
     return stats
 
 
-def create_date_nodes(driver, pages: list[dict]) -> dict:
+def create_date_nodes(driver, pages: PageReader) -> dict:
     """Date 노드 및 CREATED_ON 관계 생성"""
     print("\nCreating Date nodes and relationships...")
     stats = {"dates": 0, "relationships": 0}
@@ -224,6 +247,138 @@ def create_date_nodes(driver, pages: list[dict]) -> dict:
     return stats
 
 
+def load_graph_state(driver, page_ids: list = None) -> dict:
+    """기존 Page 노드의 속성과 CHILD_OF / LINKS_TO 대상 (page_ids가 주어지면 해당 페이지만)"""
+    state = {}
+    with driver.session() as session:
+        result = session.run("""
+            MATCH (p:Page)
+            WHERE $ids IS NULL OR p.id IN $ids
+            OPTIONAL MATCH (p)-[:CHILD_OF]->(parent:Page)
+            OPTIONAL MATCH (p)-[:LINKS_TO]->(target:Page)
+            RETURN p.id AS id, properties(p) AS props,
+                   head(collect(DISTINCT parent.id)) AS parentId,
+                   collect(DISTINCT target.id) AS links
+        """, ids=page_ids)
+        for record in result:
+            state[record["id"]] = {
+                "props": record["props"],
+                "parent": record["parentId"],
+                "links": set(record["links"]),
+            }
+    return state
+
+
+def sync_pages(driver, pages, parents: tuple = None, quiet: bool = False) -> dict:
+    """기존 그래프와 비교해 바뀐 노드/관계만 갱신 (증분 모드)
+
+    - 새 페이지: 노드 + 관계 + CREATED_ON 생성
+    - 속성/해시가 바뀐 페이지: 노드 속성만 갱신 (본문 해시가 같으면 속성만 바뀐 수정)
+    - 부모나 링크 대상이 바뀐 페이지: 해당 관계만 다시 생성
+    - 더 이상 없는 페이지: 노드와 관계 삭제
+
+    parents(collect_parents 결과)를 넘기면 pages는 전체 중 일부로 보고
+    해당 페이지만 비교하며 삭제는 하지 않는다 (sync_daemon.py).
+    """
+    if not quiet:
+        print("\nSyncing pages with existing graph...")
+    stats = {
+        "created": 0, "updated": 0, "content_changed": 0, "unchanged": 0, "deleted": 0,
+        "child_of": 0, "links_to": 0, "dates": 0, "errors": 0,
+    }
+
+    partial = parents is not None
+    if partial:
+        page_ids, block_parents, database_parents = parents
+        state = load_graph_state(driver, [page["id"] for page in pages])
+    else:
+        page_ids, block_parents, database_parents = collect_parents(pages)
+        state = load_graph_state(driver)
+        print(f"  {len(state)} pages in graph, {len(page_ids)} pages in export")
+
+    progress = (lambda items, desc: items) if quiet else tqdm
+
+    with driver.session() as session:
+        stale_ids = [] if partial else [page_id for page_id in state if page_id not in page_ids]
+        stats["deleted"] = delete_pages(driver, stale_ids)
+
+        # 노드 먼저 갱신해야 새 페이지를 가리키는 관계를 만들 수 있음
+        for page in progress(pages, desc="Syncing Pages"):
+            props = page_properties(page)
+            old = state.get(page["id"])
+            try:
+                if old is None:
+                    session.run("CREATE (p:Page $props)", props=props)
+                    stats["created"] += 1
+                elif old["props"] != props:
+                    session.run("MATCH (p:Page {id: $id}) SET p = $props", id=page["id"], props=props)
+                    stats["updated"] += 1
+                    if old["props"].get("contentHash") != props["contentHash"]:
+                        stats["content_changed"] += 1
+                else:
+                    stats["unchanged"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                if stats["errors"] <= 3:
+                    print(f"\nError syncing page {page.get('id')}: {e}")
+
+        for page in progress(pages, desc="Syncing Relationships"):
+            old = state.get(page["id"], {"props": {}, "parent": None, "links": set()})
+            try:
+                parent_id = resolve_parent_id(page, block_parents, database_parents)
+                parent_id = parent_id if parent_id in page_ids else None
+                if old["parent"] != parent_id:
+                    session.run("MATCH (p:Page {id: $id})-[r:CHILD_OF]->() DELETE r", id=page["id"])
+                    if parent_id:
+                        session.run("""
+                            MATCH (child:Page {id: $childId})
+                            MATCH (parent:Page {id: $parentId})
+                            CREATE (child)-[:CHILD_OF]->(parent)
+                        """, childId=page["id"], parentId=parent_id)
+                        stats["child_of"] += 1
+
+                links = {link_id for link_id in page.get("links", []) if link_id in page_ids}
+                if old["links"] != links:
+                    session.run("MATCH (p:Page {id: $id})-[r:LINKS_TO]->() DELETE r", id=page["id"])
+                    session.run("""
+                        MATCH (from:Page {id: $fromId})
+                        UNWIND $toIds AS toId
+                        MATCH (to:Page {id: toId})
+                        CREATE (from)-[:LINKS_TO]->(to)
+                    """, fromId=page["id"], toIds=sorted(links))
+                    stats["links_to"] += len(links)
+
+                created = page.get("created_time", "")
+                if created and old["props"].get("createdAt") != created:
+                    date_str = created.split("T")[0]
+                    year, month, day = (int(part) for part in date_str.split("-"))
+                    session.run("""
+                        MATCH (p:Page {id: $pageId})
+                        OPTIONAL MATCH (p)-[r:CREATED_ON]->()
+                        DELETE r
+                        WITH DISTINCT p
+                        MERGE (d:Date {date: $date})
+                        ON CREATE SET d.year = $year, d.month = $month, d.day = $day
+                        CREATE (p)-[:CREATED_ON]->(d)
+                    """, pageId=page["id"], date=date_str, year=year, month=month, day=day)
+                    stats["dates"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                if stats["errors"] <= 3:
+                    print(f"\nError syncing relationships for {page.get('id')}: {e}")
+
+    return stats
+
+
+def delete_pages(driver, page_ids: list) -> int:
+    """Page 노드와 관계 삭제"""
+    if not page_ids:
+        return 0
+    with driver.session() as session:
+        session.run("MATCH (p:Page) WHERE p.id IN $ids DETACH DELETE p", ids=list(page_ids))
+    return len(page_ids)
+
+
 def analyze_graph(driver) -> dict:
     """그래프 분석"""
     print("\nAnalyzing graph...")
@@ -260,7 +415,17 @@ def analyze_graph(driver) -> dict:
     return stats
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Neo4j 그래프 구축")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="그래프를 지우지 않고 바뀐 페이지의 노드/관계만 갱신",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     start_time = datetime.now()
     print(f"Starting graph build at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
@@ -272,20 +437,28 @@ def main():
     driver = init_neo4j()
 
     try:
-        # 3. 기존 데이터 삭제
-        clear_database(driver)
-
-        # 4. 제약조건/인덱스 생성
-        create_constraints(driver)
-
-        # 5. Page 노드 생성
-        page_stats = create_page_nodes(driver, pages)
-
-        # 6. 관계 생성
-        rel_stats = create_relationships(driver, pages)
-
-        # 7. Date 노드 생성
-        date_stats = create_date_nodes(driver, pages)
+        if args.incremental:
+            # 3-7. 바뀐 페이지만 갱신
+            create_constraints(driver)
+            sync_stats = sync_pages(driver, pages)
+            print(f"  Created: {sync_stats['created']}, updated: {sync_stats['updated']} "
+                  f"(content changed: {sync_stats['content_changed']}), "
+                  f"unchanged: {sync_stats['unchanged']}, deleted: {sync_stats['deleted']}")
+        else:
+            # 3. 기존 데이터 삭제
+            clear_database(driver)
+
+            # 4. 제약조건/인덱스 생성
+            create_constraints(driver)
+
+            # 5. Page 노드 생성
+            page_stats = create_page_nodes(driver, pages)
+
+            # 6. 관계 생성
+            rel_stats = create_relationships(driver, pages)
+
+            # 7. Date 노드 생성
+            date_stats = create_date_nodes(driver, pages)
 
         # 8. 그래프 분석
         analysis = analyze_graph(driver)
@@ -6,21 +6,57 @@ Notion 데이터 추출기
 - JSON 파일로 저장
 """
 
+import argparse
+import asyncio
+import heapq
 import json
+import multiprocessing
 import os
+import shutil
 import time
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from notion_client import Client
+from notion_client import AsyncClient, Client
 from dotenv import load_dotenv
 
+from block_cache import BlockCache
+from notion_properties import normalize_properties, normalize_schema
+from page_store import DATA_DIR, PAGES_FILENAME, PageStore, PageWriter, iter_pages, page_hashes, resolve_pages_path
+from rate_limiter import RateLimiter, SharedBucket
+from serialization import artifact_name, dump_json, load_json, resolve_artifact
+from snapshots import SNAPSHOT_DIR_NAME, SnapshotStore
+from telemetry import Telemetry
+
 # 환경 변수 로드
 load_dotenv()
 
-# 데이터 저장 경로
-DATA_DIR = Path(__file__).parent.parent / "data"
+# 데이터 저장 경로 (page_store.DATA_DIR, NOTION_EXPORT_DIR로 변경 가능)
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Notion API 주소 (로컬 가짜 서버 scripts/fake_notion.py로 바꿀 때 사용)
+NOTION_BASE_URL = os.environ.get("NOTION_BASE_URL")
+
+# 비동기 크롤링 시 동시에 진행할 최대 API 요청 수
+NOTION_CONCURRENCY = int(os.environ.get("NOTION_CONCURRENCY", 8))
+
+# 블록 트리 최대 탐색 깊이 (무한 재귀 방지)
+MAX_BLOCK_DEPTH = 10
+
+# 원본 Notion 속성 JSON도 함께 기록할지 (기본은 축약된 타입별 값만 기록)
+EXPORT_RAW_PROPERTIES = os.environ.get("EXPORT_RAW_PROPERTIES", "").lower() in ("1", "true", "yes")
+
+# 하위 트리를 내용으로 펼치지 않고 그래프 엣지로만 기록하는 블록 타입
+# (하위 페이지/DB는 search와 export_all_databases가 별도로 가져옴)
+EDGE_BLOCK_TYPES = {"child_page", "child_database"}
+
+# 증분 export 기준점(high-water mark) 저장 파일
+EXPORT_STATE_FILE = DATA_DIR / "export_state.json"
+
+# 긴 크롤링을 이어서 실행하기 위한 체크포인트
+CHECKPOINT_FILE = DATA_DIR / "export_checkpoint.json"
+CHECKPOINT_INTERVAL = int(os.environ.get("EXPORT_CHECKPOINT_INTERVAL", 50))  # 페이지 수
+
 
 def get_notion_token():
     """환경 변수에서 Notion API 토큰 가져오기"""
@@ -33,6 +69,14 @@ def get_notion_token():
     return token
 
 
+def client_options(token: str) -> dict:
+    """Client/AsyncClient 생성 옵션"""
+    options = {"auth": token}
+    if NOTION_BASE_URL:
+        options["base_url"] = NOTION_BASE_URL.rstrip("/")
+    return options
+
+
 def extract_title(page: dict) -> str:
     """페이지에서 제목 추출"""
     props = page.get("properties", {})
@@ -61,70 +105,136 @@ def extract_db_title(db: dict) -> str:
     return "Untitled Database"
 
 
-def blocks_to_text(blocks: list) -> str:
-    """블록들을 텍스트로 변환"""
-    text_parts = []
+# 블록 타입별 텍스트 렌더러 (block_type → 블록 본문 dict를 받아 텍스트 반환)
+BLOCK_RENDERERS = {}
 
-    for block in blocks:
-        block_type = block.get("type", "")
 
-        # 텍스트 포함 블록 타입들
-        text_block_types = [
-            "paragraph",
-            "heading_1",
-            "heading_2",
-            "heading_3",
-            "bulleted_list_item",
-            "numbered_list_item",
-            "to_do",
-            "toggle",
-            "quote",
-            "callout",
-        ]
+def register_block_renderer(*block_types):
+    """블록 타입 렌더러 등록 데코레이터"""
+    def decorator(fn):
+        for block_type in block_types:
+            BLOCK_RENDERERS[block_type] = fn
+        return fn
+    return decorator
 
-        if block_type in text_block_types:
-            block_content = block.get(block_type, {})
-            rich_text = block_content.get("rich_text", [])
-            text = "".join([t.get("plain_text", "") for t in rich_text])
-            if text:
-                text_parts.append(text)
 
-        # 코드 블록
-        elif block_type == "code":
-            code_content = block.get("code", {})
-            rich_text = code_content.get("rich_text", [])
-            text = "".join([t.get("plain_text", "") for t in rich_text])
-            if text:
-                text_parts.append(f"```\n{text}\n```")
+def plain_text(rich_text: list) -> str:
+    """rich_text 배열을 일반 텍스트로 변환"""
+    return "".join([t.get("plain_text", "") for t in rich_text])
+
+
+@register_block_renderer(
+    "paragraph",
+    "heading_1",
+    "heading_2",
+    "heading_3",
+    "bulleted_list_item",
+    "numbered_list_item",
+    "to_do",
+    "toggle",
+    "quote",
+    "callout",
+)
+def render_rich_text(content: dict) -> str:
+    return plain_text(content.get("rich_text", []))
+
+
+# 제목 블록 타입 → 제목 수준
+HEADING_LEVELS = {"heading_1": 1, "heading_2": 2, "heading_3": 3}
+
+
+@register_block_renderer("code")
+def render_code(content: dict) -> str:
+    text = plain_text(content.get("rich_text", []))
+    return f"```\n{text}\n```" if text else ""
+
+
+@register_block_renderer("table_row")
+def render_table_row(content: dict) -> str:
+    cells = [plain_text(cell) for cell in content.get("cells", [])]
+    return " | ".join(cells) if any(cells) else ""
+
+
+@register_block_renderer("image", "video", "file", "pdf", "bookmark", "embed")
+def render_caption(content: dict) -> str:
+    return plain_text(content.get("caption", []))
+
+
+@register_block_renderer("equation")
+def render_equation(content: dict) -> str:
+    return content.get("expression", "")
+
 
-    return "\n".join(text_parts)
+def iter_rich_text(content: dict):
+    """블록 본문의 모든 rich_text 항목 (본문, 캡션, 표 셀)"""
+    yield from content.get("rich_text", [])
+    yield from content.get("caption", [])
+    for cell in content.get("cells", []):
+        yield from cell
 
 
-def extract_links(blocks: list) -> list:
-    """블록에서 다른 페이지 링크 추출"""
-    links = []
+def extract_block_content(blocks: list, block_types: Counter = None) -> dict:
+    """블록 목록을 한 번만 순회하며 텍스트, 링크, 단어 수, 하위 페이지/DB를 추출
+
+    block_types가 주어지면 블록 타입별 개수를 누적한다.
+    제목 블록은 content 안의 시작 위치를 headings에 기록한다 (임베딩 청크의 섹션 경계).
+    """
+    text_parts = []
+    headings = []
+    length = 0  # 지금까지 이어 붙인 content 길이 (구분자 포함)
+    links = set()
+    word_count = 0
+    child_pages = []
+    child_databases = []
 
     for block in blocks:
         block_type = block.get("type", "")
-        block_content = block.get(block_type, {})
+        content = block.get(block_type, {})
+        if block_types is not None:
+            block_types[block_type] += 1
+
+        renderer = BLOCK_RENDERERS.get(block_type)
+        if renderer:
+            text = renderer(content)
+            if text:
+                if block_type in HEADING_LEVELS:
+                    headings.append({"offset": length, "level": HEADING_LEVELS[block_type], "text": text})
+                text_parts.append(text)
+                length += len(text) + 1
+                word_count += len(text.split())
 
-        # rich_text에서 mention 찾기
-        rich_text = block_content.get("rich_text", [])
-        for text_item in rich_text:
+        # rich_text의 페이지 mention
+        for text_item in iter_rich_text(content):
             if text_item.get("type") == "mention":
                 mention = text_item.get("mention", {})
                 if mention.get("type") == "page":
                     page_id = mention.get("page", {}).get("id")
                     if page_id:
-                        links.append(page_id)
+                        links.add(page_id)
 
         # link_to_page 블록
         if block_type == "link_to_page":
-            link_content = block.get("link_to_page", {})
-            if link_content.get("type") == "page_id":
-                links.append(link_content.get("page_id"))
-
-    return list(set(links))
+            if content.get("type") == "page_id":
+                links.add(content.get("page_id"))
+
+        # 하위 페이지/데이터베이스 (graph_builder의 CHILD_OF 엣지)
+        elif block_type == "child_page":
+            child_pages.append(block["id"])
+        elif block_type == "child_database":
+            child_databases.append(block["id"])
+
+    data = {
+        "content": "\n".join(text_parts),
+        "links": list(links),
+        "word_count": word_count,
+        "block_count": len(blocks),
+        "child_pages": child_pages,
+        "child_databases": child_databases,
+    }
+    # 제목이 없는 페이지는 레코드가 이전과 같도록 필드를 생략
+    if headings:
+        data["headings"] = headings
+    return data
 
 
 def extract_tags(page: dict) -> list:
@@ -149,147 +259,659 @@ def extract_tags(page: dict) -> list:
     return tags
 
 
+def should_descend(block: dict) -> bool:
+    """블록의 자식을 페이지 내용으로 가져올지 여부"""
+    return block.get("has_children", False) and block.get("type") not in EDGE_BLOCK_TYPES
+
+
+def synced_source_id(block: dict):
+    """동기화 블록이면 실제 하위 블록을 가진 원본 블록 ID, 아니면 None"""
+    if block.get("type") != "synced_block":
+        return None
+    synced_from = block.get("synced_block", {}).get("synced_from")
+    if synced_from:
+        return synced_from.get("block_id")
+    return block["id"]  # 원본 동기화 블록
+
+
+def has_synced_reference(blocks: list) -> bool:
+    """다른 곳의 원본을 가져온 동기화 블록이 있는지 (원본이 바뀌어도 이 페이지의 last_edited_time은 그대로)"""
+    return any(
+        block.get("type") == "synced_block" and block.get("synced_block", {}).get("synced_from")
+        for block in blocks
+    )
+
+
+def load_export_state() -> dict:
+    """이전 실행의 export 상태(워터마크) 로드"""
+    if not EXPORT_STATE_FILE.exists():
+        return {}
+    with open(EXPORT_STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_export_state(state: dict):
+    """export 상태(워터마크) 저장"""
+    with open(EXPORT_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def load_checkpoint() -> dict:
+    """중단된 export의 체크포인트 로드 (없으면 None)"""
+    if not CHECKPOINT_FILE.exists():
+        return None
+    with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint: dict):
+    """체크포인트를 원자적으로 저장"""
+    tmp_file = CHECKPOINT_FILE.with_name(CHECKPOINT_FILE.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(tmp_file, CHECKPOINT_FILE)
+
+
+def search_params(cursor, since=None) -> dict:
+    """페이지 search 요청 파라미터 (since가 있으면 최근 수정순 정렬)"""
+    params = {
+        "filter": {"property": "object", "value": "page"},
+        "start_cursor": cursor,
+        "page_size": 100,
+    }
+    if since:
+        params["sort"] = {"direction": "descending", "timestamp": "last_edited_time"}
+    return params
+
+
+def merge_by_id(existing: list, updates: list) -> list:
+    """id 기준으로 기존 레코드를 갱신하고 새 레코드는 뒤에 추가"""
+    updated = {item["id"]: item for item in updates}
+    merged = [updated.pop(item["id"], item) for item in existing]
+    merged.extend(item for item in updates if item["id"] in updated)
+    return merged
+
+
+def build_page_data(page: dict, blocks: list, block_types: Counter = None, raw_properties: bool = False) -> dict:
+    """search 결과 페이지와 블록 목록으로 페이지 레코드 생성 (raw_properties면 원본 속성 JSON도 기록)"""
+    page_data = {
+        "id": page["id"],
+        "title": extract_title(page),
+        "created_time": page["created_time"],
+        "last_edited_time": page["last_edited_time"],
+        "parent": page.get("parent", {}),
+        "properties": normalize_properties(page.get("properties", {})),
+        "url": page.get("url", ""),
+        "tags": extract_tags(page),
+    }
+    if raw_properties:
+        page_data["raw_properties"] = page.get("properties", {})
+
+    page_data.update(extract_block_content(blocks, block_types))
+    # 속성만 바뀐 수정과 본문 수정을 하위 단계에서 구분할 수 있도록 필드별 해시 기록
+    page_data["hashes"] = page_hashes(page_data)
+    return page_data
+
+
+def page_root(page: dict, pages_by_id: dict) -> str:
+    """샤드 분할 기준이 되는 최상위 조상 (목록에 있는 부모 페이지를 따라 올라감)
+
+    데이터베이스 아이템은 데이터베이스 단위로 묶는다.
+    """
+    seen = set()
+    while page["id"] not in seen:
+        seen.add(page["id"])
+        parent = page.get("parent", {})
+        if parent.get("type") == "database_id":
+            return parent["database_id"]
+        parent_page = pages_by_id.get(parent.get("page_id"))
+        if parent_page is None:
+            return page["id"]
+        page = parent_page
+    return page["id"]
+
+
+def partition_pages(pages: list, shards: int) -> list:
+    """최상위 페이지 단위로 묶은 뒤 페이지 수가 고르게 되도록 샤드에 배정 (각 샤드는 입력 순서 유지)"""
+    pages_by_id = {page["id"]: page for page in pages}
+    groups = {}
+    for position, page in enumerate(pages):
+        groups.setdefault(page_root(page, pages_by_id), []).append(position)
+
+    # 큰 그룹부터 가장 적게 배정된 샤드에 넣음
+    loads = [(0, index) for index in range(shards)]
+    assigned = [[] for _ in range(shards)]
+    for positions in sorted(groups.values(), key=len, reverse=True):
+        load, index = heapq.heappop(loads)
+        assigned[index].extend(positions)
+        heapq.heappush(loads, (load + len(positions), index))
+
+    return [[pages[position] for position in sorted(positions)] for positions in assigned]
+
+
+def shard_stats_path(output: Path) -> Path:
+    return output.with_name(output.stem + "_stats.json")
+
+
+def export_shard(index, pages, output, rate_bucket, use_async, concurrency, use_cache, raw_properties):
+    """샤드 worker 프로세스: 배정된 페이지들의 블록을 가져와 샤드 파일에 기록"""
+    exporter = NotionExporter(
+        use_async=use_async,
+        concurrency=concurrency,
+        use_cache=use_cache,
+        rate_bucket=rate_bucket,
+        raw_properties=raw_properties,
+    )
+    exporter.checkpoint_enabled = False
+    exporter.writer = PageWriter(output, index=False)  # 병합 후 삭제되는 파일이므로 인덱스 불필요
+    try:
+        if use_async:
+            asyncio.run(exporter.export_shard_async(pages))
+        else:
+            exporter.export_pages((None, page) for page in pages)
+        exporter.writer.close()
+    except BaseException:
+        exporter.writer.abort()
+        raise
+    finally:
+        cache_stats = None
+        if exporter.block_cache is not None:
+            cache_stats = dict(exporter.block_cache.stats)
+            exporter.block_cache.close()
+
+    dump_json({
+        "shard": index,
+        "stats": exporter.stats,
+        "block_types": dict(exporter.block_types),
+        "rate_limit": exporter.limiter.stats,
+        "telemetry": exporter.telemetry.report(),
+        "block_cache": cache_stats,
+    }, shard_stats_path(output))
+
+
 class NotionExporter:
-    def __init__(self):
-        self.notion = Client(auth=get_notion_token())
-        self.pages = []
+    def __init__(
+        self,
+        use_async: bool = False,
+        concurrency: int = NOTION_CONCURRENCY,
+        incremental: bool = False,
+        use_cache: bool = True,
+        resume: bool = False,
+        shards: int = 1,
+        rate_bucket: SharedBucket = None,
+        raw_properties: bool = EXPORT_RAW_PROPERTIES,
+    ):
+        self.token = get_notion_token()
+        self.notion = Client(**client_options(self.token))
+        self.use_async = use_async
+        self.incremental = incremental
+        self.resume = resume
+        self.resume_cursor = None
+        self.since = None
+        self.concurrency = max(1, concurrency)
+        self.use_cache = use_cache
+        self.raw_properties = raw_properties
+        self.shards = max(1, shards)
+        # 샤드 모드에서는 coordinator와 모든 worker가 하나의 rate limit 버킷을 공유
+        self.mp_context = multiprocessing.get_context("spawn")
+        if rate_bucket is None and self.shards > 1:
+            rate_bucket = SharedBucket(context=self.mp_context)
+        self.rate_bucket = rate_bucket
+        self.checkpoint_enabled = self.shards == 1
+        self.async_notion = None
+        self.semaphore = None
+        self.telemetry = Telemetry()
+        self.limiter = RateLimiter(telemetry=self.telemetry, bucket=rate_bucket)
+        self.block_cache = BlockCache(DATA_DIR / "block_cache.sqlite") if use_cache else None
+        self.writer = None
+        # 새로 가져온 페이지 레코드를 기록과 함께 넘겨받을 콜백 (pipeline.py, 증분 모드에서 이어 붙인 페이지는 제외)
+        self.sinks = []
+        self.database_ids = set()
+        self.written_ids = set()
+        # 증분 모드에서 이전 실행의 페이지 저장소 (변경되지 않은 페이지도 export된 것으로 판단)
+        self.previous_pages = None
         self.databases = []
+        self.block_types = Counter()
+        # 동기화 블록 원본 ID → (하위 블록 목록, 사용한 API 호출 수)
+        self.synced_memo = {}
+        self._synced_tasks = {}
         self.stats = {
             "pages_fetched": 0,
             "databases_fetched": 0,
             "blocks_fetched": 0,
             "errors": [],
+            "total_pages": 0,
+            "total_words": 0,
+            "synced_blocks": {"resolved": 0, "memo_hits": 0, "api_calls_saved": 0},
+            "db_items_with_content": 0,
+            "db_items_deduplicated": 0,
         }
+        self.watermark = None
+        self.start_time = time.time()
 
     def get_all_blocks(self, block_id: str, depth: int = 0) -> list:
         """페이지/블록의 모든 자식 블록을 재귀적으로 가져오기"""
-        if depth > 10:  # 무한 재귀 방지
-            return []
+        return self._fetch_subtree(block_id, depth)[0]
+
+    def _fetch_subtree(self, block_id: str, depth: int) -> tuple:
+        """(평탄화된 하위 블록 목록, 사용한 blocks.children.list 호출 수)"""
+        if depth > MAX_BLOCK_DEPTH:  # 무한 재귀 방지
+            return [], 0
 
         blocks = []
+        calls = 0
         try:
             cursor = None
             while True:
-                response = self.notion.blocks.children.list(
-                    block_id=block_id, start_cursor=cursor, page_size=100
+                response = self.limiter.call(
+                    self.notion.blocks.children.list, "blocks.children.list",
+                    block_id=block_id, start_cursor=cursor, page_size=100,
                 )
+                calls += 1
 
                 for block in response.get("results", []):
                     blocks.append(block)
                     self.stats["blocks_fetched"] += 1
 
-                    # 자식이 있으면 재귀적으로 가져오기
-                    if block.get("has_children"):
-                        child_blocks = self.get_all_blocks(block["id"], depth + 1)
+                    # 자식이 있으면 재귀적으로 가져오기 (하위 페이지/DB 제외)
+                    if should_descend(block):
+                        child_blocks, child_calls = self._fetch_children(block, depth + 1)
                         blocks.extend(child_blocks)
+                        calls += child_calls
 
                 if not response.get("has_more"):
                     break
                 cursor = response.get("next_cursor")
 
-                time.sleep(0.1)  # Rate limit 방지
-
         except Exception as e:
             self.stats["errors"].append(
                 {"type": "blocks", "block_id": block_id, "error": str(e)}
             )
 
+        return blocks, calls
+
+    def _record_synced_hit(self, calls: int):
+        self.stats["synced_blocks"]["memo_hits"] += 1
+        self.stats["synced_blocks"]["api_calls_saved"] += calls
+
+    def _fetch_children(self, block: dict, depth: int) -> tuple:
+        """블록의 하위 트리 (동기화 블록은 원본 기준으로 한 번만 가져옴)"""
+        source_id = synced_source_id(block)
+        if source_id is None:
+            return self._fetch_subtree(block["id"], depth)
+
+        if source_id in self.synced_memo:
+            blocks, calls = self.synced_memo[source_id]
+            self._record_synced_hit(calls)
+            return blocks, 0
+
+        result = self._fetch_subtree(source_id, depth)
+        self.synced_memo[source_id] = result
+        self.stats["synced_blocks"]["resolved"] += 1
+        return result
+
+    def cache_page_blocks(self, page: dict, blocks: list, errors_before: int):
+        """가져온 블록 목록을 캐시에 저장
+
+        일부 하위 트리가 실패한 결과와, 다른 페이지의 동기화 원본을 포함한 결과는 저장하지 않는다.
+        (원본을 수정해도 참조하는 페이지의 last_edited_time은 바뀌지 않아 캐시 키로 알 수 없음)
+        """
+        if self.block_cache is None or len(self.stats["errors"]) != errors_before:
+            return
+        if has_synced_reference(blocks):
+            return
+        self.block_cache.put(page["id"], page["last_edited_time"], blocks)
+
+    def get_page_blocks(self, page: dict) -> list:
+        """페이지 블록 목록 (블록 캐시 우선, 없으면 API로 가져와 캐시에 저장)"""
+        if self.block_cache is not None:
+            blocks = self.block_cache.get(page["id"], page["last_edited_time"])
+            if blocks is not None:
+                return blocks
+
+        errors_before = len(self.stats["errors"])
+        with self.telemetry.track_page(page["id"], extract_title(page)):
+            blocks = self.get_all_blocks(page["id"])
+        self.cache_page_blocks(page, blocks, errors_before)
         return blocks
 
-    def export_all_pages(self):
-        """모든 접근 가능한 페이지 export"""
-        print("Fetching all pages...")
+    async def get_page_blocks_async(self, page: dict) -> list:
+        """get_page_blocks의 비동기 버전"""
+        if self.block_cache is not None:
+            blocks = self.block_cache.get(page["id"], page["last_edited_time"])
+            if blocks is not None:
+                return blocks
+
+        # 동시에 진행 중인 다른 페이지의 에러도 포함되므로 보수적으로 판단
+        errors_before = len(self.stats["errors"])
+        with self.telemetry.track_page(page["id"], extract_title(page)):
+            blocks = await self.get_all_blocks_async(page["id"])
+        self.cache_page_blocks(page, blocks, errors_before)
+        return blocks
 
-        cursor = None
-        while True:
-            response = self.notion.search(
-                filter={"property": "object", "value": "page"},
-                start_cursor=cursor,
-                page_size=100,
+    def checkpoint(self, cursor):
+        """현재까지의 진행 상황 저장
+
+        cursor는 아직 기록되지 않은 페이지가 포함된 search 페이지의 커서로,
+        재개 시 그 search 페이지부터 다시 조회하고 완료된 페이지는 건너뛴다.
+        """
+        save_checkpoint({
+            "since": self.since,
+            "search_cursor": cursor,
+            "completed_ids": sorted(self.written_ids),
+            "partial_bytes": self.writer.flush(),
+            "database_ids": sorted(self.database_ids),
+            "watermark": self.watermark,
+            "stats": self.stats,
+        })
+
+    def restore_checkpoint(self, checkpoint: dict):
+        """체크포인트에서 진행 상황 복원"""
+        self.since = checkpoint["since"]
+        self.resume_cursor = checkpoint["search_cursor"]
+        self.written_ids = set(checkpoint["completed_ids"])
+        self.database_ids = set(checkpoint["database_ids"])
+        self.watermark = checkpoint["watermark"]
+        self.stats.update(checkpoint["stats"])
+        # 비동기 모드에서는 체크포인트 시점에 시작만 된 페이지도 집계돼 있으므로 보정
+        self.stats["pages_fetched"] = len(self.written_ids)
+        self.writer = PageWriter(DATA_DIR / PAGES_FILENAME, resume_offset=checkpoint["partial_bytes"])
+        self.writer.count = len(self.written_ids)
+
+    def search_pages(self, cursor, since=None) -> dict:
+        """페이지 search (재개한 커서가 만료됐으면 처음부터 다시 조회)"""
+        try:
+            return self.limiter.call(self.notion.search, "search", **search_params(cursor, since))
+        except Exception:
+            if cursor is None or cursor != self.resume_cursor:
+                raise
+            print("Saved search cursor is no longer valid. Restarting search (completed pages are skipped).")
+            self.resume_cursor = None
+            return self.limiter.call(self.notion.search, "search", **search_params(None, since))
+
+    async def search_pages_async(self, cursor, since=None) -> dict:
+        """search_pages의 비동기 버전"""
+        try:
+            return await self.limiter.call_async(self.async_notion.search, "search", **search_params(cursor, since))
+        except Exception:
+            if cursor is None or cursor != self.resume_cursor:
+                raise
+            print("Saved search cursor is no longer valid. Restarting search (completed pages are skipped).")
+            self.resume_cursor = None
+            return await self.limiter.call_async(self.async_notion.search, "search", **search_params(None, since))
+
+    def emit_page(self, page_data: dict, notify_sinks: bool = True):
+        """완성된 페이지 레코드를 즉시 페이지 저장소에 기록 (notify_sinks=False면 sink에는 넘기지 않음)"""
+        self.writer.write(page_data)
+        if notify_sinks:
+            for sink in self.sinks:
+                sink(page_data)
+        self.written_ids.add(page_data["id"])
+        self.stats["total_pages"] += 1
+        self.stats["total_words"] += page_data.get("word_count", 0)
+        if not self.watermark or page_data["last_edited_time"] > self.watermark:
+            self.watermark = page_data["last_edited_time"]
+
+        parent = page_data.get("parent", {})
+        if parent.get("type") == "database_id":
+            self.database_ids.add(parent.get("database_id"))
+
+    async def get_all_blocks_async(self, block_id: str, depth: int = 0) -> list:
+        """get_all_blocks의 비동기 버전 - 형제 하위 트리를 동시에 가져옴
+
+        반환 순서는 get_all_blocks와 동일한 전위 순회(pre-order)를 유지한다.
+        """
+        return (await self._fetch_subtree_async(block_id, depth))[0]
+
+    async def _fetch_children_async(self, block: dict, depth: int) -> tuple:
+        """_fetch_children의 비동기 버전 (같은 원본을 동시에 요청해도 한 번만 가져옴)"""
+        source_id = synced_source_id(block)
+        if source_id is None:
+            return await self._fetch_subtree_async(block["id"], depth)
+
+        if source_id in self.synced_memo:
+            blocks, calls = self.synced_memo[source_id]
+            self._record_synced_hit(calls)
+            return blocks, 0
+
+        task = self._synced_tasks.get(source_id)
+        if task is not None:
+            blocks, calls = await task
+            self._record_synced_hit(calls)
+            return blocks, 0
+
+        task = asyncio.ensure_future(self._fetch_subtree_async(source_id, depth))
+        self._synced_tasks[source_id] = task
+        try:
+            result = await task
+        finally:
+            del self._synced_tasks[source_id]
+        self.synced_memo[source_id] = result
+        self.stats["synced_blocks"]["resolved"] += 1
+        return result
+
+    async def _fetch_subtree_async(self, block_id: str, depth: int) -> tuple:
+        """_fetch_subtree의 비동기 버전"""
+        if depth > MAX_BLOCK_DEPTH:
+            return [], 0
+
+        children = []
+        calls = 0
+        try:
+            cursor = None
+            while True:
+                async with self.semaphore:
+                    response = await self.limiter.call_async(
+                        self.async_notion.blocks.children.list, "blocks.children.list",
+                        block_id=block_id, start_cursor=cursor, page_size=100,
+                    )
+                calls += 1
+
+                for block in response.get("results", []):
+                    children.append(block)
+                    self.stats["blocks_fetched"] += 1
+
+                if not response.get("has_more"):
+                    break
+                cursor = response.get("next_cursor")
+
+        except Exception as e:
+            self.stats["errors"].append(
+                {"type": "blocks", "block_id": block_id, "error": str(e)}
             )
 
+        # 자식이 있는 블록들의 하위 트리를 동시에 요청
+        subtrees = iter(await asyncio.gather(*[
+            self._fetch_children_async(block, depth + 1)
+            for block in children
+            if should_descend(block)
+        ]))
+
+        blocks = []
+        for block in children:
+            blocks.append(block)
+            if should_descend(block):
+                child_blocks, child_calls = next(subtrees)
+                blocks.extend(child_blocks)
+                calls += child_calls
+
+        return blocks, calls
+
+    def iter_search_results(self, since: str = None):
+        """search 결과 페이지를 (search 커서, 페이지)로 yield
+
+        since가 주어지면 최근 수정순으로 search 하다가
+        last_edited_time이 since보다 오래된 페이지를 만나면 중단한다.
+        """
+        cursor = self.resume_cursor
+        while True:
+            response = self.search_pages(cursor, since)
             for page in response.get("results", []):
-                self.stats["pages_fetched"] += 1
-                print(f"  [{self.stats['pages_fetched']}] {extract_title(page)[:50]}")
+                if since and page["last_edited_time"] < since:
+                    return
+                yield cursor, page
 
-                page_data = {
-                    "id": page["id"],
-                    "title": extract_title(page),
-                    "created_time": page["created_time"],
-                    "last_edited_time": page["last_edited_time"],
-                    "parent": page.get("parent", {}),
-                    "properties": page.get("properties", {}),
-                    "url": page.get("url", ""),
-                    "tags": extract_tags(page),
-                }
-
-                # 페이지 내용 가져오기
-                blocks = self.get_all_blocks(page["id"])
-                page_data["content"] = blocks_to_text(blocks)
-                page_data["links"] = extract_links(blocks)
-                page_data["word_count"] = len(page_data["content"].split())
-                page_data["block_count"] = len(blocks)
-
-                self.pages.append(page_data)
-                time.sleep(0.1)  # Rate limit 방지
+            if not response.get("has_more"):
+                return
+            cursor = response.get("next_cursor")
+
+    def export_pages(self, results):
+        """(search 커서, 페이지) 목록의 블록을 가져와 순서대로 기록"""
+        for cursor, page in results:
+            if page["id"] in self.written_ids:  # 체크포인트 이전에 완료됨
+                continue
+
+            self.stats["pages_fetched"] += 1
+            print(f"  [{self.stats['pages_fetched']}] {extract_title(page)[:50]}")
+
+            # 페이지 내용 가져오기
+            blocks = self.get_page_blocks(page)
+            self.emit_page(build_page_data(page, blocks, self.block_types, self.raw_properties))
+            if self.checkpoint_enabled and self.writer.count % CHECKPOINT_INTERVAL == 0:
+                self.checkpoint(cursor)
+
+    def export_all_pages(self, since: str = None):
+        """모든 접근 가능한 페이지 export (since는 iter_search_results 참고)"""
+        print("Fetching all pages..." if not since else f"Fetching pages edited since {since}...")
+        self.export_pages(self.iter_search_results(since))
+        print(f"Total pages fetched: {self.stats['pages_fetched']}")
+
+    async def _export_page_async(self, page: dict) -> dict:
+        """단일 페이지의 블록 트리를 비동기로 가져와 레코드 생성"""
+        blocks = await self.get_page_blocks_async(page)
+        return build_page_data(page, blocks, self.block_types, self.raw_properties)
+
+    async def iter_search_results_async(self, since: str = None):
+        """iter_search_results의 비동기 버전"""
+        cursor = self.resume_cursor
+        while True:
+            async with self.semaphore:
+                response = await self.search_pages_async(cursor, since)
+            for page in response.get("results", []):
+                if since and page["last_edited_time"] < since:
+                    return
+                yield cursor, page
 
             if not response.get("has_more"):
-                break
+                return
             cursor = response.get("next_cursor")
 
+    async def export_pages_async(self, results):
+        """export_pages의 비동기 버전 (여러 페이지를 동시에 가져오되 입력 순서대로 기록)"""
+        # 완료된 페이지를 입력 순서대로 기록하기 위한 대기열
+        # (앞 페이지가 늦게 끝나도 메모리가 커지지 않도록 길이를 제한)
+        pending = []
+        max_pending = self.concurrency * 4
+
+        async def emit_next():
+            page_cursor, task = pending.pop(0)
+            self.emit_page(await task)
+            if self.checkpoint_enabled and self.writer.count % CHECKPOINT_INTERVAL == 0:
+                self.checkpoint(page_cursor)
+
+        try:
+            # 다음 search 페이지를 기다리는 동안 앞 페이지들의 블록 수집이 먼저 진행됨
+            async for cursor, page in results:
+                if page["id"] in self.written_ids:  # 체크포인트 이전에 완료됨
+                    continue
+
+                self.stats["pages_fetched"] += 1
+                print(f"  [{self.stats['pages_fetched']}] {extract_title(page)[:50]}")
+                task = asyncio.create_task(self._export_page_async(page))
+                pending.append((cursor, task))
+
+                while pending and (pending[0][1].done() or len(pending) > max_pending):
+                    await emit_next()
+
+            while pending:
+                await emit_next()
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def export_all_pages_async(self, since: str = None):
+        """모든 페이지를 동시에 export (search 순서 유지, since는 export_all_pages와 동일)"""
+        print(f"Fetching {'all pages' if not since else f'pages edited since {since}'} "
+              f"(async, concurrency={self.concurrency})...")
+        await self.export_pages_async(self.iter_search_results_async(since))
         print(f"Total pages fetched: {self.stats['pages_fetched']}")
-        return self.pages
+
+    def is_exported(self, page_id: str) -> bool:
+        """search로 export된 페이지인지 (증분 모드에서는 이전 실행에서 export된 페이지 포함)"""
+        if page_id in self.written_ids:
+            return True
+        return self.previous_pages is not None and page_id in self.previous_pages
+
+    def build_item_data(self, item: dict, blocks: list = None) -> dict:
+        """데이터베이스 아이템 레코드 생성
+
+        search로 이미 export된 페이지는 내용을 다시 담지 않고 in_pages로 표시한다.
+        """
+        item_data = {
+            "id": item["id"],
+            "properties": normalize_properties(item.get("properties", {})),
+            "created_time": item["created_time"],
+            "last_edited_time": item["last_edited_time"],
+            "url": item.get("url", ""),
+        }
+        if self.raw_properties:
+            item_data["raw_properties"] = item.get("properties", {})
+        if blocks is None:
+            item_data["in_pages"] = True
+            self.stats["db_items_deduplicated"] += 1
+        else:
+            item_data.update(extract_block_content(blocks, self.block_types))
+            self.stats["db_items_with_content"] += 1
+        return item_data
+
+    def build_database_data(self, db: dict) -> dict:
+        """databases.retrieve 결과로 데이터베이스 레코드 생성"""
+        self.stats["databases_fetched"] += 1
+        db_title = extract_db_title(db)
+        print(f"  [{self.stats['databases_fetched']}] {db_title[:50]}")
+
+        db_data = {
+            "id": db["id"],
+            "title": db_title,
+            "created_time": db.get("created_time", ""),
+            "last_edited_time": db.get("last_edited_time", ""),
+            "parent": db.get("parent", {}),
+            "properties_schema": normalize_schema(db.get("properties", {})),
+            "url": db.get("url", ""),
+            "items": [],
+        }
+        if self.raw_properties:
+            db_data["raw_properties_schema"] = db.get("properties", {})
+        return db_data
 
     def export_all_databases(self):
         """모든 데이터베이스와 아이템 export"""
         print("\nFetching all databases...")
 
-        # 페이지에서 데이터베이스 정보 추출
-        db_ids = set()
-        for page in self.pages:
-            parent = page.get("parent", {})
-            if parent.get("type") == "database_id":
-                db_ids.add(parent.get("database_id"))
-
-        for db_id in db_ids:
+        # 기록된 페이지들의 부모 데이터베이스
+        for db_id in sorted(self.database_ids):
             try:
-                db = self.notion.databases.retrieve(database_id=db_id)
-                self.stats["databases_fetched"] += 1
-                db_title = extract_db_title(db)
-                print(f"  [{self.stats['databases_fetched']}] {db_title[:50]}")
-
-                db_data = {
-                    "id": db["id"],
-                    "title": db_title,
-                    "created_time": db.get("created_time", ""),
-                    "last_edited_time": db.get("last_edited_time", ""),
-                    "parent": db.get("parent", {}),
-                    "properties_schema": db.get("properties", {}),
-                    "url": db.get("url", ""),
-                    "items": [],
-                }
+                db = self.limiter.call(self.notion.databases.retrieve, "databases.retrieve", database_id=db_id)
+                db_data = self.build_database_data(db)
 
                 # 데이터베이스 아이템 조회
                 try:
                     items_cursor = None
                     while True:
-                        items_response = self.notion.databases.query(
+                        items_response = self.limiter.call(
+                            self.notion.databases.query, "databases.query",
                             database_id=db["id"],
                             start_cursor=items_cursor,
                             page_size=100,
                         )
                         for item in items_response.get("results", []):
-                            db_data["items"].append({
-                                "id": item["id"],
-                                "properties": item.get("properties", {}),
-                                "created_time": item["created_time"],
-                                "last_edited_time": item["last_edited_time"],
-                                "url": item.get("url", ""),
-                            })
+                            blocks = None
+                            if not self.is_exported(item["id"]):
+                                blocks = self.get_page_blocks(item)
+                            db_data["items"].append(self.build_item_data(item, blocks))
                         if not items_response.get("has_more"):
                             break
                         items_cursor = items_response.get("next_cursor")
-                        time.sleep(0.1)
                 except Exception as e:
                     self.stats["errors"].append({
                         "type": "database_items", "db_id": db["id"], "error": str(e)
@@ -297,7 +919,6 @@ class NotionExporter:
 
                 db_data["item_count"] = len(db_data["items"])
                 self.databases.append(db_data)
-                time.sleep(0.1)
             except Exception as e:
                 self.stats["errors"].append({
                     "type": "database_retrieve", "db_id": db_id, "error": str(e)
@@ -306,45 +927,216 @@ class NotionExporter:
         print(f"Total databases fetched: {self.stats['databases_fetched']}")
         return self.databases
 
+    async def _export_item_async(self, item: dict) -> dict:
+        """데이터베이스 아이템 레코드 (search로 export되지 않은 아이템만 블록 조회)"""
+        blocks = None
+        if not self.is_exported(item["id"]):
+            blocks = await self.get_page_blocks_async(item)
+        return self.build_item_data(item, blocks)
+
+    async def _export_database_async(self, db_id: str):
+        """단일 데이터베이스 조회 + 아이템 내용을 동시에 수집 (실패 시 None)"""
+        try:
+            async with self.semaphore:
+                db = await self.limiter.call_async(
+                    self.async_notion.databases.retrieve, "databases.retrieve", database_id=db_id
+                )
+        except Exception as e:
+            self.stats["errors"].append({
+                "type": "database_retrieve", "db_id": db_id, "error": str(e)
+            })
+            return None
+
+        db_data = self.build_database_data(db)
+
+        item_tasks = []
+        try:
+            items_cursor = None
+            while True:
+                async with self.semaphore:
+                    items_response = await self.limiter.call_async(
+                        self.async_notion.databases.query, "databases.query",
+                        database_id=db["id"],
+                        start_cursor=items_cursor,
+                        page_size=100,
+                    )
+                # 다음 query 페이지를 기다리는 동안 아이템 내용 수집을 먼저 시작
+                for item in items_response.get("results", []):
+                    item_tasks.append(asyncio.create_task(self._export_item_async(item)))
+                if not items_response.get("has_more"):
+                    break
+                items_cursor = items_response.get("next_cursor")
+        except Exception as e:
+            self.stats["errors"].append({
+                "type": "database_items", "db_id": db["id"], "error": str(e)
+            })
+
+        db_data["items"] = list(await asyncio.gather(*item_tasks))
+        db_data["item_count"] = len(db_data["items"])
+        return db_data
+
+    async def export_all_databases_async(self):
+        """모든 데이터베이스를 동시에 export (결과 순서는 export_all_databases와 동일)"""
+        print(f"\nFetching all databases (async, concurrency={self.concurrency})...")
+
+        results = await asyncio.gather(*[
+            self._export_database_async(db_id) for db_id in sorted(self.database_ids)
+        ])
+        self.databases.extend(db_data for db_data in results if db_data is not None)
+
+        print(f"Total databases fetched: {self.stats['databases_fetched']}")
+        return self.databases
+
+    async def export_shard_async(self, pages: list):
+        """샤드 worker의 비동기 페이지 수집"""
+        async def results():
+            for page in pages:
+                yield None, page
+
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.async_notion = AsyncClient(**client_options(self.token))
+        try:
+            await self.export_pages_async(results())
+        finally:
+            await self.async_notion.aclose()
+            self.async_notion = None
+
+    def merge_shard_stats(self, shard_stats: dict):
+        """worker 통계를 coordinator 통계에 합침"""
+        stats = shard_stats["stats"]
+        self.stats["pages_fetched"] += stats["pages_fetched"]
+        self.stats["blocks_fetched"] += stats["blocks_fetched"]
+        self.stats["errors"].extend(stats["errors"])
+        for key, value in stats["synced_blocks"].items():
+            self.stats["synced_blocks"][key] += value
+        self.block_types.update(shard_stats["block_types"])
+        for key, value in shard_stats["rate_limit"].items():
+            self.limiter.stats[key] += value
+        self.telemetry.merge(shard_stats["telemetry"])
+        if self.block_cache is not None and shard_stats["block_cache"]:
+            for key, value in shard_stats["block_cache"].items():
+                self.block_cache.stats[key] += value
+
+    def export_sharded(self, since: str = None):
+        """페이지 목록을 최상위 페이지 단위로 나눠 샤드별 worker 프로세스에서 수집
+
+        search 목록은 coordinator가 한 번만 조회하고, 결과는 search 순서대로 병합한다.
+        """
+        print("Fetching page list..." if not since else f"Fetching pages edited since {since}...")
+        pages = [page for _, page in self.iter_search_results(since) if page["id"] not in self.written_ids]
+        shards = [shard for shard in partition_pages(pages, self.shards) if shard]
+        print(f"Exporting {len(pages)} pages in {len(shards)} shards "
+              f"({', '.join(str(len(shard)) for shard in shards)} pages)...")
+
+        shard_dir = DATA_DIR / "shards"
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        outputs = [shard_dir / f"shard_{index}.jsonl" for index in range(len(shards))]
+        workers = [
+            self.mp_context.Process(
+                target=export_shard,
+                args=(index, shard, outputs[index], self.rate_bucket,
+                      self.use_async, self.concurrency, self.use_cache, self.raw_properties),
+            )
+            for index, shard in enumerate(shards)
+        ]
+
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            failed = [index for index, worker in enumerate(workers) if worker.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"Shard workers failed: {failed}")
+
+            for output in outputs:
+                self.merge_shard_stats(load_json(shard_stats_path(output)))
+
+            # 각 샤드 파일은 search 순서를 유지하므로 k-way 병합으로 전체 순서 복원
+            order = {page["id"]: position for position, page in enumerate(pages)}
+            merged = heapq.merge(*[iter_pages(output) for output in outputs], key=lambda page: order[page["id"]])
+            for page_data in merged:
+                self.emit_page(page_data)
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+            shutil.rmtree(shard_dir, ignore_errors=True)
+
+        print(f"Total pages fetched: {self.stats['pages_fetched']}")
+
+    async def export_async(self, since: str = None, include_pages: bool = True):
+        """비동기 모드 전체 크롤링 (페이지 → 데이터베이스, 하나의 AsyncClient 공유)"""
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.async_notion = AsyncClient(**client_options(self.token))
+        try:
+            if include_pages:
+                await self.export_all_pages_async(since)
+            await self.export_all_databases_async()
+        finally:
+            await self.async_notion.aclose()
+            self.async_notion = None
+
+    def close_previous_pages(self):
+        if self.previous_pages is not None:
+            self.previous_pages.close()
+            self.previous_pages = None
+
+    def merge_with_previous(self):
+        """변경되지 않은 기존 페이지/데이터베이스를 이어서 기록
+
+        페이지는 변경분 뒤에 기존 파일을 한 줄씩 이어 붙이므로 전체를 메모리에 올리지 않는다.
+        이어 붙인 페이지는 바뀌지 않았으므로 sink(pipeline.py의 임베딩/그래프 스레드)에는 넘기지 않는다.
+        """
+        previous_pages = resolve_pages_path(DATA_DIR)
+        if previous_pages.exists():
+            for page in iter_pages(previous_pages):
+                if page["id"] not in self.written_ids:
+                    self.emit_page(page, notify_sinks=False)
+
+        latest_dbs = resolve_artifact(DATA_DIR, "databases.json")
+        if latest_dbs.exists():
+            self.databases = merge_by_id(load_json(latest_dbs), self.databases)
+
     def save_to_json(self):
         """추출된 데이터를 JSON 파일로 저장"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        # 페이지 데이터 저장
-        pages_file = DATA_DIR / f"pages_{timestamp}.json"
-        with open(pages_file, "w", encoding="utf-8") as f:
-            json.dump(self.pages, f, ensure_ascii=False, indent=2)
-        print(f"\nPages saved to: {pages_file}")
-
-        # 최신 파일
-        latest_pages = DATA_DIR / "pages.json"
-        if latest_pages.exists():
-            latest_pages.unlink()
-        with open(latest_pages, "w", encoding="utf-8") as f:
-            json.dump(self.pages, f, ensure_ascii=False, indent=2)
+        # 페이지는 export 중에 pages.jsonl로 스트리밍 기록됨 → 완료 처리
+        self.writer.close()
+        latest_pages = DATA_DIR / PAGES_FILENAME
+        print(f"\nPages saved to: {latest_pages}")
 
         # 데이터베이스 데이터 저장
-        dbs_file = DATA_DIR / f"databases_{timestamp}.json"
-        with open(dbs_file, "w", encoding="utf-8") as f:
-            json.dump(self.databases, f, ensure_ascii=False, indent=2)
-        print(f"Databases saved to: {dbs_file}")
-
-        latest_dbs = DATA_DIR / "databases.json"
+        latest_dbs = DATA_DIR / artifact_name("databases.json")
         if latest_dbs.exists():
             latest_dbs.unlink()
-        with open(latest_dbs, "w", encoding="utf-8") as f:
-            json.dump(self.databases, f, ensure_ascii=False, indent=2)
+        dump_json(self.databases, latest_dbs)
+        print(f"Databases saved to: {latest_dbs}")
+
+        # 전체 복사본 대신 직전 실행 대비 변경분만 스냅샷으로 기록
+        snapshot = SnapshotStore(DATA_DIR / SNAPSHOT_DIR_NAME).record(timestamp, latest_pages, self.databases)
+        print(f"Snapshot {timestamp}: +{snapshot['added']} ~{snapshot['changed']} -{snapshot['removed']}"
+              f"{' (new base)' if snapshot.get('base') else ''}")
+        if snapshot["pruned"]:
+            print(f"Pruned {len(snapshot['pruned'])} old snapshots")
 
         # 통계 저장
         self.stats["timestamp"] = timestamp
-        self.stats["total_pages"] = len(self.pages)
+        self.stats["snapshot"] = {key: snapshot[key] for key in ("added", "changed", "removed", "pruned")}
         self.stats["total_databases"] = len(self.databases)
         self.stats["total_db_items"] = sum(db["item_count"] for db in self.databases)
-        self.stats["total_words"] = sum(p.get("word_count", 0) for p in self.pages)
+        self.stats["rate_limit"] = dict(self.limiter.stats)
+        self.stats["block_types"] = dict(self.block_types.most_common())
+        self.stats["telemetry"] = self.telemetry.report()
+        self.stats["elapsed_seconds"] = round(time.time() - self.start_time, 3)
+        if self.block_cache is not None:
+            self.block_cache.evict()
+            self.stats["block_cache"] = self.block_cache.report()
 
         stats_file = DATA_DIR / f"export_stats_{timestamp}.json"
-        with open(stats_file, "w", encoding="utf-8") as f:
-            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        dump_json(self.stats, stats_file, indent=True)
         print(f"Stats saved to: {stats_file}")
 
         return self.stats
@@ -355,25 +1147,108 @@ class NotionExporter:
         print("Notion Data Exporter")
         print("=" * 60)
 
-        start_time = time.time()
+        self.start_time = start_time = time.time()
+
+        checkpoint = load_checkpoint() if self.resume else None
+        partial_file = DATA_DIR / f"{PAGES_FILENAME}.tmp"
+        if checkpoint and not partial_file.exists():
+            print(f"Partial output {partial_file} is missing. Ignoring checkpoint.")
+            checkpoint = None
+        if self.resume and not checkpoint:
+            print("No checkpoint found. Starting a new export.")
+
+        if checkpoint:
+            # 중단된 export 이어서 실행
+            self.restore_checkpoint(checkpoint)
+            since = self.since
+            print(f"Resuming from checkpoint ({len(self.written_ids)} pages already exported)")
+        else:
+            # 증분 모드: 이전 워터마크 이후 수정된 페이지만 다시 가져옴
+            since = None
+            if self.incremental:
+                since = load_export_state().get("last_edited_time")
+                if not since or not resolve_pages_path(DATA_DIR).exists():
+                    print("No previous export found. Running full export.")
+                    since = None
+            self.since = since
+            self.stats["mode"] = "incremental" if since else "full"
+            self.stats["shards"] = self.shards
+            self.stats["since"] = since
+            self.writer = PageWriter(DATA_DIR / PAGES_FILENAME)
+            CHECKPOINT_FILE.unlink(missing_ok=True)
+
+        if since:
+            # 데이터베이스 아이템 중 이전 실행에서 export된 페이지는 블록을 다시 가져오지 않도록
+            # (merge_with_previous는 데이터베이스 조회가 끝난 뒤에 실행됨)
+            self.previous_pages = PageStore(resolve_pages_path(DATA_DIR))
 
-        self.export_all_pages()
-        self.export_all_databases()
-        stats = self.save_to_json()
+        try:
+            # 데이터베이스는 변경된 페이지가 속한 것만 다시 조회됨
+            if self.shards > 1:
+                self.export_sharded(since)
+            if self.use_async:
+                asyncio.run(self.export_async(since, include_pages=self.shards == 1))
+            else:
+                if self.shards == 1:
+                    self.export_all_pages(since)
+                self.export_all_databases()
+            self.stats["pages_changed"] = self.stats["total_pages"]
+            self.close_previous_pages()
+            if since:
+                self.merge_with_previous()
+            stats = self.save_to_json()
+        except BaseException:
+            # 체크포인트가 있으면 부분 결과를 남겨서 --resume으로 이어갈 수 있게 함
+            if CHECKPOINT_FILE.exists():
+                self.writer.suspend()
+                print(f"\nExport interrupted. Run with --resume to continue from {CHECKPOINT_FILE}")
+            else:
+                self.writer.abort()
+            raise
+        finally:
+            self.close_previous_pages()
+            if self.block_cache is not None:
+                self.block_cache.close()
+
+        # 다음 증분 실행을 위한 워터마크 갱신
+        # (Notion last_edited_time은 분 단위이므로 같은 시각의 페이지는 다음에도 다시 가져옴)
+        watermark = self.watermark or since
+        if watermark:
+            save_export_state({"last_edited_time": watermark, "timestamp": stats["timestamp"]})
+        CHECKPOINT_FILE.unlink(missing_ok=True)
 
         elapsed = time.time() - start_time
 
         print("\n" + "=" * 60)
         print("Export Complete!")
         print("=" * 60)
+        print(f"Mode: {stats['mode']} (changed pages: {stats['pages_changed']})")
         print(f"Pages: {stats['total_pages']}")
         print(f"Databases: {stats['total_databases']}")
-        print(f"Database Items: {stats['total_db_items']}")
+        print(f"Database Items: {stats['total_db_items']} "
+              f"(content fetched: {stats['db_items_with_content']}, "
+              f"already in pages: {stats['db_items_deduplicated']})")
         print(f"Total Words: {stats['total_words']:,}")
         print(f"Total Blocks: {stats['blocks_fetched']}")
         print(f"Errors: {len(stats['errors'])}")
+        print(f"Retries: {stats['rate_limit']['retries']} (429: {stats['rate_limit']['rate_limited']})")
+        print(f"Synced Blocks: {stats['synced_blocks']['resolved']} resolved, "
+              f"{stats['synced_blocks']['api_calls_saved']} API calls saved")
+        if "block_cache" in stats:
+            print(f"Block Cache Hit Rate: {stats['block_cache']['hit_rate']:.1%}")
         print(f"Time: {elapsed:.1f}s")
 
+        telemetry = stats["telemetry"]
+        print(f"\nAPI time by endpoint (rate limit sleep: {telemetry['sleep_seconds']:.1f}s):")
+        for name, endpoint in telemetry["endpoints"].items():
+            print(f"  - {name}: {endpoint['calls']} calls, {endpoint['total_seconds']:.1f}s "
+                  f"(mean {endpoint['mean_ms']:.0f}ms, max {endpoint['max_ms']:.0f}ms, "
+                  f"retries {endpoint['retries']})")
+        if telemetry["slowest_pages"]:
+            print("Slowest pages:")
+            for page in telemetry["slowest_pages"][:3]:
+                print(f"  - {page['title'][:40]}: {page['wall_seconds']:.1f}s, {page['api_calls']} calls")
+
         if stats["errors"]:
             print("\nErrors encountered:")
             for err in stats["errors"][:5]:
@@ -382,6 +1257,48 @@ class NotionExporter:
         return stats
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Notion 데이터 추출기")
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="AsyncClient로 여러 페이지/하위 트리를 동시에 크롤링",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=NOTION_CONCURRENCY,
+        help=f"비동기 모드 동시 요청 수 (기본값: {NOTION_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="이전 실행 이후 수정된 페이지만 가져와 기존 pages.json에 병합",
+    )
+    parser.add_argument(
+        "--no-cache", dest="use_cache", action="store_false",
+        help="블록 캐시(data/block_cache.sqlite)를 사용하지 않음",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="중단된 export를 마지막 체크포인트부터 이어서 실행",
+    )
+    parser.add_argument(
+        "--shards", type=int, default=1,
+        help="최상위 페이지 단위로 나눠 여러 worker 프로세스에서 수집 (rate limit은 공유, 기본값: 1)",
+    )
+    parser.add_argument(
+        "--raw-properties", action="store_true", default=EXPORT_RAW_PROPERTIES,
+        help="축약된 속성과 함께 원본 Notion 속성 JSON도 기록 (raw_properties)",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    exporter = NotionExporter()
+    args = parse_args()
+    exporter = NotionExporter(
+        use_async=args.use_async,
+        concurrency=args.concurrency,
+        incremental=args.incremental,
+        use_cache=args.use_cache,
+        resume=args.resume,
+        shards=args.shards,
+        raw_properties=args.raw_properties,
+    )
     exporter.run()
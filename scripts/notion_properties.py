@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Notion 페이지 속성 정규화
+- API의 깊게 중첩된 속성 JSON을 {이름: {"type", "value"}} 형태로 축약
+- select/status, multi_select, date, number, checkbox, relation, people, url 등 지원
+- 제목(title)은 페이지 레코드의 title과 중복되므로, 생성/수정 시각·작성자는 메타데이터와 중복되므로 제외
+- 빈 값(None, "", [])은 기록하지 않음 (checkbox의 False는 유지)
+- property_values / graph_properties: 하위 단계(Qdrant 페이로드, Neo4j 노드 속성)용 평탄화
+"""
+
+# 속성 타입별 정규화 함수 (property_type → 속성 값 dict를 받아 축약 값 반환)
+PROPERTY_NORMALIZERS = {}
+
+# 데이터베이스 스키마에서 선택지 이름을 남길 타입
+OPTION_TYPES = ("select", "multi_select", "status")
+
+
+def register_property_normalizer(*property_types):
+    """속성 타입 정규화 함수 등록 데코레이터"""
+    def decorator(fn):
+        for property_type in property_types:
+            PROPERTY_NORMALIZERS[property_type] = fn
+        return fn
+    return decorator
+
+
+def plain_text(rich_text: list) -> str:
+    return "".join([t.get("plain_text", "") for t in rich_text or []])
+
+
+@register_property_normalizer("select", "status")
+def normalize_option(value):
+    return value.get("name") if value else None
+
+
+@register_property_normalizer("multi_select")
+def normalize_options(value):
+    return [option.get("name") for option in value or [] if option.get("name")]
+
+
+@register_property_normalizer("date")
+def normalize_date(value):
+    if not value or not value.get("start"):
+        return None
+    return {"start": value["start"], "end": value.get("end")}
+
+
+@register_property_normalizer("number", "checkbox", "url", "email", "phone_number")
+def normalize_scalar(value):
+    return value
+
+
+@register_property_normalizer("rich_text")
+def normalize_rich_text(value):
+    return plain_text(value)
+
+
+@register_property_normalizer("relation")
+def normalize_relation(value):
+    return [item.get("id") for item in value or [] if item.get("id")]
+
+
+@register_property_normalizer("people")
+def normalize_people(value):
+    # 이름은 integration 권한에 따라 없을 수 있으므로 ID로 대체
+    people = [person.get("name") or person.get("id") for person in value or []]
+    return [person for person in people if person]
+
+
+@register_property_normalizer("files")
+def normalize_files(value):
+    return [item.get("name") for item in value or [] if item.get("name")]
+
+
+@register_property_normalizer("unique_id")
+def normalize_unique_id(value):
+    if not value or value.get("number") is None:
+        return None
+    prefix = value.get("prefix")
+    return f"{prefix}-{value['number']}" if prefix else str(value["number"])
+
+
+@register_property_normalizer("formula")
+def normalize_formula(value):
+    # 결과 타입(string/number/boolean/date)에 맞는 값만 남김
+    if not value:
+        return None
+    result = value.get(value.get("type"))
+    if value.get("type") == "date":
+        return normalize_date(result)
+    return result
+
+
+@register_property_normalizer("rollup")
+def normalize_rollup(value):
+    if not value:
+        return None
+    rollup_type = value.get("type")
+    if rollup_type == "number":
+        return value.get("number")
+    if rollup_type == "date":
+        return normalize_date(value.get("date"))
+    if rollup_type == "array":
+        # 배열 항목은 각자의 속성 타입을 가짐 → 스칼라로 정규화된 것만 남김
+        values = []
+        for item in value.get("array", []):
+            normalized = normalize_value(item)
+            if isinstance(normalized, list):
+                values.extend(normalized)
+            elif normalized is not None and not isinstance(normalized, dict):
+                values.append(normalized)
+        return values
+    return None
+
+
+def normalize_value(prop: dict):
+    """속성 하나의 축약 값 (지원하지 않는 타입은 None)"""
+    normalizer = PROPERTY_NORMALIZERS.get(prop.get("type"))
+    if normalizer is None:
+        return None
+    return normalizer(prop.get(prop["type"]))
+
+
+def normalize_properties(properties: dict) -> dict:
+    """API 속성 → {이름: {"type": 타입, "value": 값}}"""
+    normalized = {}
+    for name, prop in (properties or {}).items():
+        value = normalize_value(prop)
+        if value is None or value == "" or value == []:
+            continue
+        normalized[name] = {"type": prop["type"], "value": value}
+    return normalized
+
+
+def normalize_schema(schema: dict) -> dict:
+    """데이터베이스 속성 스키마 → {이름: {"type": 타입, ...}} (선택지 이름, relation 대상 DB만 유지)"""
+    normalized = {}
+    for name, prop in (schema or {}).items():
+        prop_type = prop.get("type")
+        entry = {"type": prop_type}
+        if prop_type in OPTION_TYPES:
+            entry["options"] = [option.get("name") for option in prop.get(prop_type, {}).get("options", [])]
+        elif prop_type == "relation":
+            entry["database_id"] = prop.get("relation", {}).get("database_id")
+        normalized[name] = entry
+    return normalized
+
+
+def is_normalized(properties: dict) -> bool:
+    """이미 축약된 형식인지 (이전 export의 원본 속성과 구분)"""
+    return all("value" in prop for prop in (properties or {}).values())
+
+
+def property_values(page: dict) -> dict:
+    """{이름: 값} (Qdrant 페이로드용, 원본 속성만 있는 이전 레코드도 정규화)"""
+    properties = page.get("properties") or {}
+    if not is_normalized(properties):
+        properties = normalize_properties(properties)
+    return {name: prop["value"] for name, prop in properties.items()}
+
+
+def graph_list(values: list) -> list:
+    """Neo4j 배열 속성으로 저장할 목록 (같은 타입만 허용되므로 정수+실수는 실수로, 그 밖에 섞인 타입은 문자열로)"""
+    items = [item for item in values if item is not None and not isinstance(item, (dict, list))]
+    kinds = {type(item) for item in items}
+    if len(kinds) <= 1:
+        return items
+    if kinds == {int, float}:
+        return [float(item) for item in items]
+    return [str(item).lower() if isinstance(item, bool) else str(item) for item in items]
+
+
+def graph_properties(page: dict) -> dict:
+    """Neo4j 노드 속성으로 저장할 값 (prop_<이름>, 날짜 범위는 _end 추가)
+
+    Neo4j 속성은 스칼라나 같은 타입의 스칼라 배열만 허용하므로 날짜 dict는 시작/끝으로 나누고
+    rollup/formula처럼 타입이 섞인 배열은 graph_list로 맞춘다.
+    """
+    flattened = {}
+    for name, value in property_values(page).items():
+        key = "prop_" + "_".join(name.split())
+        if isinstance(value, dict):
+            flattened[key] = value["start"]
+            if value.get("end"):
+                flattened[key + "_end"] = value["end"]
+        elif isinstance(value, list):
+            flattened[key] = graph_list(value)
+        else:
+            flattened[key] = value
+    return flattened
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+스트리밍 페이지 저장소 (JSON Lines)
+- PageWriter: 페이지를 가져오는 즉시 한 줄씩 기록
+- iter_pages / PageReader: 한 줄씩 읽는 제너레이터 (메모리 사용량 일정)
+- 기존 pages.json(JSON 배열)도 읽기 지원
+- EXPORT_COMPRESSION=zstd면 pages.jsonl.zst로 압축 저장
+- page_hashes: 하위 단계 증분 처리용 필드별 내용 해시
+- merge_pages: 변경분만 반영해 저장소 다시 기록
+- append_pages: 바뀐 페이지를 파일 끝에 이어 쓰고 인덱스만 갱신 (sync_daemon.py, 이전 버전은 compact_pages로 정리)
+- PageStore: .idx 오프셋 인덱스(mmap)로 id 조회 / 수정 시각 범위 조회
+  (PageWriter가 close 시점에 인덱스를 함께 기록, 압축 파일은 PAGE_FRAME_KB 단위 프레임으로 나눠 기록)
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+
+from serialization import (
+    BinaryWriter,
+    artifact_name,
+    dumps,
+    is_compressed,
+    load_json,
+    loads,
+    open_read,
+    read_frame,
+    resolve_artifact,
+)
+
+# 경로 설정 (모든 스크립트가 이 값을 사용, NOTION_EXPORT_DIR로 변경 가능)
+DATA_DIR = Path(os.environ.get("NOTION_EXPORT_DIR", Path(__file__).parent.parent / "data"))
+PAGES_BASENAME = "pages.jsonl"
+PAGES_FILENAME = artifact_name(PAGES_BASENAME)
+LEGACY_PAGES_FILENAME = "pages.json"
+
+# 오프셋 인덱스 설정
+INDEX_SUFFIX = ".idx"
+JOURNAL_SUFFIX = ".idx.journal"
+# 압축 파일은 이 크기(해제 기준)마다 프레임을 끊어 한 페이지를 읽을 때 프레임 하나만 해제
+PAGE_FRAME_BYTES = int(os.environ.get("PAGE_FRAME_KB", 256)) * 1024
+# append_pages로 이어 쓴 크기가 마지막으로 전체 기록한 크기의 이 비율을 넘으면 다시 기록해 이전 버전 정리
+PAGE_COMPACT_RATIO = float(os.environ.get("PAGE_COMPACT_RATIO", 0.25))
+
+# 인덱스 파일 구조: 헤더 | 레코드(파일 순서) | 수정 시각 순 레코드 번호 | id 해시 테이블
+# - 헤더: magic, version, 페이지 수, 해시 테이블 크기, 데이터 파일 크기/수정 시각(ns),
+#   마지막으로 전체 기록했을 때 파일 크기 (그 뒤는 append_pages로 이어 쓴 레코드, 앞쪽에 같은 ID의 이전 버전이 남아 있음)
+# - 레코드: id 해시(16B), 프레임 시작 오프셋, 프레임 내 위치, 길이, last_edited_time(epoch)
+# - 해시 테이블: 레코드 번호 + 1 (0은 빈 칸), 선형 탐사
+INDEX_MAGIC = b"NPIX"
+INDEX_VERSION = 2
+INDEX_HEADER = struct.Struct("<4sIIIQQQ")
+INDEX_RECORD = struct.Struct("<16sQIId")
+INDEX_SLOT = struct.Struct("<I")
+
+
+def stable_hash(value) -> str:
+    """값의 안정적인 해시 (키 순서와 무관, sha256 앞 16자리)"""
+    data = dumps(value, sort_keys=True)
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def normalize_text(text: str) -> str:
+    """공백 차이는 무시하도록 연속 공백/줄바꿈을 한 칸으로 정규화"""
+    return " ".join((text or "").split())
+
+
+def page_hashes(page: dict) -> dict:
+    """하위 단계가 변경 여부를 판단할 필드별 해시
+
+    - title / content: 임베딩과 노드 속성에 영향
+    - links: LINKS_TO 관계에 영향
+    - tags: 태그 이름 집합 (색상 변경은 무시)
+    """
+    return {
+        "title": stable_hash(normalize_text(page.get("title", ""))),
+        "content": stable_hash(normalize_text(page.get("content", ""))),
+        "links": stable_hash(sorted(set(page.get("links", [])))),
+        "tags": stable_hash(sorted({tag.get("name") or "" for tag in page.get("tags", [])})),
+    }
+
+
+def get_page_hashes(page: dict) -> dict:
+    """export 시 기록된 해시 (해시가 없는 이전 형식이면 직접 계산)"""
+    return page.get("hashes") or page_hashes(page)
+
+
+def edited_timestamp(value: str) -> float:
+    """Notion 시각 문자열 → epoch 초 (없으면 0)"""
+    if not value:
+        return 0.0
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def index_path(path: Path) -> Path:
+    return Path(path).with_name(Path(path).name + INDEX_SUFFIX)
+
+
+def journal_path(path: Path) -> Path:
+    return Path(path).with_name(Path(path).name + JOURNAL_SUFFIX)
+
+
+def id_key(page_id: str) -> bytes:
+    """인덱스 키 (페이지 ID의 128비트 해시)"""
+    return hashlib.blake2b(page_id.encode("utf-8"), digest_size=16).digest()
+
+
+def index_entry(page: dict, offset: int, position: int, length: int) -> tuple:
+    return (page["id"], offset, position, length, edited_timestamp(page.get("last_edited_time")))
+
+
+def write_index(path: Path, entries: list, base_size: int = None):
+    """데이터 파일(path)의 오프셋 인덱스 기록 (같은 ID가 여러 번 있으면 마지막 레코드 사용)"""
+    write_index_records(path, [(id_key(entry[0]),) + tuple(entry[1:]) for entry in entries], base_size)
+
+
+def write_index_records(path: Path, records: list, base_size: int = None):
+    """(id 해시, 프레임 오프셋, 프레임 내 위치, 길이, 수정 시각) 레코드로 인덱스 기록
+
+    base_size는 마지막으로 전체 기록했을 때 파일 크기 (기본값은 현재 크기 = 이어 쓴 레코드 없음).
+    """
+    path = Path(path)
+    stat = path.stat()
+    if base_size is None:
+        base_size = stat.st_size
+    # 같은 ID는 마지막 레코드만 남김 (수정 시각 배열에 이전 버전이 남지 않도록)
+    latest = {record[0]: number for number, record in enumerate(records)}
+    records = [records[number] for number in sorted(latest.values())]
+    count = len(records)
+    capacity = 8
+    while capacity < count * 2:
+        capacity *= 2
+    mask = capacity - 1
+
+    records_start = INDEX_HEADER.size
+    order_start = records_start + INDEX_RECORD.size * count
+    table_start = order_start + INDEX_SLOT.size * count
+    buffer = bytearray(table_start + INDEX_SLOT.size * capacity)
+    INDEX_HEADER.pack_into(
+        buffer, 0, INDEX_MAGIC, INDEX_VERSION, count, capacity, stat.st_size, stat.st_mtime_ns, base_size
+    )
+
+    for number, (key, offset, position, length, edited) in enumerate(records):
+        INDEX_RECORD.pack_into(buffer, records_start + INDEX_RECORD.size * number, key, offset, position, length, edited)
+        slot = int.from_bytes(key[:8], "little") & mask
+        while True:
+            occupied = INDEX_SLOT.unpack_from(buffer, table_start + INDEX_SLOT.size * slot)[0]
+            if not occupied or INDEX_RECORD.unpack_from(buffer, records_start + INDEX_RECORD.size * (occupied - 1))[0] == key:
+                break
+            slot = (slot + 1) & mask
+        INDEX_SLOT.pack_into(buffer, table_start + INDEX_SLOT.size * slot, number + 1)
+
+    order = sorted(range(count), key=lambda number: records[number][4])
+    for position, number in enumerate(order):
+        INDEX_SLOT.pack_into(buffer, order_start + INDEX_SLOT.size * position, number)
+
+    target = index_path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(buffer)
+    os.replace(tmp, target)
+
+
+def scan_entries(path: Path) -> list:
+    """비압축 JSON Lines 파일을 한 번 읽어 인덱스 항목 생성"""
+    entries = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                entries.append(index_entry(loads(line), offset, 0, len(line.rstrip(b"\r\n"))))
+            offset += len(line)
+    return entries
+
+
+def rebuild_index(path: Path):
+    """인덱스가 없거나 오래된 페이지 파일의 인덱스 다시 생성
+
+    압축 파일은 프레임 경계를 알 수 없으므로 프레임 단위로 나눠 다시 기록한다.
+    같은 ID가 여러 번 있으면(이어 쓰다 인덱스를 갱신하기 전에 중단) 마지막 레코드만 남겨 다시 기록한다.
+    """
+    path = Path(path)
+    print(f"Building page index for {path.name}...")
+    if is_compressed(path):
+        compact_pages(path)
+        return
+    entries = scan_entries(path)
+    if len({entry[0] for entry in entries}) < len(entries):
+        compact_pages(path)
+    else:
+        write_index(path, entries)
+
+
+def resolve_pages_path(data_dir: Path = DATA_DIR) -> Path:
+    """읽을 페이지 파일 경로 (pages.jsonl[.zst] 우선, 없으면 기존 pages.json)"""
+    path = resolve_artifact(data_dir, PAGES_BASENAME)
+    if path.exists():
+        return path
+    return Path(data_dir) / LEGACY_PAGES_FILENAME
+
+
+def iter_records(path: Path):
+    """JSON Lines 파일의 레코드를 기록된 그대로 yield (append_pages로 이어 쓴 이전 버전 포함)"""
+    with open_read(path) as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def iter_pages(path: Path):
+    """페이지를 하나씩 yield (같은 ID는 최신 버전만)"""
+    path = Path(path)
+
+    # 기존 JSON 배열 형식은 한 번에 읽을 수밖에 없음
+    if path.suffix == ".json":
+        yield from load_json(path)
+        return
+
+    appended = []
+    index = current_index(path)
+    if index is not None:
+        appended = index.appended()
+        keys = {index.record(number)[0] for number in appended}
+        index.close()
+    if not appended:
+        yield from iter_records(path)
+        return
+
+    # 이어 쓴 페이지는 앞쪽의 이전 버전을 건너뛰고 마지막에 인덱스로 최신 버전만 읽음
+    for page in iter_records(path):
+        if id_key(page["id"]) not in keys:
+            yield page
+    with PageStore(path) as store:
+        yield from store._read_records(appended)
+
+
+def count_pages(path: Path) -> int:
+    """페이지 수 (인덱스가 있으면 인덱스의 페이지 수, 없으면 파싱 없이 줄 수만 셈)"""
+    path = Path(path)
+    if path.suffix == ".json":
+        return len(load_json(path))
+    index = current_index(path)
+    if index is not None:
+        index.close()
+        return index.count
+    with open_read(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+def merge_pages(source: Path, target: Path, updates: list, removed=()) -> int:
+    """바뀐 페이지를 먼저 기록하고 source의 나머지 페이지를 이어 붙여 target으로 교체
+
+    removed에 있는 페이지는 제외한다. 기록한 페이지 수 반환.
+    """
+    skip = {page["id"] for page in updates} | set(removed)
+    with PageWriter(target) as writer:
+        for page in updates:
+            writer.write(page)
+        if source is not None and Path(source).exists():
+            for page in iter_pages(source):
+                if page["id"] not in skip:
+                    writer.write(page)
+    return writer.count
+
+
+def compact_pages(path: Path) -> int:
+    """같은 ID의 이전 버전을 버리고 페이지 파일을 다시 기록 (마지막 레코드 사용, 인덱스 없이 동작)"""
+    path = Path(path)
+    latest = {}
+    for number, page in enumerate(iter_records(path)):
+        latest[page["id"]] = number
+    keep = set(latest.values())
+    with PageWriter(path) as writer:
+        for number, page in enumerate(iter_records(path)):
+            if number in keep:
+                writer.write(page)
+    return writer.count
+
+
+def has_appended(path: Path) -> bool:
+    """append_pages로 이어 쓴(이전 버전이 남아 있는) 레코드가 있는지"""
+    index = current_index(path)
+    if index is None:
+        return False
+    try:
+        return bool(index.appended())
+    finally:
+        index.close()
+
+
+def append_pages(path: Path, updates: list) -> int:
+    """바뀐 페이지를 파일 끝에 이어 쓰고 인덱스 레코드만 갱신 (파일 전체를 다시 기록하지 않음)
+
+    이전 버전은 파일에 남지만 인덱스와 iter_pages는 최신 버전만 본다.
+    이어 쓴 크기가 PAGE_COMPACT_RATIO를 넘으면 compact_pages로 다시 기록한다. 기록한 페이지 수 반환.
+    """
+    path = Path(path)
+    index = open_index(path)
+    try:
+        records = [index.record(number) for number in range(index.count)]
+        base_size = index.base_size
+    finally:
+        index.close()
+
+    compressed = is_compressed(path)
+    offset = path.stat().st_size
+    position = 0
+    writer = BinaryWriter(path, append=True, compressed=compressed)
+    try:
+        for page in updates:
+            data = dumps(page) + b"\n"
+            records.append((id_key(page["id"]),) + index_entry(page, offset, position, len(data) - 1)[1:])
+            writer.write(data)
+            if not compressed:
+                offset += len(data)
+                continue
+            position += len(data)
+            if position >= PAGE_FRAME_BYTES:
+                writer.end_frame()
+                offset = writer.tell()
+                position = 0
+        writer.flush()
+    finally:
+        writer.close()
+
+    # 인덱스를 갱신하기 전에 중단되면 다음에 열 때 rebuild_index가 이전 버전을 정리함
+    write_index_records(path, records, base_size)
+    if path.stat().st_size - base_size > base_size * PAGE_COMPACT_RATIO:
+        compact_pages(path)
+    return len(updates)
+
+
+class PageReader:
+    """여러 번 순회할 수 있는 페이지 파일 리더 (순회할 때마다 파일을 다시 읽음)"""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else resolve_pages_path()
+        self._count = None
+
+    def __iter__(self):
+        return iter_pages(self.path)
+
+    def __len__(self):
+        if self._count is None:
+            self._count = count_pages(self.path)
+        return self._count
+
+
+class OffsetIndex:
+    """mmap으로 연 오프셋 인덱스 (ID 조회는 해시 테이블, 수정 시각 범위는 정렬 배열 이진 탐색)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.count, self.capacity,
+         self.data_size, self.data_mtime_ns, self.base_size) = INDEX_HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported page index: {self.path}")
+        self._records = INDEX_HEADER.size
+        self._order = self._records + INDEX_RECORD.size * self.count
+        self._table = self._order + INDEX_SLOT.size * self.count
+
+    def matches(self, data_path: Path) -> bool:
+        """데이터 파일이 인덱스를 만든 이후 바뀌지 않았는지"""
+        stat = Path(data_path).stat()
+        return (stat.st_size, stat.st_mtime_ns) == (self.data_size, self.data_mtime_ns)
+
+    def appended(self) -> list:
+        """append_pages로 이어 쓴 레코드 번호 (파일 순서)"""
+        if self.base_size >= self.data_size:
+            return []
+        return [number for number in range(self.count) if self.record(number)[1] >= self.base_size]
+
+    def record(self, number: int) -> tuple:
+        """(id 해시, 프레임 오프셋, 프레임 내 위치, 길이, 수정 시각)"""
+        return INDEX_RECORD.unpack_from(self._mmap, self._records + INDEX_RECORD.size * number)
+
+    def find(self, page_id: str):
+        """페이지 ID의 레코드 번호 (없으면 None)"""
+        key = id_key(page_id)
+        mask = self.capacity - 1
+        slot = int.from_bytes(key[:8], "little") & mask
+        while True:
+            occupied = INDEX_SLOT.unpack_from(self._mmap, self._table + INDEX_SLOT.size * slot)[0]
+            if not occupied:
+                return None
+            if self.record(occupied - 1)[0] == key:
+                return occupied - 1
+            slot = (slot + 1) & mask
+
+    def edited_since(self, timestamp: float) -> list:
+        """수정 시각이 timestamp 이상인 레코드 번호 (수정 시각 순)"""
+        def edited_at(position):
+            number = INDEX_SLOT.unpack_from(self._mmap, self._order + INDEX_SLOT.size * position)[0]
+            return self.record(number)[4]
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if edited_at(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return [
+            INDEX_SLOT.unpack_from(self._mmap, self._order + INDEX_SLOT.size * position)[0]
+            for position in range(low, self.count)
+        ]
+
+    def close(self):
+        self._mmap.close()
+
+
+def current_index(path: Path):
+    """데이터 파일과 일치하는 오프셋 인덱스 (없거나 오래됐으면 다시 만들지 않고 None)"""
+    try:
+        index = OffsetIndex(index_path(path))
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
+    if index.matches(path):
+        return index
+    index.close()
+    return None
+
+
+def open_index(path: Path) -> OffsetIndex:
+    """페이지 파일의 오프셋 인덱스 열기 (없거나 오래됐으면 다시 생성)"""
+    index = current_index(path)
+    if index is not None:
+        return index
+    rebuild_index(path)
+    return OffsetIndex(index_path(path))
+
+
+class PageStore:
+    """ID로 페이지 하나를 바로 읽는 페이지 저장소 (전체 파일을 파싱하지 않음)
+
+    - get / get_many: 인덱스의 오프셋으로 해당 줄만 읽음 (압축 파일은 프레임 하나만 해제)
+    - iter_since: last_edited_time이 since 이후인 페이지만 읽음
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else resolve_pages_path()
+        self.compressed = is_compressed(self.path)
+        self.index = None
+        self._pages = None
+        self._file = None
+        self._frame = (None, b"")
+
+        if self.path.suffix == ".json":
+            # 기존 JSON 배열 형식은 인덱스를 만들 수 없으므로 메모리에 올려 조회
+            self._pages = {page["id"]: page for page in load_json(self.path)}
+        else:
+            self.index = open_index(self.path)
+
+    def _read(self, offset: int, position: int, length: int) -> dict:
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        if not self.compressed:
+            self._file.seek(offset)
+            return loads(self._file.read(length))
+        # 같은 프레임의 페이지를 연속으로 읽을 때는 해제한 프레임을 재사용
+        if self._frame[0] != offset:
+            self._frame = (offset, read_frame(self._file, offset))
+        return loads(self._frame[1][position:position + length])
+
+    def _read_records(self, numbers):
+        records = sorted(self.index.record(number)[1:4] for number in numbers)
+        for offset, position, length in records:
+            yield self._read(offset, position, length)
+
+    def get(self, page_id: str):
+        """페이지 레코드 (없으면 None)"""
+        if self._pages is not None:
+            return self._pages.get(page_id)
+        number = self.index.find(page_id)
+        if number is None:
+            return None
+        return self._read(*self.index.record(number)[1:4])
+
+    def get_many(self, page_ids):
+        """여러 페이지를 파일 순서로 읽어 yield (없는 ID는 건너뜀)"""
+        if self._pages is not None:
+            yield from (self._pages[page_id] for page_id in page_ids if page_id in self._pages)
+            return
+        numbers = {self.index.find(page_id) for page_id in page_ids}
+        numbers.discard(None)
+        yield from self._read_records(numbers)
+
+    def iter_since(self, since: str):
+        """last_edited_time이 since(ISO 시각) 이후인 페이지를 파일 순서로 yield"""
+        timestamp = edited_timestamp(since)
+        if self._pages is not None:
+            yield from (
+                page for page in self._pages.values()
+                if edited_timestamp(page.get("last_edited_time")) >= timestamp
+            )
+            return
+        yield from self._read_records(self.index.edited_since(timestamp))
+
+    def __contains__(self, page_id: str) -> bool:
+        if self._pages is not None:
+            return page_id in self._pages
+        return self.index.find(page_id) is not None
+
+    def __len__(self):
+        if self._pages is not None:
+            return len(self._pages)
+        return self.index.count
+
+    def __iter__(self):
+        return iter_pages(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self.index is not None:
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PageWriter:
+    """페이지를 한 줄씩 append 하는 writer
+
+    임시 파일에 기록하다가 close() 시점에 원자적으로 교체하므로
+    중간에 실패해도 기존 파일은 그대로 남는다.
+    index=True면 close() 시점에 오프셋 인덱스(.idx)도 기록한다.
+    """
+
+    def __init__(self, path: Path, resume_offset: int = None, index: bool = True):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.journal_path = journal_path(self.tmp_path)
+        self.compressed = is_compressed(self.path)
+        self.count = 0
+        # 인덱스 항목: (ID, 프레임 오프셋, 프레임 내 위치, 길이, 수정 시각)
+        # 비압축 파일은 프레임 없이 오프셋이 곧 줄의 시작 위치
+        self.entries = [] if index else None
+        self._journaled = 0
+        self._offset = 0
+        self._position = 0
+
+        if resume_offset is not None and self.tmp_path.exists():
+            # 체크포인트 이후에 기록된(불완전할 수 있는) 부분은 잘라내고 이어서 기록
+            # (압축 파일도 체크포인트 시점에 프레임이 끝나므로 그 위치에서 자를 수 있음)
+            with open(self.tmp_path, "r+b") as f:
+                f.truncate(resume_offset)
+            self._file = BinaryWriter(self.tmp_path, append=True, compressed=self.compressed)
+            self._offset = resume_offset
+            if self.entries is not None:
+                self._restore_journal(resume_offset)
+        else:
+            self._file = BinaryWriter(self.tmp_path, compressed=self.compressed)
+            self.journal_path.unlink(missing_ok=True)
+
+    def _restore_journal(self, resume_offset: int):
+        """체크포인트 때 저장한 인덱스 항목 중 잘라낸 위치 이전 것만 복원"""
+        if self.journal_path.exists():
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = tuple(loads(line))
+                    except ValueError:
+                        break  # 기록 중 중단된 마지막 줄
+                    end = entry[1] if self.compressed else entry[1] + entry[3]
+                    if end < resume_offset:
+                        self.entries.append(entry)
+        with open(self.journal_path, "wb") as f:
+            for entry in self.entries:
+                f.write(dumps(entry) + b"\n")
+        self._journaled = len(self.entries)
+
+    def write(self, page: dict):
+        data = dumps(page) + b"\n"
+        if self.entries is not None:
+            self.entries.append(index_entry(page, self._offset, self._position, len(data) - 1))
+        self._file.write(data)
+        self.count += 1
+
+        if not self.compressed:
+            self._offset += len(data)
+            return
+        self._position += len(data)
+        if self._position >= PAGE_FRAME_BYTES:
+            self._file.end_frame()
+            self._offset = self._file.tell()
+            self._position = 0
+
+    def flush(self) -> int:
+        """버퍼를 디스크에 기록하고 현재까지 기록된 바이트 수 반환"""
+        self._file.flush()
+        size = self.tmp_path.stat().st_size
+        if self.compressed:
+            self._offset = size
+            self._position = 0
+        if self.entries is not None and self._journaled < len(self.entries):
+            # 체크포인트에서 재개해도 인덱스를 이어 만들 수 있도록 지금까지의 항목 저장
+            with open(self.journal_path, "ab") as f:
+                for entry in self.entries[self._journaled:]:
+                    f.write(dumps(entry) + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._journaled = len(self.entries)
+        return size
+
+    def suspend(self):
+        """임시 파일을 남긴 채 닫기 (체크포인트에서 재개할 때 사용)"""
+        if not self._file.closed:
+            self._file.close()
+
+    def close(self):
+        """기록 완료 후 최종 파일로 교체"""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        if self.entries is not None:
+            write_index(self.path, self.entries)
+        self.journal_path.unlink(missing_ok=True)
+
+    def abort(self):
+        """기록 중단 (임시 파일 삭제)"""
+        if not self._file.closed:
+            self._file.close()
+        self.tmp_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
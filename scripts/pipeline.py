@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Notion export → 임베딩 / Neo4j 스트리밍 파이프라인
+- NotionExporter가 페이지 블록을 다 가져오는 즉시 크기가 제한된 큐로 임베딩 / Neo4j writer 스레드에 전달
+- export가 끝나기를 기다리지 않으므로 전체 소요 시간이 export + 임베딩 합계가 아니라 둘 중 긴 쪽에 가까워짐
+- 큐가 가득 차면 exporter가 기다림 (느린 단계에 맞춰 메모리 사용량을 제한)
+- Qdrant: 기존 포인트의 해시와 비교해 제목/본문이 바뀐 페이지만 다시 임베딩 (--recreate면 컬렉션 재생성)
+- 전체 모드: 그래프를 새로 만들고 Page 노드를 스트리밍으로 생성, 관계/Date 노드는 export 완료 후 생성
+- 증분 모드(--incremental): 바뀐 페이지만 export하고 그 페이지만 임베딩 스레드로 전달
+  (이전 실행에서 이어 붙인 페이지는 다시 해시를 계산하지 않음), 그래프는 export 완료 후 sync_pages로 갱신
+
+사용 예:
+    python scripts/pipeline.py
+    python scripts/pipeline.py --incremental --async
+    python scripts/pipeline.py --no-graph  # Qdrant만
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import vector_store
+from notion_exporter import NOTION_CONCURRENCY, NotionExporter
+from page_store import DATA_DIR, PageReader, PageStore, resolve_pages_path
+
+# 단계 사이 큐 크기 (페이지 수)
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", 64))
+
+# 임베딩 스레드가 길이별로 묶기 전에 모으는 페이지 수
+# (크게 잡으면 배치 효율은 오르지만 첫 인코딩이 그만큼 늦게 시작됨)
+PIPELINE_EMBED_WINDOW = int(os.environ.get("PIPELINE_EMBED_WINDOW", 16))
+
+
+class PageQueue:
+    """exporter → 소비 스레드 사이의 크기가 제한된 큐
+
+    exporter의 sink로 등록하면 페이지를 넣고, 소비 스레드는 순회하며 close될 때까지 꺼낸다.
+    소비 스레드가 실패하면 exporter 쪽 put에서 예외가 발생해 export도 중단된다.
+    """
+
+    _DONE = object()
+
+    def __init__(self, name: str, maxsize: int = PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.queue = queue.Queue(maxsize=max(1, maxsize))
+        self.error = None
+        self.count = 0
+        self.wait_seconds = 0.0  # 큐가 가득 차서 exporter가 기다린 시간
+
+    def _put(self, item) -> bool:
+        while self.error is None:
+            try:
+                self.queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __call__(self, page: dict):
+        start = time.monotonic()
+        if not self._put(page):
+            raise RuntimeError(f"{self.name} worker failed: {self.error}")
+        self.wait_seconds += time.monotonic() - start
+        self.count += 1
+
+    def close(self):
+        self._put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            page = self.queue.get()
+            if page is self._DONE:
+                return
+            yield page
+
+
+class PipelineWorker(threading.Thread):
+    """큐의 페이지를 처리 함수에 스트리밍으로 넘기는 소비 스레드"""
+
+    def __init__(self, pages: PageQueue, handler):
+        super().__init__(name=f"{pages.name}-worker", daemon=True)
+        self.pages = pages
+        self.handler = handler
+        self.result = None
+        self.finished_at = None
+
+    def run(self):
+        try:
+            self.result = self.handler(self.pages)
+        except BaseException as e:
+            self.pages.error = e
+        finally:
+            self.finished_at = time.time()
+
+
+class Pipeline:
+    def __init__(
+        self,
+        exporter: NotionExporter,
+        use_graph: bool = True,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        recreate: bool = False,
+    ):
+        self.exporter = exporter
+        self.incremental = exporter.incremental
+        self.queue_size = queue_size
+        self.reembedded = []
+
+        self.model = vector_store.init_model()
+        self.qdrant = vector_store.init_qdrant(recreate=recreate)
+        self.existing = None if recreate else vector_store.load_point_hashes(self.qdrant)
+
+        self.graph = None
+        self.driver = None
+        if use_graph:
+            import graph_builder
+
+            self.graph = graph_builder
+            self.driver = graph_builder.init_neo4j()
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.close()
+
+    def embed(self, pages) -> dict:
+        """임베딩 스레드: 다시 임베딩할 페이지 ID를 기록하며 process_pages로 전달"""
+        def track(pages):
+            for page in pages:
+                if self.existing is None or self.existing.get(page["id"], (None,))[0] != vector_store.embedding_hash(page):
+                    self.reembedded.append(page["id"])
+                yield page
+
+        return vector_store.process_pages(
+            track(pages), self.model, self.qdrant, self.existing, quiet=True, window=PIPELINE_EMBED_WINDOW
+        )
+
+    def create_nodes(self, pages) -> dict:
+        """Neo4j 스레드: Page 노드를 들어오는 대로 생성 (관계는 대상 노드가 모두 있어야 하므로 export 후)"""
+        return self.graph.create_page_nodes(self.driver, pages, quiet=True)
+
+    def start_workers(self) -> list:
+        workers = [PipelineWorker(PageQueue("embedding", self.queue_size), self.embed)]
+        if self.driver is not None:
+            if not self.incremental:
+                self.graph.clear_database(self.driver)
+            self.graph.create_constraints(self.driver)
+            if not self.incremental:
+                workers.append(PipelineWorker(PageQueue("graph", self.queue_size), self.create_nodes))
+        for worker in workers:
+            self.exporter.sinks.append(worker.pages)
+            worker.start()
+        return workers
+
+    def finish_graph(self, pages: PageReader) -> dict:
+        """export 완료 후 관계 / Date 노드 / SIMILAR_TO 생성"""
+        import similarity_edges
+
+        stats = {}
+        if self.incremental:
+            stats["sync"] = self.graph.sync_pages(self.driver, pages)
+            stats["similarity"] = similarity_edges.refresh_similarity_edges(self.qdrant, self.driver, self.reembedded)
+        else:
+            stats["relationships"] = self.graph.create_relationships(self.driver, pages)
+            stats["dates"] = self.graph.create_date_nodes(self.driver, pages)
+            similarity_edges.create_similarity_edges()
+        return stats
+
+    def run(self) -> dict:
+        start = time.time()
+        workers = self.start_workers()
+        try:
+            self.exporter.run()
+        finally:
+            for worker in workers:
+                worker.pages.close()
+        export_done = time.time()
+
+        print("\nWaiting for embedding/graph workers to drain...")
+        for worker in workers:
+            worker.join()
+        for worker in workers:
+            if worker.pages.error is not None:
+                raise RuntimeError(f"{worker.pages.name} worker failed") from worker.pages.error
+
+        stats = {
+            "export_seconds": export_done - start,
+            "embedding": workers[0].result,
+            "embedding_done_seconds": workers[0].finished_at - start,
+            "queue_wait_seconds": {worker.pages.name: worker.pages.wait_seconds for worker in workers},
+        }
+
+        # 페이지 저장소에서 사라진 페이지의 포인트 삭제
+        pages_path = resolve_pages_path(DATA_DIR)
+        if self.existing is not None:
+            with PageStore(pages_path) as store:
+                stale_ids = [page_id for page_id in self.existing if page_id not in store]
+            stats["deleted_points"] = vector_store.delete_points(self.qdrant, stale_ids)
+
+        if self.driver is not None:
+            stats["graph"] = self.finish_graph(PageReader(pages_path))
+        stats["total_seconds"] = time.time() - start
+        return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Notion export → 임베딩 / Neo4j 스트리밍 파이프라인")
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="AsyncClient로 여러 페이지/하위 트리를 동시에 크롤링",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=NOTION_CONCURRENCY,
+        help=f"비동기 모드 동시 요청 수 (기본값: {NOTION_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="이전 실행 이후 수정된 페이지만 가져와 바뀐 페이지만 다시 임베딩 / 그래프 갱신",
+    )
+    parser.add_argument(
+        "--recreate", action="store_true",
+        help="Qdrant 컬렉션을 지우고 모든 페이지를 다시 임베딩",
+    )
+    parser.add_argument(
+        "--no-cache", dest="use_cache", action="store_false",
+        help="블록 캐시(data/block_cache.sqlite)를 사용하지 않음",
+    )
+    parser.add_argument("--no-graph", action="store_true", help="Neo4j 없이 Qdrant만 갱신")
+    parser.add_argument(
+        "--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+        help=f"단계 사이 큐 크기 (페이지 수, 기본값: {PIPELINE_QUEUE_SIZE})",
+    )
+    args = parser.parse_args()
+    if args.recreate and args.incremental:
+        # 증분 모드는 바뀐 페이지만 임베딩하므로 새로 만든 컬렉션에 나머지 페이지가 빠짐
+        parser.error("--recreate는 모든 페이지를 다시 임베딩하므로 --incremental과 함께 쓸 수 없습니다")
+    return args
+
+
+def main():
+    args = parse_args()
+    start_time = datetime.now()
+    print(f"Starting pipeline at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+
+    exporter = NotionExporter(
+        use_async=args.use_async,
+        concurrency=args.concurrency,
+        incremental=args.incremental,
+        use_cache=args.use_cache,
+    )
+    pipeline = Pipeline(
+        exporter,
+        use_graph=not args.no_graph,
+        queue_size=args.queue_size,
+        recreate=args.recreate,
+    )
+    try:
+        stats = pipeline.run()
+    finally:
+        pipeline.close()
+
+    embedding = stats["embedding"]
+    print("\n" + "=" * 60)
+    print("Pipeline Complete!")
+    print("=" * 60)
+    print(f"Export finished: {stats['export_seconds']:.1f}s")
+    print(f"Embedding finished: {stats['embedding_done_seconds']:.1f}s "
+          f"(embedded {embedding['processed']} pages / {embedding['chunks']} chunks, unchanged {embedding['unchanged']}, "
+          f"payload updated {embedding['payload_updated']}, errors {embedding['errors']})")
+    if "embedding_cache" in embedding:
+        print(f"Embedding cache hit rate: {embedding['embedding_cache']['hit_rate']:.1%}")
+    if "deleted_points" in stats:
+        print(f"Deleted points: {stats['deleted_points']}")
+    for name, seconds in stats["queue_wait_seconds"].items():
+        print(f"Exporter waited on {name} queue: {seconds:.1f}s")
+    print(f"Total: {stats['total_seconds']:.1f}s")
+    print("\n✅ Pipeline complete!")
+
+
+if __name__ == "__main__":
+    main()
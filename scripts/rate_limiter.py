@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Notion API 공용 Rate Limiter
+- 토큰 버킷으로 지속 요청 속도 제한 (Notion: 통합당 평균 초당 3회)
+- 429/5xx/타임아웃 시 Retry-After를 존중하는 지수 백오프 + 지터 재시도
+- 동기(Client)/비동기(AsyncClient) 호출 모두 같은 버킷을 공유
+- SharedBucket을 넘기면 여러 프로세스(샤드 worker)가 하나의 버킷을 공유
+- 모든 요청의 지연 시간/재시도/대기 시간을 Telemetry에 기록
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from telemetry import Telemetry
+
+# Rate limit 설정
+NOTION_RATE_LIMIT = float(os.environ.get("NOTION_RATE_LIMIT", 3.0))  # 초당 평균 요청 수
+NOTION_RATE_BURST = int(os.environ.get("NOTION_RATE_BURST", 3))  # 순간 허용 요청 수
+NOTION_MAX_RETRIES = int(os.environ.get("NOTION_MAX_RETRIES", 6))
+
+# 백오프 설정 (초)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# 재시도 가능한 HTTP 상태 코드
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(error: Exception):
+    """에러 응답의 Retry-After 헤더를 초 단위로 변환 (없으면 None)"""
+    headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # HTTP-date 형식
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """재시도하면 성공할 수 있는 에러인지 판별"""
+    if isinstance(error, HTTPResponseError):
+        return error.status in RETRYABLE_STATUS
+    return isinstance(error, (RequestTimeoutError, httpx.TransportError))
+
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """지터가 적용된 지수 백오프 시간 (Retry-After보다 짧아지지 않음)"""
+    ceiling = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, BACKOFF_BASE))
+    return delay
+
+
+class LocalBucket:
+    """프로세스 안에서만 공유하는 버킷 상태"""
+
+    def __init__(self, burst: int):
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.paused_until = 0.0
+
+
+class SharedBucket:
+    """여러 프로세스가 공유하는 버킷 상태 (샤드 export에서 전체 요청 속도를 하나로 제한)
+
+    multiprocessing 공유 메모리에 저장되므로 worker 프로세스 인자로 넘겨서 사용한다.
+    time.monotonic()은 같은 머신의 프로세스끼리 기준이 같다.
+    """
+
+    def __init__(self, burst: int = NOTION_RATE_BURST, context=None):
+        context = context or multiprocessing.get_context()
+        self.lock = context.Lock()
+        self._values = context.RawArray("d", [float(max(1, burst)), time.monotonic(), 0.0])
+
+    @property
+    def tokens(self) -> float:
+        return self._values[0]
+
+    @tokens.setter
+    def tokens(self, value: float):
+        self._values[0] = value
+
+    @property
+    def last(self) -> float:
+        return self._values[1]
+
+    @last.setter
+    def last(self, value: float):
+        self._values[1] = value
+
+    @property
+    def paused_until(self) -> float:
+        return self._values[2]
+
+    @paused_until.setter
+    def paused_until(self, value: float):
+        self._values[2] = value
+
+
+class RateLimiter:
+    """모든 Notion 요청이 거쳐가는 토큰 버킷 + 재시도 래퍼
+
+    버킷은 예약(reservation) 방식이라 락은 대기 시간 계산에만 잡고,
+    실제 대기는 호출 측에서 time.sleep / asyncio.sleep으로 수행한다.
+    """
+
+    def __init__(
+        self,
+        rate: float = NOTION_RATE_LIMIT,
+        burst: int = NOTION_RATE_BURST,
+        max_retries: int = NOTION_MAX_RETRIES,
+        telemetry: Telemetry = None,
+        bucket: SharedBucket = None,
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.bucket = bucket or LocalBucket(self.burst)
+        self.telemetry = telemetry or Telemetry()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def reserve(self) -> float:
+        """토큰 1개를 예약하고 요청 전에 기다려야 할 시간을 반환"""
+        bucket = self.bucket
+        with bucket.lock:
+            now = time.monotonic()
+            tokens = min(self.burst, bucket.tokens + (now - bucket.last) * self.rate) - 1
+            bucket.tokens = tokens
+            bucket.last = now
+
+            wait = 0.0 if tokens >= 0 else -tokens / self.rate
+            wait = max(wait, bucket.paused_until - now)
+            self.stats["requests"] += 1
+            self.stats["wait_seconds"] += wait
+            return wait
+
+    def pause(self, seconds: float):
+        """429 수신 시 모든 호출자의 다음 요청을 seconds 동안 보류"""
+        with self.bucket.lock:
+            self.bucket.paused_until = max(self.bucket.paused_until, time.monotonic() + seconds)
+
+    def _on_error(self, error: Exception, attempt: int):
+        """재시도 여부 판단 후 대기 시간 반환 (재시도 불가면 예외 재발생)"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+
+        retry_after = retry_after_seconds(error)
+        delay = backoff_delay(attempt, retry_after)
+        self.stats["retries"] += 1
+
+        if getattr(error, "status", None) == 429:
+            # 버킷 전체를 멈춰서 동시 요청들도 함께 물러나게 함
+            self.stats["rate_limited"] += 1
+            self.pause(delay)
+            return 0.0
+        return delay
+
+    def _on_failed_call(self, endpoint: str, error: Exception, attempt: int, started: float) -> float:
+        """실패한 요청 계측 후 재시도 대기 시간 반환"""
+        self.telemetry.record_call(endpoint, time.perf_counter() - started, error)
+        delay = self._on_error(error, attempt)
+        self.telemetry.record_retry(endpoint, error)
+        self.telemetry.record_sleep(endpoint, delay)
+        self.stats["wait_seconds"] += delay
+        return delay
+
+    def _wait(self, endpoint: str) -> float:
+        wait = self.reserve()
+        self.telemetry.record_sleep(endpoint, wait)
+        return wait
+
+    def call(self, fn, endpoint: str = None, **kwargs):
+        """동기 Notion API 호출 (endpoint는 계측용 이름)"""
+        endpoint = endpoint or getattr(fn, "__name__", type(fn).__name__)
+        attempt = 0
+        while True:
+            time.sleep(self._wait(endpoint))
+            started = time.perf_counter()
+            try:
+                result = fn(**kwargs)
+            except Exception as e:
+                delay = self._on_failed_call(endpoint, e, attempt, started)
+            else:
+                self.telemetry.record_call(endpoint, time.perf_counter() - started)
+                return result
+            attempt += 1
+            time.sleep(delay)
+
+    async def call_async(self, fn, endpoint: str = None, **kwargs):
+        """비동기 Notion API 호출 (endpoint는 계측용 이름)"""
+        endpoint = endpoint or getattr(fn, "__name__", type(fn).__name__)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._wait(endpoint))
+            started = time.perf_counter()
+            try:
+                result = await fn(**kwargs)
+            except Exception as e:
+                delay = self._on_failed_call(endpoint, e, attempt, started)
+            else:
+                self.telemetry.record_call(endpoint, time.perf_counter() - started)
+                return result
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+export 산출물 직렬화
+- orjson이 있으면 orjson, 없으면 표준 json으로 인코딩/디코딩
+- 파일명이 .zst로 끝나면 zstd 압축 (EXPORT_COMPRESSION=zstd로 활성화)
+- 압축 스트림은 프레임 단위로 flush 되므로 중간 지점에서 잘라내고 이어 쓸 수 있음
+"""
+
+import io
+import json
+import os
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 사용
+    orjson = None
+
+# 압축 설정 (none | zstd)
+EXPORT_COMPRESSION = os.environ.get("EXPORT_COMPRESSION", "none").lower()
+ZSTD_LEVEL = int(os.environ.get("ZSTD_LEVEL", 3))
+ZSTD_SUFFIX = ".zst"
+
+
+def dumps(obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """객체를 UTF-8 JSON 바이트로 직렬화"""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+def loads(data):
+    """JSON 바이트/문자열 역직렬화"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def artifact_name(filename: str, compression: str = EXPORT_COMPRESSION) -> str:
+    """압축 설정에 맞는 산출물 파일명 (예: pages.jsonl → pages.jsonl.zst)"""
+    return filename + ZSTD_SUFFIX if compression == "zstd" else filename
+
+
+def resolve_artifact(data_dir: Path, filename: str) -> Path:
+    """압축/비압축 산출물 중 최근에 기록된 파일 경로 (둘 다 없으면 기본 설정 경로)"""
+    candidates = [Path(data_dir) / filename, Path(data_dir) / (filename + ZSTD_SUFFIX)]
+    existing = [path for path in candidates if path.exists()]
+    if not existing:
+        return Path(data_dir) / artifact_name(filename)
+    return max(existing, key=lambda path: path.stat().st_mtime)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "zstd 압축 파일을 다루려면 zstandard 패키지가 필요합니다.\n"
+            "pip install zstandard 로 설치하세요."
+        )
+    return zstandard
+
+
+def is_compressed(path: Path) -> bool:
+    return Path(path).suffix == ZSTD_SUFFIX
+
+
+def open_read(path: Path):
+    """바이너리 읽기 스트림 (압축 파일은 여러 프레임을 이어서 해제)"""
+    raw = open(path, "rb")
+    if not is_compressed(path):
+        return raw
+    reader = _zstd().ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    return io.BufferedReader(reader)
+
+
+def read_frame(f, offset: int, chunk_size: int = 65536) -> bytes:
+    """압축 파일의 offset 위치에서 시작하는 zstd 프레임 하나만 해제"""
+    f.seek(offset)
+    decompressor = _zstd().ZstdDecompressor().decompressobj()
+    chunks = []
+    while not decompressor.eof:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        chunks.append(decompressor.decompress(chunk))
+    return b"".join(chunks)
+
+
+class BinaryWriter:
+    """바이너리 쓰기 스트림 (압축 여부는 기본적으로 파일명으로 결정)"""
+
+    def __init__(self, path: Path, append: bool = False, compressed: bool = None):
+        self.path = Path(path)
+        if compressed is None:
+            compressed = is_compressed(self.path)
+        self._raw = open(self.path, "ab" if append else "wb")
+        self._zstd = None
+        self._stream = self._raw
+        if compressed:
+            self._zstd = _zstd()
+            self._stream = self._zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(
+                self._raw, closefd=False
+            )
+
+    @property
+    def closed(self) -> bool:
+        return self._raw.closed
+
+    def write(self, data: bytes):
+        self._stream.write(data)
+
+    def tell(self) -> int:
+        """원본 파일에 기록된 바이트 위치 (압축 시 아직 프레임에 남은 데이터는 제외)"""
+        return self._raw.tell()
+
+    def end_frame(self):
+        """현재 압축 프레임을 닫고 다음 쓰기부터 새 프레임 시작 (fsync 없음)"""
+        if self._zstd is not None:
+            self._stream.flush(self._zstd.FLUSH_FRAME)
+
+    def flush(self):
+        """지금까지 쓴 내용을 디스크에 기록 (압축 시 프레임 종료)"""
+        if self._zstd is not None:
+            self._stream.flush(self._zstd.FLUSH_FRAME)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def close(self):
+        if self._raw.closed:
+            return
+        if self._zstd is not None:
+            self._stream.close()  # 마지막 프레임 종료 (closefd=False라 원본 파일은 유지)
+        self._raw.close()
+
+
+def dump_json(obj, path: Path, indent: bool = False):
+    """JSON 파일 저장 (.zst면 압축)"""
+    writer = BinaryWriter(path)
+    try:
+        writer.write(dumps(obj, indent=indent))
+    finally:
+        writer.close()
+
+
+def load_json(path: Path):
+    """JSON 파일 로드 (.zst면 압축 해제)"""
+    with open_read(path) as f:
+        return loads(f.read())
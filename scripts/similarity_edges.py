@@ -2,11 +2,14 @@
 """
 벡터 유사도 기반 SIMILAR_TO 관계 생성
 Qdrant → Neo4j
+- refresh_similarity_edges: 일부 페이지 주변만 다시 계산 (sync_daemon.py)
+- 페이지 벡터는 청크 벡터의 평균, 유사 페이지는 notion_id로 묶어 가장 가까운 청크의 점수로 판단
 """
 
 import os
 from neo4j import GraphDatabase
 from qdrant_client import QdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue
 from tqdm import tqdm
 from dotenv import load_dotenv
 
@@ -31,6 +34,154 @@ SIMILARITY_THRESHOLD = float(os.environ.get("SIMILARITY_THRESHOLD", 0.75))  # 75
 TOP_K = 5  # 각 페이지당 상위 5개만
 
 
+def find_similar(qdrant: QdrantClient, notion_id: str, vector: list) -> tuple:
+    """임계값 이상인 유사 페이지 [(notion_id, score)]와 임계값 미만으로 제외된 수
+
+    다른 페이지의 청크를 notion_id로 묶어 페이지마다 가장 가까운 청크의 점수를 사용한다.
+    """
+    results = qdrant.query_points_groups(
+        collection_name=COLLECTION_NAME,
+        query=vector,
+        group_by="notion_id",
+        group_size=1,
+        limit=TOP_K,
+        # 자기 자신의 청크 제외
+        query_filter=Filter(must_not=[FieldCondition(key="notion_id", match=MatchValue(value=notion_id))]),
+        with_payload=["notion_id"]
+    )
+
+    similar = []
+    skipped = 0
+    for group in results.groups:
+        hit = group.hits[0]
+        similar_id = hit.payload.get("notion_id", "")
+
+        # 임계값 이상만
+        if hit.score < SIMILARITY_THRESHOLD:
+            skipped += 1
+            continue
+        similar.append((similar_id, round(hit.score, 3)))
+    return similar, skipped
+
+
+def write_similar_edges(session, notion_id: str, similar: list) -> int:
+    """한 페이지의 SIMILAR_TO 관계 생성"""
+    created = 0
+    for similar_id, score in similar:
+        try:
+            result = session.run("""
+                MATCH (p1:Page {id: $id1})
+                MATCH (p2:Page {id: $id2})
+                MERGE (p1)-[r:SIMILAR_TO]->(p2)
+                SET r.score = $score
+                RETURN count(r) as created
+            """, id1=notion_id, id2=similar_id, score=score)
+
+            if result.single()["created"] > 0:
+                created += 1
+        except Exception:
+            pass
+    return created
+
+
+def page_vectors(qdrant: QdrantClient, scroll_filter: Filter = None) -> dict:
+    """notion_id → 페이지 벡터 (페이지 청크 벡터의 평균)
+
+    청크 벡터를 모두 모으지 않고 페이지별 합계와 청크 수만 유지한다.
+    """
+    sums = {}
+    counts = {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=scroll_filter,
+            limit=100,
+            offset=offset,
+            with_vectors=True,
+            with_payload=["notion_id"]
+        )
+        for point in points:
+            notion_id = point.payload.get("notion_id", "")
+            if not notion_id:
+                continue
+            total = sums.get(notion_id)
+            if total is None:
+                sums[notion_id] = list(point.vector)
+                counts[notion_id] = 1
+            else:
+                for index, value in enumerate(point.vector):
+                    total[index] += value
+                counts[notion_id] += 1
+        if offset is None:
+            break
+    return {
+        notion_id: [value / counts[notion_id] for value in total]
+        for notion_id, total in sums.items()
+    }
+
+
+def fetch_vectors(qdrant: QdrantClient, notion_ids: list) -> dict:
+    """notion_id → 페이지 벡터 (주어진 페이지의 청크만 스크롤, 1000개씩 나눠 조회)"""
+    notion_ids = list(notion_ids)
+    vectors = {}
+    for start in range(0, len(notion_ids), 1000):
+        vectors.update(page_vectors(
+            qdrant,
+            Filter(must=[FieldCondition(key="notion_id", match=MatchAny(any=notion_ids[start:start + 1000]))]),
+        ))
+    return vectors
+
+
+def similar_sources(session, notion_ids: list) -> set:
+    """주어진 페이지를 SIMILAR_TO로 가리키는 페이지"""
+    result = session.run("""
+        MATCH (p:Page)-[:SIMILAR_TO]->(target:Page)
+        WHERE target.id IN $ids
+        RETURN DISTINCT p.id AS id
+    """, ids=list(notion_ids))
+    return {record["id"] for record in result}
+
+
+def refresh_similarity_edges(qdrant: QdrantClient, driver, notion_ids: list, neighbors: set = None) -> dict:
+    """바뀐 페이지와 그 주변 페이지의 SIMILAR_TO 관계만 다시 계산
+
+    바뀐 페이지의 관계를 다시 만든 뒤, 기존에 바뀐 페이지를 가리키던 페이지와
+    새로 유사해진 페이지(neighbors 포함)의 상위 K개도 달라질 수 있으므로 함께 갱신한다.
+    """
+    stats = {"refreshed": 0, "created": 0, "skipped": 0}
+    changed = set(notion_ids)
+    if not changed and not neighbors:
+        return stats
+
+    with driver.session() as session:
+        pending = set(changed)
+        pending |= similar_sources(session, changed)
+        pending |= set(neighbors or ())
+
+        visited = set()
+        while pending:
+            batch = sorted(pending - visited)
+            pending = set()
+            vectors = fetch_vectors(qdrant, batch)
+            session.run("MATCH (p:Page)-[r:SIMILAR_TO]->() WHERE p.id IN $ids DELETE r", ids=batch)
+            for notion_id in batch:
+                visited.add(notion_id)
+                vector = vectors.get(notion_id)
+                if vector is None:  # 본문이 없어 임베딩되지 않은 페이지
+                    continue
+                similar, skipped = find_similar(qdrant, notion_id, vector)
+                stats["created"] += write_similar_edges(session, notion_id, similar)
+                stats["skipped"] += skipped
+                stats["refreshed"] += 1
+                # 바뀐 페이지와 새로 유사해진 페이지는 한 번만 더 확장
+                if notion_id in changed:
+                    pending.update(similar_id for similar_id, _ in similar)
+            pending -= visited
+
+    return stats
+
+
 def create_similarity_edges():
     """벡터 유사도 기반 관계 생성"""
     print("Creating SIMILAR_TO edges from vector similarity...")
@@ -40,26 +191,11 @@ def create_similarity_edges():
     qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
     neo4j_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
-    # Qdrant에서 모든 포인트 가져오기
+    # Qdrant에서 모든 청크 벡터를 가져와 페이지별로 평균
     print("Fetching vectors from Qdrant...")
-    all_points = []
-    offset = None
+    vectors = page_vectors(qdrant)
 
-    while True:
-        result = qdrant.scroll(
-            collection_name=COLLECTION_NAME,
-            limit=100,
-            offset=offset,
-            with_vectors=True,
-            with_payload=True
-        )
-        points, offset = result
-        all_points.extend(points)
-
-        if offset is None:
-            break
-
-    print(f"Fetched {len(all_points)} points")
+    print(f"Fetched vectors for {len(vectors)} pages")
 
     # 유사도 관계 생성
     stats = {"created": 0, "skipped": 0}
@@ -69,44 +205,11 @@ def create_similarity_edges():
         session.run("MATCH ()-[r:SIMILAR_TO]->() DELETE r")
         print("Cleared existing SIMILAR_TO relationships")
 
-        for point in tqdm(all_points, desc="Creating SIMILAR_TO"):
-            notion_id = point.payload.get("notion_id", "")
-            if not notion_id:
-                continue
-
-            # 유사한 페이지 검색
-            results = qdrant.query_points(
-                collection_name=COLLECTION_NAME,
-                query=point.vector,
-                limit=TOP_K + 1,  # 자기 자신 제외
-                with_payload=True
-            )
-
-            for hit in results.points:
-                # 자기 자신 제외
-                similar_id = hit.payload.get("notion_id", "")
-                if similar_id == notion_id:
-                    continue
-
-                # 임계값 이상만
-                if hit.score < SIMILARITY_THRESHOLD:
-                    stats["skipped"] += 1
-                    continue
-
-                # Neo4j에 관계 생성
-                try:
-                    result = session.run("""
-                        MATCH (p1:Page {id: $id1})
-                        MATCH (p2:Page {id: $id2})
-                        MERGE (p1)-[r:SIMILAR_TO]->(p2)
-                        SET r.score = $score
-                        RETURN count(r) as created
-                    """, id1=notion_id, id2=similar_id, score=round(hit.score, 3))
-
-                    if result.single()["created"] > 0:
-                        stats["created"] += 1
-                except Exception:
-                    pass
+        for notion_id, vector in tqdm(vectors.items(), desc="Creating SIMILAR_TO"):
+            # 유사한 페이지 검색 후 Neo4j에 관계 생성
+            similar, skipped = find_similar(qdrant, notion_id, vector)
+            stats["skipped"] += skipped
+            stats["created"] += write_similar_edges(session, notion_id, similar)
 
     neo4j_driver.close()
 
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+export 스냅샷 저장소 (base + 실행별 delta)
+- 매 export마다 전체 복사본(pages_<timestamp>.jsonl) 대신 직전 스냅샷 대비 추가/변경/삭제분만 기록
+- SNAPSHOT_BASE_INTERVAL개의 delta마다(또는 delta가 base보다 커지면) 전체 base를 새로 기록해 복원 비용을 제한
+- 보존 정책: 최근 SNAPSHOT_KEEP개 / SNAPSHOT_MAX_AGE_DAYS일 (가장 오래 남는 스냅샷은 base로 재구성)
+- 임의 시점 스냅샷 복원, 두 실행 사이의 변경분(changeset) 계산
+
+파일 구조 (data/snapshots/):
+    manifest.json             스냅샷 목록 (id, base/delta 파일, 통계)
+    state.json                최신 스냅샷의 레코드별 해시 (다음 delta 계산용)
+    base_<id>.jsonl[.zst]     전체 레코드
+    delta_<id>.jsonl[.zst]    직전 스냅샷 대비 변경분
+
+각 줄은 {"kind": "page" | "database", "op": "add" | "change" | "remove", "id", "record"} 형식이다.
+
+사용 예:
+    python scripts/snapshots.py list
+    python scripts/snapshots.py rebuild 20250101_120000 --output /tmp/snapshot
+    python scripts/snapshots.py diff 20250101_120000 20250108_120000
+    python scripts/snapshots.py prune
+    python scripts/snapshots.py import-legacy --delete
+"""
+
+import argparse
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from page_store import DATA_DIR, PageWriter, iter_pages, stable_hash
+from serialization import BinaryWriter, artifact_name, dump_json, dumps, load_json, loads, open_read
+
+# 경로 설정 (DATA_DIR 아래)
+SNAPSHOT_DIR_NAME = "snapshots"
+
+# 보존할 스냅샷 수 (0이면 제한 없음)
+SNAPSHOT_KEEP = int(os.environ.get("SNAPSHOT_KEEP", 30))
+
+# 보존 기간 (일, 0이면 제한 없음)
+SNAPSHOT_MAX_AGE_DAYS = float(os.environ.get("SNAPSHOT_MAX_AGE_DAYS", 0))
+
+# 이 개수의 delta마다 전체 base를 새로 기록
+SNAPSHOT_BASE_INTERVAL = int(os.environ.get("SNAPSHOT_BASE_INTERVAL", 20))
+
+# 마지막 base 이후 delta 크기 합이 base 크기의 이 비율을 넘으면 base를 새로 기록
+SNAPSHOT_DELTA_RATIO = 0.5
+
+SNAPSHOT_ID_FORMAT = "%Y%m%d_%H%M%S"
+LEGACY_PAGES_PATTERN = re.compile(r"^pages_(\d{8}_\d{6})\.jsonl?(\.zst)?$")
+
+REMOVED = object()
+
+
+class SnapshotStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / "manifest.json"
+        self.state_path = self.root / "state.json"
+        self.manifest = load_json(self.manifest_path) if self.manifest_path.exists() else {"snapshots": []}
+
+    @property
+    def snapshots(self) -> list:
+        return self.manifest["snapshots"]
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        dump_json(self.manifest, tmp_path, indent=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _load_state(self) -> dict:
+        if self.snapshots and self.state_path.exists():
+            return load_json(self.state_path)
+        return {"page": {}, "database": {}}
+
+    def _entry(self, snapshot_id: str) -> dict:
+        for entry in self.snapshots:
+            if entry["id"] == snapshot_id:
+                return entry
+        raise KeyError(f"Unknown snapshot: {snapshot_id}")
+
+    def _needs_base(self) -> bool:
+        """새 스냅샷을 base로도 기록할지 (delta가 쌓여 복원 비용이 커졌을 때)"""
+        base_index = max((i for i, entry in enumerate(self.snapshots) if entry.get("base")), default=None)
+        if base_index is None:
+            return True
+        since_base = self.snapshots[base_index + 1:]
+        if len(since_base) + 1 >= SNAPSHOT_BASE_INTERVAL:
+            return True
+        delta_bytes = sum(entry.get("delta_bytes", 0) for entry in since_base)
+        return delta_bytes > self.snapshots[base_index]["base_bytes"] * SNAPSHOT_DELTA_RATIO
+
+    def record(self, snapshot_id: str, pages_path: Path, databases: list) -> dict:
+        """현재 export 결과를 스냅샷으로 기록 (직전 스냅샷 대비 delta, 필요하면 base도)
+
+        id는 시간순으로 정렬돼야 하므로 같은 초에 기록된 스냅샷이 있으면 id 뒤에 _1, _2 ...를 붙인다.
+        """
+        latest = self.snapshots[-1]["id"] if self.snapshots else ""
+        base_id, suffix = snapshot_id, 0
+        while snapshot_id <= latest:
+            suffix += 1
+            snapshot_id = f"{base_id}_{suffix}"
+
+        previous = self._load_state()
+        state = {"page": {}, "database": {}}
+        first = not self.snapshots
+        write_base = self._needs_base()
+        stats = {"added": 0, "changed": 0, "removed": 0, "pages": 0, "databases": 0}
+
+        delta_path = self.root / artifact_name(f"delta_{snapshot_id}.jsonl")
+        base_path = self.root / artifact_name(f"base_{snapshot_id}.jsonl")
+        delta = None if first else BinaryWriter(delta_path)
+        base = BinaryWriter(base_path) if write_base else None
+
+        def write(writer, kind, op, record_id, record=None):
+            line = {"kind": kind, "op": op, "id": record_id}
+            if record is not None:
+                line["record"] = record
+            writer.write(dumps(line) + b"\n")
+
+        def visit(kind: str, record: dict):
+            record_id = record["id"]
+            digest = stable_hash(record)
+            state[kind][record_id] = digest
+            stats["pages" if kind == "page" else "databases"] += 1
+            if base is not None:
+                write(base, kind, "add", record_id, record)
+            old = previous[kind].get(record_id)
+            if old == digest:
+                return
+            stats["added" if old is None else "changed"] += 1
+            if delta is not None:
+                write(delta, kind, "add" if old is None else "change", record_id, record)
+
+        try:
+            if Path(pages_path).exists():
+                for page in iter_pages(pages_path):
+                    visit("page", page)
+            for db in databases:
+                visit("database", db)
+
+            for kind in ("page", "database"):
+                for record_id in previous[kind]:
+                    if record_id not in state[kind]:
+                        stats["removed"] += 1
+                        if delta is not None:
+                            write(delta, kind, "remove", record_id)
+        except BaseException:
+            for writer, path in ((delta, delta_path), (base, base_path)):
+                if writer is not None:
+                    writer.close()
+                    path.unlink(missing_ok=True)
+            raise
+
+        entry = {"id": snapshot_id, **stats}
+        if delta is not None:
+            delta.close()
+            entry["delta"] = delta_path.name
+            entry["delta_bytes"] = delta_path.stat().st_size
+        if base is not None:
+            base.close()
+            entry["base"] = base_path.name
+            entry["base_bytes"] = base_path.stat().st_size
+
+        dump_json(state, self.state_path)
+        self.snapshots.append(entry)
+        self._save_manifest()
+        return {**entry, "pruned": self.prune()}
+
+    def _iter_lines(self, filename: str):
+        with open_read(self.root / filename) as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+
+    def iter_snapshot(self, snapshot_id: str):
+        """스냅샷 시점의 (kind, record)를 yield
+
+        가장 가까운 이전 base에 그 이후 delta를 적용한다. 바뀐 레코드만 메모리에 올리고
+        base는 한 줄씩 읽으므로 base 크기와 관계없이 메모리 사용량은 변경분에 비례한다.
+        """
+        index = self.snapshots.index(self._entry(snapshot_id))
+        base_index = max(i for i in range(index + 1) if self.snapshots[i].get("base"))
+
+        # 최신 delta부터 거꾸로 읽으며 레코드별 최종 상태만 남김
+        overrides = {}
+        for entry in reversed(self.snapshots[base_index + 1:index + 1]):
+            for line in self._iter_lines(entry["delta"]):
+                key = (line["kind"], line["id"])
+                if key not in overrides:
+                    overrides[key] = REMOVED if line["op"] == "remove" else line["record"]
+
+        for (kind, _), record in overrides.items():
+            if record is not REMOVED:
+                yield kind, record
+        for line in self._iter_lines(self.snapshots[base_index]["base"]):
+            if (line["kind"], line["id"]) not in overrides:
+                yield line["kind"], line["record"]
+
+    def rebuild(self, snapshot_id: str, output_dir: Path) -> dict:
+        """스냅샷 시점의 pages.jsonl / databases.json 복원"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        databases = []
+        with PageWriter(output_dir / artifact_name("pages.jsonl")) as writer:
+            for kind, record in self.iter_snapshot(snapshot_id):
+                if kind == "page":
+                    writer.write(record)
+                else:
+                    databases.append(record)
+        dump_json(databases, output_dir / artifact_name("databases.json"))
+        return {"pages": writer.count, "databases": len(databases)}
+
+    def changeset(self, from_id: str, to_id: str) -> dict:
+        """from_id 이후 to_id까지의 변경분 {kind: {"added": [...], "changed": [...], "removed": [id]}}
+
+        두 스냅샷 사이의 delta만 읽으며, 중간에 추가됐다가 삭제된 레코드는 제외한다.
+        """
+        start = self.snapshots.index(self._entry(from_id))
+        end = self.snapshots.index(self._entry(to_id))
+        if start > end:
+            raise ValueError(f"{from_id} is newer than {to_id}")
+
+        # 레코드별 (첫 op, 마지막 op, 마지막 레코드)
+        folded = {}
+        for entry in self.snapshots[start + 1:end + 1]:
+            for line in self._iter_lines(entry["delta"]):
+                key = (line["kind"], line["id"])
+                first = folded[key][0] if key in folded else line["op"]
+                folded[key] = (first, line["op"], line.get("record"))
+
+        result = {kind: {"added": [], "changed": [], "removed": []} for kind in ("page", "database")}
+        for (kind, record_id), (first, last, record) in folded.items():
+            existed_before = first != "add"
+            if last == "remove":
+                if existed_before:
+                    result[kind]["removed"].append(record_id)
+            elif existed_before:
+                result[kind]["changed"].append(record)
+            else:
+                result[kind]["added"].append(record)
+        return result
+
+    def prune(self, now: datetime = None) -> list:
+        """보존 정책을 벗어난 오래된 스냅샷 삭제 (남는 가장 오래된 스냅샷은 base로 재구성)"""
+        if not self.snapshots:
+            return []
+        keep_from = 0
+        if SNAPSHOT_KEEP > 0:
+            keep_from = max(keep_from, len(self.snapshots) - SNAPSHOT_KEEP)
+        if SNAPSHOT_MAX_AGE_DAYS > 0:
+            cutoff = (now or datetime.now()) - timedelta(days=SNAPSHOT_MAX_AGE_DAYS)
+            for i, entry in enumerate(self.snapshots[:-1]):  # 최신 스냅샷은 항상 유지
+                if datetime.strptime(entry["id"][:15], SNAPSHOT_ID_FORMAT) < cutoff:
+                    keep_from = max(keep_from, i + 1)
+        if keep_from == 0:
+            return []
+
+        oldest = self.snapshots[keep_from]
+        if not oldest.get("base"):
+            base_path = self.root / artifact_name(f"base_{oldest['id']}.jsonl")
+            writer = BinaryWriter(base_path)
+            try:
+                for kind, record in self.iter_snapshot(oldest["id"]):
+                    writer.write(dumps({"kind": kind, "op": "add", "id": record["id"], "record": record}) + b"\n")
+            finally:
+                writer.close()
+            oldest["base"] = base_path.name
+            oldest["base_bytes"] = base_path.stat().st_size
+
+        removed = self.snapshots[:keep_from]
+        self.manifest["snapshots"] = self.snapshots[keep_from:]
+        self._save_manifest()
+        for entry in removed:
+            for key in ("base", "delta"):
+                if entry.get(key):
+                    (self.root / entry[key]).unlink(missing_ok=True)
+        return [entry["id"] for entry in removed]
+
+    def import_legacy(self, data_dir: Path, delete: bool = False) -> list:
+        """기존 pages_<timestamp>.jsonl / databases_<timestamp>.json 복사본을 시간순으로 스냅샷에 기록"""
+        legacy = []
+        for path in Path(data_dir).iterdir():
+            match = LEGACY_PAGES_PATTERN.match(path.name)
+            if match:
+                legacy.append((match.group(1), path))
+
+        known = {entry["id"] for entry in self.snapshots}
+        latest = self.snapshots[-1]["id"] if self.snapshots else ""
+        imported = []
+        for snapshot_id, pages_path in sorted(legacy):
+            if snapshot_id in known or snapshot_id < latest:
+                print(f"  Skipping {pages_path.name} (not newer than existing snapshots)")
+                continue
+            dbs_candidates = [Path(data_dir) / name for name in (
+                f"databases_{snapshot_id}.json", f"databases_{snapshot_id}.json.zst"
+            )]
+            dbs_path = next((path for path in dbs_candidates if path.exists()), None)
+            databases = load_json(dbs_path) if dbs_path else []
+            entry = self.record(snapshot_id, pages_path, databases)
+            print(f"  {snapshot_id}: +{entry['added']} ~{entry['changed']} -{entry['removed']}")
+            imported.append(snapshot_id)
+            if delete:
+                pages_path.unlink()
+                if dbs_path:
+                    dbs_path.unlink()
+        return imported
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="export 스냅샷 조회/복원/정리")
+    parser.add_argument(
+        "--dir", type=Path, default=DATA_DIR / SNAPSHOT_DIR_NAME,
+        help="스냅샷 디렉토리 (기본값: data/snapshots)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="스냅샷 목록")
+
+    rebuild = subparsers.add_parser("rebuild", help="스냅샷 시점의 pages.jsonl / databases.json 복원")
+    rebuild.add_argument("snapshot_id")
+    rebuild.add_argument("--output", type=Path, required=True, help="복원할 디렉토리")
+
+    diff = subparsers.add_parser("diff", help="두 스냅샷 사이의 변경분")
+    diff.add_argument("from_id")
+    diff.add_argument("to_id")
+    diff.add_argument("--output", type=Path, help="변경분 전체를 JSON으로 저장할 경로")
+
+    subparsers.add_parser("prune", help="보존 정책(SNAPSHOT_KEEP / SNAPSHOT_MAX_AGE_DAYS) 적용")
+
+    legacy = subparsers.add_parser("import-legacy", help="기존 pages_<timestamp> 복사본을 스냅샷으로 변환")
+    legacy.add_argument("--delete", action="store_true", help="변환한 복사본 삭제")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = SnapshotStore(args.dir)
+
+    if args.command == "list":
+        print(f"{'id':<17} {'type':<12} {'pages':>7} {'added':>6} {'changed':>7} {'removed':>7} {'size':>9}")
+        for entry in store.snapshots:
+            kind = "+".join(key for key in ("base", "delta") if entry.get(key))
+            size = entry.get("base_bytes", 0) + entry.get("delta_bytes", 0)
+            print(f"{entry['id']:<17} {kind:<12} {entry['pages']:>7} {entry['added']:>6} "
+                  f"{entry['changed']:>7} {entry['removed']:>7} {format_bytes(size):>9}")
+
+    elif args.command == "rebuild":
+        counts = store.rebuild(args.snapshot_id, args.output)
+        print(f"Rebuilt {args.snapshot_id}: {counts['pages']} pages, {counts['databases']} databases → {args.output}")
+
+    elif args.command == "diff":
+        changes = store.changeset(args.from_id, args.to_id)
+        for kind, change in changes.items():
+            print(f"{kind}: +{len(change['added'])} ~{len(change['changed'])} -{len(change['removed'])}")
+            for label, records in (("+", change["added"]), ("~", change["changed"])):
+                for record in records[:10]:
+                    print(f"  {label} {record.get('title', '')[:50]} ({record['id']})")
+            for record_id in change["removed"][:10]:
+                print(f"  - {record_id}")
+        if args.output:
+            dump_json(changes, args.output, indent=True)
+            print(f"Changeset saved to: {args.output}")
+
+    elif args.command == "prune":
+        removed = store.prune()
+        print(f"Pruned {len(removed)} snapshots" + (f": {', '.join(removed)}" if removed else ""))
+
+    elif args.command == "import-legacy":
+        imported = store.import_legacy(DATA_DIR, delete=args.delete)
+        print(f"Imported {len(imported)} legacy snapshots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Notion → Qdrant / Neo4j 연속 동기화 데몬
+- 주기적으로 last_edited_time 워터마크 이후 수정된 페이지만 search로 조회
+- 바뀐 페이지만 블록 추출 → 임베딩 → Qdrant upsert → Neo4j 노드/관계 갱신 → 주변 SIMILAR_TO 재계산
+- 페이지 저장소(pages.jsonl)와 export 워터마크도 함께 갱신하므로 배치 스크립트와 상태를 공유
+- search로는 삭제를 알 수 없으므로 주기적으로 전체 페이지 ID를 대조해 삭제분 반영
+
+사용 예:
+    python scripts/sync_daemon.py --interval 10
+    python scripts/sync_daemon.py --once
+    python scripts/sync_daemon.py --no-graph  # Qdrant만 동기화
+    NOTION_BASE_URL=http://127.0.0.1:8765 NOTION_TOKEN=fake python scripts/sync_daemon.py --interval 2
+"""
+
+import argparse
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import vector_store
+from notion_exporter import (
+    NotionExporter,
+    build_page_data,
+    extract_title,
+    load_export_state,
+    save_export_state,
+)
+from page_store import (
+    DATA_DIR,
+    PAGES_FILENAME,
+    PageReader,
+    PageStore,
+    append_pages,
+    compact_pages,
+    has_appended,
+    iter_pages,
+    merge_pages,
+    resolve_pages_path,
+    stable_hash,
+)
+
+# 폴링 주기 (초)
+SYNC_INTERVAL = float(os.environ.get("SYNC_INTERVAL", 30))
+
+# 삭제된 페이지 확인 주기 (초, 전체 search 필요)
+SYNC_RECONCILE_INTERVAL = float(os.environ.get("SYNC_RECONCILE_INTERVAL", 3600))
+
+# Notion last_edited_time은 분 단위라 같은 분 안에 다시 수정돼도 시각이 그대로임
+# → 수정 후 이 시간 동안은 블록 캐시를 거치지 않고 매번 다시 가져옴
+SYNC_SETTLE_SECONDS = float(os.environ.get("SYNC_SETTLE_SECONDS", 120))
+
+
+def parse_notion_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class PageIndex:
+    """관계 갱신에 필요한 전체 페이지 메타데이터 (본문 제외)"""
+
+    def __init__(self):
+        self.meta = {}
+
+    @classmethod
+    def load(cls, path) -> "PageIndex":
+        index = cls()
+        if path.exists():
+            for page in iter_pages(path):
+                index.add(page)
+        return index
+
+    def add(self, page: dict):
+        self.meta[page["id"]] = {
+            "edited": page.get("last_edited_time", ""),
+            "digest": stable_hash(page),
+            "child_pages": list(page.get("child_pages", [])),
+            "child_databases": list(page.get("child_databases", [])),
+            "links": set(page.get("links", [])),
+            "database_id": page.get("parent", {}).get("database_id", ""),
+        }
+
+    def remove(self, page_ids):
+        for page_id in page_ids:
+            self.meta.pop(page_id, None)
+
+    def __contains__(self, page_id: str) -> bool:
+        return page_id in self.meta
+
+    def edited(self, page_id: str) -> str:
+        meta = self.meta.get(page_id)
+        return meta["edited"] if meta else None
+
+    def unchanged(self, page: dict) -> bool:
+        """저장된 레코드와 완전히 같은지"""
+        meta = self.meta.get(page["id"])
+        return meta is not None and meta["digest"] == stable_hash(page)
+
+    def parents(self) -> tuple:
+        """graph_builder.collect_parents와 같은 형식"""
+        block_parents = {}
+        database_parents = {}
+        for page_id, meta in self.meta.items():
+            for child_id in meta["child_pages"]:
+                block_parents[child_id] = page_id
+            for db_id in meta["child_databases"]:
+                database_parents[db_id] = page_id
+        return set(self.meta), block_parents, database_parents
+
+    def update(self, pages: list) -> set:
+        """바뀐 페이지를 반영하고, 관계를 다시 확인해야 하는 다른 페이지 ID 반환
+
+        - 하위 페이지/데이터베이스 목록이 바뀐 페이지의 자식: CHILD_OF 대상이 바뀔 수 있음
+        - 새 페이지를 링크하던 페이지: 이제 LINKS_TO를 만들 수 있음
+        """
+        related = set()
+        new_ids = set()
+        databases = set()
+        for page in pages:
+            old = self.meta.get(page["id"])
+            if old is None:
+                new_ids.add(page["id"])
+            else:
+                related.update(old["child_pages"])
+                databases.update(old["child_databases"])
+            related.update(page.get("child_pages", []))
+            databases.update(page.get("child_databases", []))
+            self.add(page)
+
+        for page_id, meta in self.meta.items():
+            if meta["database_id"] in databases or (new_ids and meta["links"] & new_ids):
+                related.add(page_id)
+
+        return {page_id for page_id in related if page_id in self.meta} - {page["id"] for page in pages}
+
+
+class SyncDaemon:
+    def __init__(self, use_graph: bool = True, reconcile_interval: float = SYNC_RECONCILE_INTERVAL):
+        self.pages_path = DATA_DIR / PAGES_FILENAME
+        self.reconcile_interval = reconcile_interval
+        self.stop_event = threading.Event()
+
+        if not resolve_pages_path(DATA_DIR).exists():
+            # 첫 실행: 전체 export로 페이지 저장소와 워터마크를 만든 뒤 증분 동기화
+            print("No page store found. Running full export first...")
+            NotionExporter(use_async=True).run()
+
+        self.exporter = NotionExporter()
+        self.since = load_export_state().get("last_edited_time")
+        self.index = PageIndex.load(resolve_pages_path(DATA_DIR))
+        self.last_reconcile = time.monotonic()
+
+        self.model = vector_store.init_model()
+        self.qdrant = vector_store.init_qdrant(recreate=False)
+
+        # Neo4j 관련 모듈은 NEO4J_PASSWORD가 필요하므로 사용할 때만 불러옴
+        self.graph = None
+        self.similarity = None
+        self.driver = None
+        if use_graph:
+            import graph_builder
+            import similarity_edges
+
+            self.graph = graph_builder
+            self.similarity = similarity_edges
+            self.driver = graph_builder.init_neo4j()
+            graph_builder.create_constraints(self.driver)
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.close()
+        if self.exporter.block_cache is not None:
+            self.exporter.block_cache.close()
+
+    def catch_up(self):
+        """시작 시 페이지 저장소 전체를 Qdrant/Neo4j와 대조 (데몬이 멈춰 있던 동안의 변경 반영)"""
+        print("\nCatching up Qdrant/Neo4j with the page store...")
+        pages = PageReader(resolve_pages_path(DATA_DIR))
+        existing = vector_store.load_point_hashes(self.qdrant)
+        reembedded = [
+            page["id"] for page in pages
+            if existing.get(page["id"], (None,))[0] != vector_store.embedding_hash(page)
+        ]
+        vector_stats = vector_store.process_pages(pages, self.model, self.qdrant, existing)
+        deleted = vector_store.delete_points(self.qdrant, [page_id for page_id in existing if page_id not in self.index])
+        print(f"  Qdrant: embedded {vector_stats['processed']}, payload updated {vector_stats['payload_updated']}, "
+              f"deleted {deleted}")
+
+        if self.driver is not None:
+            graph_stats = self.graph.sync_pages(self.driver, pages)
+            similarity_stats = self.similarity.refresh_similarity_edges(self.qdrant, self.driver, reembedded)
+            print(f"  Neo4j: created {graph_stats['created']}, updated {graph_stats['updated']}, "
+                  f"deleted {graph_stats['deleted']}, SIMILAR_TO refreshed for {similarity_stats['refreshed']} pages")
+
+    def fetch_changes(self) -> list:
+        """워터마크 이후 수정된 페이지 레코드 (이미 반영한 버전은 건너뜀)"""
+        now = datetime.now(timezone.utc)
+        settle = timedelta(seconds=SYNC_SETTLE_SECONDS)
+        changed = []
+        for _, page in self.exporter.iter_search_results(self.since):
+            unsettled = now - parse_notion_time(page["last_edited_time"]) < settle
+            if self.index.edited(page["id"]) == page["last_edited_time"] and not unsettled:
+                continue
+
+            if unsettled:
+                # 같은 분 안의 재수정을 놓치지 않도록 캐시를 거치지 않고 가져와 캐시를 덮어씀
+                errors_before = len(self.exporter.stats["errors"])
+                with self.exporter.telemetry.track_page(page["id"], extract_title(page)):
+                    blocks = self.exporter.get_all_blocks(page["id"])
+                self.exporter.cache_page_blocks(page, blocks, errors_before)
+            else:
+                blocks = self.exporter.get_page_blocks(page)
+            page_data = build_page_data(page, blocks, self.exporter.block_types, self.exporter.raw_properties)
+            if not self.index.unchanged(page_data):
+                changed.append(page_data)
+        return changed
+
+    def load_records(self, page_ids: set) -> list:
+        """페이지 저장소에서 레코드 조회 (관계만 다시 확인할 페이지용)"""
+        if not page_ids:
+            return []
+        with PageStore(resolve_pages_path(DATA_DIR)) as store:
+            return list(store.get_many(page_ids))
+
+    def apply(self, changed: list) -> dict:
+        """바뀐 페이지를 페이지 저장소 → Qdrant → Neo4j → SIMILAR_TO 순으로 반영"""
+        stats = {"changed": len(changed), "new": sum(1 for page in changed if page["id"] not in self.index)}
+        changed_ids = [page["id"] for page in changed]
+
+        related_ids = self.index.update(changed)
+        pages_path = resolve_pages_path(DATA_DIR)
+        if pages_path == self.pages_path:
+            # 파일 끝에 이어 쓰고 인덱스만 갱신 (이전 버전은 reconcile 또는 PAGE_COMPACT_RATIO 초과 시 정리)
+            append_pages(pages_path, changed)
+        else:
+            # 기존 pages.json이나 다른 압축 설정의 파일은 현재 형식으로 한 번 다시 기록
+            merge_pages(pages_path, self.pages_path, changed)
+
+        # 본문이 같은 페이지(내용 해시가 같음)는 다시 임베딩하지 않음
+        existing = vector_store.load_point_hashes(self.qdrant, changed_ids)
+        reembedded = [
+            page["id"] for page in changed
+            if existing.get(page["id"], (None,))[0] != vector_store.embedding_hash(page)
+        ]
+        vector_stats = vector_store.process_pages(changed, self.model, self.qdrant, existing, quiet=True)
+        stats["embedded"] = vector_stats["processed"]
+        stats["payload_updated"] = vector_stats["payload_updated"]
+
+        if self.driver is not None:
+            pages = changed + self.load_records(related_ids)
+            graph_stats = self.graph.sync_pages(self.driver, pages, parents=self.index.parents(), quiet=True)
+            similarity_stats = self.similarity.refresh_similarity_edges(self.qdrant, self.driver, reembedded)
+            stats["graph_updated"] = graph_stats["created"] + graph_stats["updated"]
+            stats["relationships"] = graph_stats["child_of"] + graph_stats["links_to"]
+            stats["similar_refreshed"] = similarity_stats["refreshed"]
+
+        # 다음 폴링 워터마크 (같은 분에 수정된 페이지는 다음에도 조회되지만 위에서 건너뜀)
+        watermark = max([self.since or ""] + [page["last_edited_time"] for page in changed])
+        if watermark:
+            self.since = watermark
+            save_export_state({"last_edited_time": watermark, "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S")})
+        return stats
+
+    def reconcile(self) -> int:
+        """전체 페이지 ID를 search로 대조해 삭제된 페이지를 모든 저장소에서 제거"""
+        live_ids = {page["id"] for _, page in self.exporter.iter_search_results()}
+        removed = [page_id for page_id in self.index.meta if page_id not in live_ids]
+        if not removed:
+            pages_path = resolve_pages_path(DATA_DIR)
+            if has_appended(pages_path):
+                compact_pages(pages_path)
+            return 0
+
+        sources = set()
+        if self.driver is not None:
+            with self.driver.session() as session:
+                sources = self.similarity.similar_sources(session, removed) - set(removed)
+
+        # 삭제분을 빼고 다시 기록하면서 append_pages로 쌓인 이전 버전도 함께 정리
+        merge_pages(resolve_pages_path(DATA_DIR), self.pages_path, [], removed=removed)
+        self.index.remove(removed)
+        vector_store.delete_points(self.qdrant, removed)
+        if self.driver is not None:
+            self.graph.delete_pages(self.driver, removed)
+            # 삭제된 페이지를 가리키던 페이지는 상위 K개가 비었으므로 다시 계산
+            self.similarity.refresh_similarity_edges(self.qdrant, self.driver, [], neighbors=sources)
+        return len(removed)
+
+    def run_once(self):
+        started = time.time()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        calls_before = sum(e["calls"] for e in self.exporter.telemetry.endpoints.values())
+
+        changed = self.fetch_changes()
+        titles = [f"    - {page['title'][:50]}" for page in changed[:5]]
+        if changed:
+            stats = self.apply(changed)
+            summary = (f"{stats['changed']} changed ({stats['new']} new) → "
+                       f"embedded {stats['embedded']}, payload {stats['payload_updated']}")
+            if self.driver is not None:
+                summary += (f" | graph {stats['graph_updated']} nodes, {stats['relationships']} rels"
+                            f" | SIMILAR_TO {stats['similar_refreshed']} pages")
+        else:
+            summary = "no changes"
+
+        if time.monotonic() - self.last_reconcile >= self.reconcile_interval:
+            self.last_reconcile = time.monotonic()
+            removed = self.reconcile()
+            if removed:
+                summary += f" | removed {removed} deleted pages"
+
+        calls = sum(e["calls"] for e in self.exporter.telemetry.endpoints.values()) - calls_before
+        print(f"[{timestamp}] {summary} ({calls} API calls, {time.time() - started:.1f}s)")
+        for title in titles:
+            print(title)
+
+    def run_forever(self, interval: float):
+        print(f"\nPolling Notion every {interval:g}s (since {self.since}). Press Ctrl+C to stop.")
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # 일시적인 API/DB 오류로 데몬이 멈추지 않도록 다음 주기에 다시 시도
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Sync failed: {e}")
+            self.stop_event.wait(interval)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Notion → Qdrant/Neo4j 연속 동기화 데몬")
+    parser.add_argument(
+        "--interval", type=float, default=SYNC_INTERVAL,
+        help=f"폴링 주기 (초, 기본값: {SYNC_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--reconcile-interval", type=float, default=SYNC_RECONCILE_INTERVAL,
+        help=f"삭제된 페이지 확인 주기 (초, 기본값: {SYNC_RECONCILE_INTERVAL:g})",
+    )
+    parser.add_argument("--once", action="store_true", help="한 번만 동기화하고 종료")
+    parser.add_argument("--no-graph", action="store_true", help="Neo4j 없이 Qdrant만 동기화")
+    parser.add_argument("--skip-catch-up", action="store_true", help="시작 시 전체 대조 생략")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print("=" * 60)
+    print("Notion Sync Daemon")
+    print("=" * 60)
+
+    daemon = SyncDaemon(use_graph=not args.no_graph, reconcile_interval=args.reconcile_interval)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop_event.set())
+    try:
+        if not args.skip_catch_up:
+            daemon.catch_up()
+        if args.once:
+            daemon.run_once()
+        else:
+            daemon.run_forever(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+        print("\nSync daemon stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Notion API 호출 계측
+- 엔드포인트별 호출 수, 지연 시간 히스토그램, 재시도/429 횟수, 대기(sleep) 시간
+- 페이지별 API 호출 수와 소요 시간 → 가장 비싼 페이지 순위
+- 현재 처리 중인 페이지는 contextvars로 전달되므로 비동기 하위 작업도 같은 페이지로 집계됨
+"""
+
+import heapq
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 순위에 남길 페이지 수
+TELEMETRY_TOP_PAGES = int(os.environ.get("TELEMETRY_TOP_PAGES", 20))
+
+# 지연 시간 히스토그램 구간 상한 (ms)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 현재 블록을 수집 중인 페이지의 비용 레코드
+_current_page = ContextVar("current_page", default=None)
+
+
+def _bucket_label(ms: float) -> str:
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return f"<={bound}"
+    return f">{LATENCY_BUCKETS_MS[-1]}"
+
+
+class Telemetry:
+    def __init__(self, top_pages: int = TELEMETRY_TOP_PAGES):
+        self.top_pages = top_pages
+        self.endpoints = {}
+        # (정렬 키, 순번, 레코드) 최소 힙 → 상위 N개만 유지
+        self._by_time = []
+        self._by_calls = []
+        self._seq = 0
+
+    def _endpoint(self, name: str) -> dict:
+        if name not in self.endpoints:
+            self.endpoints[name] = {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "rate_limited": 0,
+                "total_seconds": 0.0,
+                "max_ms": 0.0,
+                "sleep_seconds": 0.0,
+                "histogram_ms": {},
+            }
+        return self.endpoints[name]
+
+    def record_call(self, endpoint: str, seconds: float, error: Exception = None):
+        """API 요청 1회의 지연 시간 기록 (실패한 요청 포함)"""
+        stats = self._endpoint(endpoint)
+        ms = seconds * 1000
+        stats["calls"] += 1
+        stats["total_seconds"] += seconds
+        stats["max_ms"] = max(stats["max_ms"], ms)
+        label = _bucket_label(ms)
+        stats["histogram_ms"][label] = stats["histogram_ms"].get(label, 0) + 1
+        if error is not None:
+            stats["errors"] += 1
+
+        page = _current_page.get()
+        if page is not None:
+            page["api_calls"] += 1
+            page["api_seconds"] += seconds
+
+    def record_retry(self, endpoint: str, error: Exception):
+        stats = self._endpoint(endpoint)
+        stats["retries"] += 1
+        if getattr(error, "status", None) == 429:
+            stats["rate_limited"] += 1
+
+        page = _current_page.get()
+        if page is not None:
+            page["retries"] += 1
+
+    def record_sleep(self, endpoint: str, seconds: float):
+        """rate limit/백오프로 기다린 시간 기록"""
+        if seconds <= 0:
+            return
+        self._endpoint(endpoint)["sleep_seconds"] += seconds
+
+        page = _current_page.get()
+        if page is not None:
+            page["sleep_seconds"] += seconds
+
+    @contextmanager
+    def track_page(self, page_id: str, title: str = ""):
+        """블록 안에서 발생한 API 호출을 해당 페이지 비용으로 집계"""
+        page = {
+            "id": page_id,
+            "title": title,
+            "api_calls": 0,
+            "retries": 0,
+            "api_seconds": 0.0,
+            "sleep_seconds": 0.0,
+        }
+        token = _current_page.set(page)
+        start = time.perf_counter()
+        try:
+            yield page
+        finally:
+            page["wall_seconds"] = time.perf_counter() - start
+            _current_page.reset(token)
+            self._rank(page)
+
+    def _rank(self, page: dict):
+        self._seq += 1
+        for heap, key in ((self._by_time, page["wall_seconds"]), (self._by_calls, page["api_calls"])):
+            item = (key, self._seq, page)
+            if len(heap) < self.top_pages:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def merge(self, report: dict):
+        """다른 프로세스(샤드 worker)의 report() 결과를 합침"""
+        for name, other in report.get("endpoints", {}).items():
+            stats = self._endpoint(name)
+            for key in ("calls", "errors", "retries", "rate_limited", "total_seconds", "sleep_seconds"):
+                stats[key] += other[key]
+            stats["max_ms"] = max(stats["max_ms"], other["max_ms"])
+            for label, count in other["histogram_ms"].items():
+                stats["histogram_ms"][label] = stats["histogram_ms"].get(label, 0) + count
+
+        # 두 순위에 모두 들어있는 페이지는 한 번만 반영
+        pages = {page["id"]: page for page in report.get("slowest_pages", []) + report.get("most_api_calls", [])}
+        for page in pages.values():
+            self._rank(dict(page))
+
+    @staticmethod
+    def _ranked(heap: list) -> list:
+        pages = []
+        for _, _, page in sorted(heap, reverse=True):
+            pages.append({
+                **page,
+                "api_seconds": round(page["api_seconds"], 3),
+                "sleep_seconds": round(page["sleep_seconds"], 3),
+                "wall_seconds": round(page["wall_seconds"], 3),
+            })
+        return pages
+
+    def report(self) -> dict:
+        """export_stats에 기록할 계측 결과"""
+        endpoints = {}
+        for name, stats in sorted(self.endpoints.items()):
+            calls = stats["calls"]
+            endpoints[name] = {
+                **stats,
+                "total_seconds": round(stats["total_seconds"], 3),
+                "mean_ms": round(stats["total_seconds"] * 1000 / calls, 1) if calls else 0.0,
+                "max_ms": round(stats["max_ms"], 1),
+                "sleep_seconds": round(stats["sleep_seconds"], 3),
+                "histogram_ms": {
+                    label: stats["histogram_ms"][label]
+                    for label in [f"<={b}" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+                    if label in stats["histogram_ms"]
+                },
+            }
+
+        return {
+            "endpoints": endpoints,
+            "sleep_seconds": round(sum(s["sleep_seconds"] for s in self.endpoints.values()), 3),
+            "slowest_pages": self._ranked(self._by_time),
+            "most_api_calls": self._ranked(self._by_calls),
+        }
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+페이지 본문을 제목(섹션) 단위로 나눈 임베딩용 청크
+- 섹션 경계는 exporter가 기록한 제목 블록 위치(page["headings"]의 offset)를 사용 (content를 다시 파싱하지 않음)
+- 짧은 섹션은 CHUNK_CHARS 안에서 이어 붙이고, 긴 섹션은 줄 단위로 나누며 앞 청크 끝부분을 CHUNK_OVERLAP_CHARS만큼 겹침
+- 코드 블록(``` 펜스)은 한 단위로 다뤄 CHUNK_CHARS보다 길지 않으면 청크 사이에서 나뉘지 않음
+- 각 청크 앞에 페이지 제목을 붙여 청크만으로도 어떤 페이지인지 드러나게 함
+"""
+
+import os
+
+# 청크 최대 글자 수 (한글 ~2 chars per token → 약 800토큰) / 긴 섹션을 나눌 때 겹치는 글자 수
+CHUNK_CHARS = int(os.environ.get("CHUNK_CHARS", 1600))
+CHUNK_OVERLAP_CHARS = int(os.environ.get("CHUNK_OVERLAP_CHARS", 200))
+
+CODE_FENCE = "```"
+
+
+def split_units(text: str) -> list:
+    """섹션 본문을 나눌 수 있는 단위로 분리 (빈 줄 제외, 코드 블록은 펜스까지 하나로 묶음)"""
+    units = []
+    fence = None
+    for line in text.split("\n"):
+        if fence is not None:
+            fence.append(line)
+            if line.strip() == CODE_FENCE:
+                units.append("\n".join(fence))
+                fence = None
+        elif line.strip().startswith(CODE_FENCE):
+            fence = [line]
+        elif line.strip():
+            units.append(line)
+    if fence is not None:
+        units.append("\n".join(fence))
+    return units
+
+
+def split_sections(content: str, headings: list = None) -> list:
+    """제목 위치로 나눈 [(제목, 단위 목록)] (첫 제목 앞 본문은 제목이 빈 문자열)
+
+    headings는 exporter가 기록한 [{"offset", "level", "text"}]이며, 없으면 본문 전체가 한 섹션이다.
+    """
+    bounds = [(0, "")]
+    for heading in sorted(headings or [], key=lambda heading: heading["offset"]):
+        if 0 <= heading["offset"] < len(content):
+            bounds.append((heading["offset"], heading["text"]))
+    bounds.append((len(content), ""))
+
+    sections = []
+    for (start, heading), (end, _) in zip(bounds, bounds[1:]):
+        units = split_units(content[start:end])
+        if units:
+            sections.append((heading, units))
+    return sections
+
+
+def split_line(line: str, size: int, overlap: int) -> list:
+    """size보다 긴 단위를 overlap만큼 겹치게 잘라 나눔"""
+    if len(line) <= size:
+        return [line]
+    step = max(1, size - overlap)
+    return [line[start:start + size] for start in range(0, len(line) - overlap, step)]
+
+
+def pack_lines(lines: list, size: int, overlap: int) -> list:
+    """단위를 size 글자 안에서 이어 붙인 구절 목록 (새 구절은 앞 구절의 마지막 단위들을 overlap 글자까지 포함)
+
+    겹칠 단위와 다음 단위가 함께 size에 들어가지 않으면 오래된 겹침 단위부터 버린다.
+    """
+    passages = []
+    current = []
+    length = 0
+    for line in lines:
+        for piece in split_line(line, size, overlap):
+            if current and length + len(piece) + 1 > size:
+                passages.append("\n".join(current))
+                kept = []
+                kept_length = 0
+                for previous in reversed(current):
+                    if kept_length + len(previous) + 1 > overlap:
+                        break
+                    kept.insert(0, previous)
+                    kept_length += len(previous) + 1
+                while kept and kept_length + len(piece) + 1 > size:
+                    kept_length -= len(kept.pop(0)) + 1
+                current, length = kept, kept_length
+            current.append(piece)
+            length += len(piece) + 1
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+def chunk_page_text(title: str, content: str, headings: list = None, chunk_chars: int = CHUNK_CHARS,
+                    overlap: int = CHUNK_OVERLAP_CHARS) -> list:
+    """페이지의 임베딩용 청크 [{"text", "heading"}] (본문이 없으면 제목 하나, 둘 다 없으면 빈 목록)
+
+    섹션 전체가 현재 청크에 들어가면 이어 붙이고, 아니면 새 청크를 시작한다.
+    한 청크에 들어가지 않는 섹션만 겹치는 구절로 나눈다.
+    """
+    title = title or ""
+    content = content or ""
+    if not content.strip():
+        return [{"text": title, "heading": ""}] if title.strip() else []
+
+    prefix = f"{title}\n\n" if title else ""
+    size = max(chunk_chars - len(prefix), chunk_chars // 2)
+    overlap = min(overlap, size // 2)
+
+    chunks = []
+    current = []
+    current_heading = ""
+    length = 0
+
+    def flush():
+        if current:
+            chunks.append({"text": prefix + "\n".join(current), "heading": current_heading})
+
+    for heading, units in split_sections(content, headings):
+        section_length = sum(len(unit) + 1 for unit in units)
+        if current and length + section_length <= size:
+            current.extend(units)
+            length += section_length
+            continue
+
+        flush()
+        current, current_heading, length = [], heading, 0
+        if section_length <= size:
+            current, length = list(units), section_length
+            continue
+
+        for passage in pack_lines(units, size, overlap):
+            chunks.append({"text": prefix + passage, "heading": heading})
+    flush()
+    return chunks
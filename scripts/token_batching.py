@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+토큰 예산 기반 동적 배치 (BGE-M3 인코딩용)
+- 텍스트를 토큰 길이순으로 정렬해 비슷한 길이끼리 묶음 → 짧은 텍스트가 긴 텍스트 길이로 패딩되지 않음
+- 배치 크기는 고정 개수가 아니라 (배치 크기 × 배치 내 최대 토큰 수) ≤ 토큰 예산으로 결정
+- 인코딩 결과는 원래 입력 순서로 되돌려 반환
+"""
+
+import os
+
+# 배치 하나의 패딩 포함 토큰 수 상한 / 배치 최대 텍스트 수
+EMBED_TOKEN_BUDGET = int(os.environ.get("EMBED_TOKEN_BUDGET", 8192))
+EMBED_MAX_BATCH = int(os.environ.get("EMBED_MAX_BATCH", 32))
+
+# 토크나이저가 없을 때 길이 추정 (한글은 ~2 chars per token)
+CHARS_PER_TOKEN = 2
+
+
+def token_lengths(tokenizer, texts: list, max_length: int) -> list:
+    """텍스트별 토큰 수 (특수 토큰 포함, max_length에서 잘림)
+
+    모델의 토크나이저(model.tokenizer)로 세고, 토크나이저가 없으면(None) 글자 수로 추정한다.
+    """
+    if tokenizer is None:
+        return [min(max_length, len(text) // CHARS_PER_TOKEN + 2) for text in texts]
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_length)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def plan_batches(lengths: list, token_budget: int = EMBED_TOKEN_BUDGET, max_batch: int = EMBED_MAX_BATCH) -> list:
+    """길이순으로 정렬한 인덱스를 토큰 예산 안에서 묶은 배치 목록
+
+    긴 텍스트부터 묶으므로 메모리가 부족하면 첫 배치에서 바로 드러난다.
+    예산보다 긴 텍스트 하나는 단독 배치가 된다.
+    """
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index], reverse=True)
+    batches = []
+    batch = []
+    longest = 0
+    for index in order:
+        if batch and (len(batch) >= max_batch or (len(batch) + 1) * longest > token_budget):
+            batches.append(batch)
+            batch = []
+        if not batch:
+            # 정렬돼 있으므로 배치의 최대 길이는 첫 텍스트 길이
+            longest = lengths[index]
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def encode_in_batches(texts: list, encode, lengths: list, token_budget: int = EMBED_TOKEN_BUDGET,
+                      max_batch: int = EMBED_MAX_BATCH) -> list:
+    """plan_batches대로 encode(텍스트 목록 → 벡터 목록)를 호출하고 입력 순서대로 벡터 반환"""
+    vectors = [None] * len(texts)
+    for batch in plan_batches(lengths, token_budget, max_batch):
+        for index, vector in zip(batch, encode([texts[index] for index in batch])):
+            vectors[index] = vector
+    return vectors
@@ -2,26 +2,48 @@
 """
 Notion 페이지 벡터 임베딩 및 Qdrant 저장
 BGE-M3 (1024차원 dense vector) + Qdrant
+- 페이지를 제목(섹션) 단위의 겹치는 청크로 나눠 청크마다 포인트 하나 (payload의 notion_id로 페이지 참조)
+- 검색은 notion_id로 묶어(group-by) 페이지마다 가장 가까운 청크의 점수로 순위를 매김
 """
 
-import json
+import argparse
+import copy
 import os
+import time
 import uuid
-from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, PayloadSchemaType
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    IsEmptyCondition,
+    MatchAny,
+    MatchValue,
+    PayloadField,
+    PayloadSchemaType,
+    PointStruct,
+    Range,
+    VectorParams,
+)
 from FlagEmbedding import BGEM3FlagModel
 from tqdm import tqdm
 
+from background import BackgroundWorker, prefetch
+from embedding_cache import EmbeddingCache
+from notion_properties import property_values
+from text_chunking import CHUNK_CHARS, CHUNK_OVERLAP_CHARS, chunk_page_text
+from token_batching import encode_in_batches, token_lengths
+from page_store import DATA_DIR, PageReader, PageStore, get_page_hashes, resolve_pages_path, stable_hash
+
 # 환경 변수 로드
 load_dotenv()
 
 # 경로 설정
-DATA_DIR = Path(__file__).parent.parent / "data"
-PAGES_FILE = DATA_DIR / "pages.json"
+PAGES_FILE = resolve_pages_path(DATA_DIR)
 
 # Qdrant 설정
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "localhost")
@@ -30,30 +52,52 @@ COLLECTION_NAME = os.environ.get("QDRANT_COLLECTION", "notion_pages")
 VECTOR_DIM = int(os.environ.get("VECTOR_DIM", 1024))  # BGE-M3 dense 벡터 차원
 
 # 배치 설정
-BATCH_SIZE = 4  # CPU에서 안정적인 크기
-MAX_TEXT_LENGTH = 2048  # 속도를 위해 제한 (원본 8192)
-UPSERT_BATCH_SIZE = 10  # Qdrant 업서트 빈도
+EMBED_WINDOW = int(os.environ.get("EMBED_WINDOW", 64))  # 길이순으로 다시 묶을 페이지 수 (배치 크기는 토큰 예산으로 결정)
+MAX_TEXT_LENGTH = 2048  # 청크 하나의 최대 토큰 수 (청크는 CHUNK_CHARS 글자로 나뉘므로 보통 잘리지 않음)
+UPSERT_BATCH_SIZE = 10  # Qdrant 업서트 빈도 (청크 포인트 수)
+EMBED_QUEUE_SIZE = int(os.environ.get("EMBED_QUEUE_SIZE", 2))  # 준비 → 인코딩 → 업서트 단계 사이 큐 크기 (EMBED_WINDOW 단위)
+
+# 임베딩 모델 / 캐시 설정 (EMBEDDING_CACHE=0이면 캐시 사용 안 함)
+MODEL_NAME = "BAAI/bge-m3"
+EMBEDDING_CACHE_ENABLED = os.environ.get("EMBEDDING_CACHE", "1") != "0"
+EMBEDDING_CACHE_FILE = DATA_DIR / "embedding_cache.sqlite"
+
+_embedding_cache = None
+
+
+def load_pages() -> PageReader:
+    """페이지 저장소 열기 (순회할 때마다 한 줄씩 스트리밍으로 읽음)"""
+    pages = PageReader(PAGES_FILE)
+    print(f"Streaming pages from {PAGES_FILE} ({len(pages)} pages)")
+    return pages
 
 
-def load_pages() -> list[dict]:
-    """pages.json 로드"""
-    print(f"Loading pages from {PAGES_FILE}...")
-    with open(PAGES_FILE, "r", encoding="utf-8") as f:
-        pages = json.load(f)
-    print(f"Loaded {len(pages)} pages")
+def load_page_subset(page_ids: list = None, since: str = None) -> list:
+    """오프셋 인덱스로 일부 페이지만 읽기 (ID 목록 또는 since 이후 수정된 페이지)"""
+    with PageStore(PAGES_FILE) as store:
+        pages = list(store.get_many(page_ids)) if page_ids else list(store.iter_since(since))
+        print(f"Loaded {len(pages)} of {len(store)} pages from {PAGES_FILE}")
     return pages
 
 
 def init_model() -> BGEM3FlagModel:
     """BGE-M3 모델 초기화"""
     print("Loading BGE-M3 model...")
-    model = BGEM3FlagModel('BAAI/bge-m3', use_fp16=True)
+    model = BGEM3FlagModel(MODEL_NAME, use_fp16=True)
     print("Model loaded successfully")
     return model
 
 
-def init_qdrant() -> QdrantClient:
-    """Qdrant 클라이언트 초기화 및 컬렉션 생성"""
+def get_embedding_cache():
+    """임베딩 캐시 (처음 사용할 때 열림, 비활성화 시 None)"""
+    global _embedding_cache
+    if _embedding_cache is None and EMBEDDING_CACHE_ENABLED:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_FILE, MODEL_NAME, MAX_TEXT_LENGTH)
+    return _embedding_cache
+
+
+def init_qdrant(recreate: bool = True) -> QdrantClient:
+    """Qdrant 클라이언트 초기화 및 컬렉션 생성 (recreate=False면 기존 컬렉션 유지)"""
     print(f"Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}...")
     client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 
@@ -61,7 +105,15 @@ def init_qdrant() -> QdrantClient:
     collections = [c.name for c in client.get_collections().collections]
 
     if COLLECTION_NAME in collections:
-        print(f"Collection '{COLLECTION_NAME}' already exists. Recreating...")
+        size = getattr(client.get_collection(COLLECTION_NAME).config.params.vectors, "size", None)
+        if not recreate and size == VECTOR_DIM:
+            print(f"Collection '{COLLECTION_NAME}' already exists. Updating changed pages only...")
+            return client
+        if not recreate:
+            # 벡터 차원이 다르면 기존 벡터를 재사용할 수 없음
+            print(f"Collection '{COLLECTION_NAME}' has {size}D vectors (expected {VECTOR_DIM}D). Recreating...")
+        else:
+            print(f"Collection '{COLLECTION_NAME}' already exists. Recreating...")
         client.delete_collection(COLLECTION_NAME)
 
     # 컬렉션 생성
@@ -79,29 +131,162 @@ def init_qdrant() -> QdrantClient:
         field_name="word_count",
         field_schema=PayloadSchemaType.INTEGER
     )
+    client.create_payload_index(
+        collection_name=COLLECTION_NAME,
+        field_name="notion_id",
+        field_schema=PayloadSchemaType.KEYWORD
+    )
+    client.create_payload_index(
+        collection_name=COLLECTION_NAME,
+        field_name="chunk_index",
+        field_schema=PayloadSchemaType.INTEGER
+    )
 
     print(f"Collection '{COLLECTION_NAME}' created with {VECTOR_DIM}D vectors")
     return client
 
 
-def prepare_text_for_embedding(page: dict) -> str:
-    """임베딩용 텍스트 준비 (제목 + 내용)"""
-    title = page.get("title", "")
-    content = page.get("content", "")
+def point_hashes(payload: dict) -> tuple:
+    """(embedding_hash, payload_hash, chunk_count) (청크 도입 전 포인트는 청크 1개)"""
+    return payload.get("embedding_hash"), payload.get("payload_hash"), payload.get("chunk_count", 1)
 
-    # 제목을 앞에 붙여서 가중치 부여
-    text = f"{title}\n\n{content}" if content else title
 
-    # 길이 제한 (대략적인 토큰 추정, 한글은 ~2 chars per token)
-    max_chars = MAX_TEXT_LENGTH * 2
-    if len(text) > max_chars:
-        text = text[:max_chars]
+def load_point_hashes(client: QdrantClient, page_ids: list = None) -> dict:
+    """컬렉션에 저장된 페이지별 (embedding_hash, payload_hash, chunk_count) (page_ids가 주어지면 해당 페이지만)
 
-    return text
+    페이지 정보는 첫 청크(chunk_index 0, 청크 도입 전 포인트는 chunk_index 없음)에서 읽는다.
+    """
+    fields = ["notion_id", "embedding_hash", "payload_hash", "chunk_count"]
+    if page_ids is not None:
+        points = client.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=[notion_id_to_uuid(page_id) for page_id in page_ids],
+            with_payload=fields,
+            with_vectors=False,
+        )
+        return {point.payload.get("notion_id"): point_hashes(point.payload) for point in points}
+
+    first_chunks = Filter(should=[
+        FieldCondition(key="chunk_index", match=MatchValue(value=0)),
+        IsEmptyCondition(is_empty=PayloadField(key="chunk_index")),
+    ])
+    hashes = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=first_chunks,
+            limit=1000,
+            offset=offset,
+            with_payload=fields,
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            hashes[payload.get("notion_id")] = point_hashes(payload)
+        if offset is None:
+            break
+    print(f"Found {len(hashes)} existing pages")
+    return hashes
+
+
+def page_filter(page_ids: list) -> Filter:
+    """페이지의 모든 청크 포인트"""
+    return Filter(must=[FieldCondition(key="notion_id", match=MatchAny(any=list(page_ids)))])
+
+
+def delete_points(client: QdrantClient, page_ids: list) -> int:
+    """페이지의 청크 포인트 모두 삭제"""
+    if not page_ids:
+        return 0
+    for start in range(0, len(page_ids), 1000):
+        client.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=FilterSelector(filter=page_filter(page_ids[start:start + 1000])),
+        )
+    return len(page_ids)
+
+
+def delete_stale_chunks(client: QdrantClient, page_id: str, chunk_count: int):
+    """다시 임베딩하면서 청크 수가 줄어든 페이지의 남은 청크 삭제"""
+    client.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=FilterSelector(filter=Filter(must=[
+            FieldCondition(key="notion_id", match=MatchValue(value=page_id)),
+            FieldCondition(key="chunk_index", range=Range(gte=chunk_count)),
+        ])),
+    )
+
+
+def embedding_hash(page: dict) -> str:
+    """임베딩 입력이 바뀌었는지 판단할 해시 (제목/본문 해시 + 텍스트 길이 제한 + 섹션 경계 + 청크 설정)"""
+    hashes = get_page_hashes(page)
+    return stable_hash([
+        hashes["title"], hashes["content"], MAX_TEXT_LENGTH,
+        page.get("headings", []), CHUNK_CHARS, CHUNK_OVERLAP_CHARS,
+    ])
+
+
+def build_payload(page: dict) -> dict:
+    """Qdrant 포인트 페이로드"""
+    payload = {
+        "notion_id": page["id"],
+        "title": page.get("title", ""),
+        "created_time": page.get("created_time", ""),
+        "last_edited_time": page.get("last_edited_time", ""),
+        "url": page.get("url", ""),
+        "word_count": page.get("word_count", 0),
+        "block_count": page.get("block_count", 0),
+        "parent_id": page.get("parent", {}).get("page_id", ""),
+        "content_preview": page.get("content", "")[:500],
+        "tags": page.get("tags", []),
+        "properties": property_values(page),
+        "content_hash": get_page_hashes(page)["content"],
+        "embedding_hash": embedding_hash(page),
+    }
+    payload["payload_hash"] = stable_hash(payload)
+    return payload
+
+
+def prepare_chunks_for_embedding(page: dict) -> list:
+    """임베딩용 청크 준비 (제목 + 섹션 구절, 본문 전체를 빠짐없이 나눔)"""
+    return chunk_page_text(page.get("title", ""), page.get("content", ""), page.get("headings"))
 
 
-def embed_batch(model: BGEM3FlagModel, texts: list[str]) -> list[list[float]]:
-    """배치 임베딩"""
+def build_chunk_payload(payload: dict, chunk: dict, chunk_index: int, chunk_count: int) -> dict:
+    """청크 포인트 페이로드 (페이지 페이로드 + 청크 위치/제목/미리보기)"""
+    return {
+        **payload,
+        "chunk_index": chunk_index,
+        "chunk_count": chunk_count,
+        "heading": chunk["heading"],
+        "chunk_preview": chunk["text"][:500],
+    }
+
+
+def embed_batch(model: BGEM3FlagModel, texts: list[str], lengths: list[int] = None) -> list[list[float]]:
+    """배치 임베딩 (캐시에 있는 텍스트는 다시 인코딩하지 않음)
+
+    캐시에 없는 텍스트는 토큰 길이가 비슷한 것끼리 토큰 예산 안에서 묶어 인코딩한다.
+    lengths(텍스트별 토큰 수)를 넘기면 배치를 나누기 위해 길이를 다시 세지 않는다.
+    (model.encode는 입력 텍스트를 받으므로 인코딩할 때 모델이 다시 토큰화한다)
+    """
+    if lengths is None:
+        lengths = token_lengths(getattr(model, "tokenizer", None), texts, MAX_TEXT_LENGTH)
+    length_of = dict(zip(texts, lengths))
+
+    def encode(missing: list) -> list:
+        missing_lengths = [length_of[text] for text in missing]
+        return encode_in_batches(missing, lambda batch: encode_texts(model, batch), missing_lengths)
+
+    cache = get_embedding_cache()
+    if cache is None:
+        return encode(texts)
+    return cache.embed(texts, encode)
+
+
+def encode_texts(model: BGEM3FlagModel, texts: list[str]) -> list[list[float]]:
+    """BGE-M3 dense 인코딩"""
     result = model.encode(
         texts,
         batch_size=len(texts),
@@ -114,98 +299,224 @@ def embed_batch(model: BGEM3FlagModel, texts: list[str]) -> list[list[float]]:
 
 
 def notion_id_to_uuid(notion_id: str) -> str:
-    """Notion ID를 Qdrant용 UUID로 변환"""
+    """Notion ID를 Qdrant용 UUID로 변환 (페이지 첫 청크의 포인트 ID)"""
     clean_id = notion_id.replace("-", "")
     return str(uuid.UUID(clean_id))
 
 
+def chunk_point_id(notion_id: str, chunk_index: int) -> str:
+    """청크 포인트 ID (첫 청크는 페이지 UUID 그대로, 나머지는 페이지 UUID 기준 uuid5)"""
+    page_uuid = notion_id_to_uuid(notion_id)
+    if chunk_index == 0:
+        return page_uuid
+    return str(uuid.uuid5(uuid.UUID(page_uuid), str(chunk_index)))
+
+
+def iter_batches(pages, stats: dict, skip=None, empty_ids: list = None, window: int = EMBED_WINDOW):
+    """콘텐츠가 있는 (페이지, 청크 목록)을 window페이지씩 묶어서 yield (빈 페이지와 skip(page)가 참인 페이지는 건너뜀)
+
+    empty_ids가 주어지면 건너뛴 빈 페이지의 ID를 기록한다.
+    """
+    batch = []
+    for page in pages:
+        stats["total"] += 1
+        if skip is not None and skip(page):
+            continue
+        chunks = prepare_chunks_for_embedding(page)
+        if not chunks:
+            stats["skipped_empty"] += 1
+            if empty_ids is not None:
+                empty_ids.append(page["id"])
+            continue
+
+        batch.append((page, chunks))
+        if len(batch) == window:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
 def process_pages(
-    pages: list[dict],
+    pages,
     model: BGEM3FlagModel,
-    client: QdrantClient
+    client: QdrantClient,
+    existing: dict = None,
+    quiet: bool = False,
+    window: int = EMBED_WINDOW,
 ) -> dict:
-    """페이지 임베딩 및 Qdrant 저장"""
+    """페이지 임베딩 및 Qdrant 저장 (페이지를 스트리밍으로 읽으며 배치 처리)
+
+    existing(load_point_hashes 결과)이 주어지면 제목/본문이 그대로인 페이지는
+    다시 임베딩하지 않고, 태그 등 페이로드만 바뀐 경우 모든 청크의 페이로드만 갱신한다.
+    페이지는 window개씩 모은 뒤 청크로 나누고, 청크를 토큰 길이별로 다시 묶어 인코딩한다.
+
+    세 단계가 크기가 제한된 큐(EMBED_QUEUE_SIZE)로 연결되어 동시에 실행되므로
+    Qdrant 왕복 중에도 모델은 계속 인코딩한다.
+    1. 준비 (백그라운드): 페이지 읽기, 변경 확인, 청크 나누기, 배치 구성용 토큰 수 계산
+    2. 인코딩 (호출 스레드): 캐시 조회 후 나머지를 BGE-M3로 인코딩 (토큰화 포함)
+    3. 업서트 (백그라운드): 페이로드만 바뀐 페이지의 set_payload, 청크별 PointStruct 생성,
+       UPSERT_BATCH_SIZE개마다 업서트, 청크 수가 줄어든 페이지의 남은 청크 삭제
+    Qdrant 호출은 모두 업서트 단계에서만 한다.
+    """
 
     stats = {
-        "total": len(pages),
+        "total": 0,
         "processed": 0,
+        "chunks": 0,
         "skipped_empty": 0,
+        "unchanged": 0,
+        "payload_updated": 0,
         "errors": 0
     }
-
-    # 콘텐츠가 있는 페이지만 필터링
-    valid_pages = []
-    for page in pages:
-        text = prepare_text_for_embedding(page)
-        if text.strip():
-            valid_pages.append((page, text))
+    # 단계별로 따로 세고 끝난 뒤 합침 (스레드 간에 같은 카운터를 갱신하지 않도록)
+    prepare_stats = {"total": 0, "skipped_empty": 0, "unchanged": 0}
+    encode_errors = 0
+    upsert_stats = {"processed": 0, "chunks": 0, "payload_updated": 0, "errors": 0}
+    # 페이로드만 바뀐 (페이지 ID, 페이로드): 준비 단계에서 모으고 업서트 단계에서 반영
+    payload_updates = []
+
+    def is_unchanged(page: dict) -> bool:
+        previous = existing.get(page["id"])
+        if previous is None:
+            return False
+        payload = build_payload(page)
+        if previous[0] != payload["embedding_hash"]:
+            return False
+        if previous[1] == payload["payload_hash"]:
+            prepare_stats["unchanged"] += 1
         else:
-            stats["skipped_empty"] += 1
-
-    print(f"\nProcessing {len(valid_pages)} pages with content...")
-    print(f"Skipped {stats['skipped_empty']} empty pages")
+            payload_updates.append((page["id"], payload))
+        return True
+
+    if not quiet:
+        print(f"\nProcessing {len(pages)} pages...")
+
+    skip = is_unchanged if existing is not None else None
+    empty_ids = []
+    # 같은 토크나이저를 두 스레드에서 쓰면 "Already borrowed" 오류가 나므로 준비 단계는 사본 사용
+    tokenizer = copy.deepcopy(getattr(model, "tokenizer", None))
+
+    def take_payload_updates() -> list:
+        updates = payload_updates[:]
+        payload_updates.clear()
+        return updates
+
+    def prepare():
+        for batch in iter_batches(pages, prepare_stats, skip, empty_ids, window):
+            texts = [chunk["text"] for _, chunks in batch for chunk in chunks]
+            yield batch, texts, token_lengths(tokenizer, texts, MAX_TEXT_LENGTH), take_payload_updates()
+        # 마지막 배치 이후 (또는 임베딩할 페이지가 없을 때) 남은 페이로드 갱신
+        if payload_updates:
+            yield [], [], [], take_payload_updates()
 
-    # 배치 처리
     points = []
 
-    for i in tqdm(range(0, len(valid_pages), BATCH_SIZE), desc="Embedding"):
-        batch = valid_pages[i:i + BATCH_SIZE]
-        batch_pages = [p[0] for p in batch]
-        batch_texts = [p[1] for p in batch]
-
+    def upsert(points: list):
         try:
-            # 임베딩 생성
-            vectors = embed_batch(model, batch_texts)
-
-            # 포인트 생성
-            for page, vector in zip(batch_pages, vectors):
-                point = PointStruct(
-                    id=notion_id_to_uuid(page["id"]),
-                    vector=vector,
-                    payload={
-                        "notion_id": page["id"],
-                        "title": page.get("title", ""),
-                        "created_time": page.get("created_time", ""),
-                        "last_edited_time": page.get("last_edited_time", ""),
-                        "url": page.get("url", ""),
-                        "word_count": page.get("word_count", 0),
-                        "block_count": page.get("block_count", 0),
-                        "parent_id": page.get("parent", {}).get("page_id", ""),
-                        "content_preview": page.get("content", "")[:500],
-                        "tags": page.get("tags", [])
-                    }
-                )
-                points.append(point)
-                stats["processed"] += 1
+            client.upsert(collection_name=COLLECTION_NAME, points=points)
+        except Exception as e:
+            print(f"\nQdrant upsert error: {e}")
+            time.sleep(2)
+            try:
+                client.upsert(collection_name=COLLECTION_NAME, points=points)
+            except Exception:
+                upsert_stats["errors"] += len({point.payload["notion_id"] for point in points})
 
+    def update_payload(page_id: str, payload: dict):
+        try:
+            # 청크 위치/미리보기 필드는 그대로 두고 페이지 필드만 덮어씀
+            client.set_payload(
+                collection_name=COLLECTION_NAME,
+                payload=payload,
+                points=page_filter([page_id]),
+            )
+            upsert_stats["payload_updated"] += 1
         except Exception as e:
-            print(f"\nError processing batch: {e}")
-            stats["errors"] += BATCH_SIZE
-            continue
+            print(f"\nQdrant payload update error: {e}")
+            upsert_stats["errors"] += 1
+
+    def build_points(item: tuple):
+        batch, vectors, updates = item
+        for page_id, payload in updates:
+            update_payload(page_id, payload)
+        vectors = iter(vectors)
+        for page, chunks in batch:
+            payload = build_payload(page)
+            for chunk_index, chunk in enumerate(chunks):
+                points.append(PointStruct(
+                    id=chunk_point_id(page["id"], chunk_index),
+                    vector=next(vectors),
+                    payload=build_chunk_payload(payload, chunk, chunk_index, len(chunks))
+                ))
+            upsert_stats["processed"] += 1
+            upsert_stats["chunks"] += len(chunks)
+
+            previous = existing.get(page["id"]) if existing is not None else None
+            if previous is not None and previous[2] > len(chunks):
+                delete_stale_chunks(client, page["id"], len(chunks))
 
         # UPSERT_BATCH_SIZE개마다 Qdrant에 업서트
         if len(points) >= UPSERT_BATCH_SIZE:
+            upsert(points[:])
+            points.clear()
+
+    writer = BackgroundWorker(build_points, EMBED_QUEUE_SIZE, name="qdrant-upsert")
+    batches = prefetch(prepare(), EMBED_QUEUE_SIZE, name="prepare-texts")
+    try:
+        for batch, texts, lengths, updates in (batches if quiet else tqdm(batches, desc="Embedding")):
             try:
-                client.upsert(collection_name=COLLECTION_NAME, points=points)
-                points = []
+                vectors = embed_batch(model, texts, lengths) if texts else []
             except Exception as e:
-                print(f"\nQdrant upsert error: {e}")
-                import time
-                time.sleep(2)
-                try:
-                    client.upsert(collection_name=COLLECTION_NAME, points=points)
-                    points = []
-                except:
-                    stats["errors"] += len(points)
-                    points = []
+                print(f"\nError processing batch: {e}")
+                encode_errors += len(batch)
+                batch, vectors = [], []
+            # 페이로드 갱신은 인코딩 실패와 관계없이 업서트 단계에서 반영
+            writer.put((batch, vectors, updates))
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        batches.close()
 
     # 남은 포인트 업서트
     if points:
-        client.upsert(collection_name=COLLECTION_NAME, points=points)
+        upsert(points)
+
+    stats.update(prepare_stats)
+    stats["processed"] = upsert_stats["processed"]
+    stats["chunks"] = upsert_stats["chunks"]
+    stats["payload_updated"] = upsert_stats["payload_updated"]
+    stats["errors"] = encode_errors + upsert_stats["errors"]
+
+    # 내용이 모두 지워진 페이지는 이전 벡터가 남지 않도록 포인트 삭제
+    if existing is not None:
+        delete_points(client, [page_id for page_id in empty_ids if page_id in existing])
+
+    cache = get_embedding_cache()
+    if cache is not None:
+        cache.evict()
+        stats["embedding_cache"] = cache.report()
 
     return stats
 
 
+def search_pages(client: QdrantClient, query_vector: list, limit: int = 10, query_filter: Filter = None) -> list:
+    """페이지 단위 검색: notion_id로 묶어 페이지마다 점수가 가장 높은 청크 하나 (점수 내림차순)"""
+    results = client.query_points_groups(
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        group_by="notion_id",
+        group_size=1,
+        limit=limit,
+        query_filter=query_filter,
+        with_payload=True,
+    )
+    return [group.hits[0] for group in results.groups]
+
+
 def test_semantic_search(client: QdrantClient, model: BGEM3FlagModel):
     """의미 검색 테스트"""
     print("\n" + "="*60)
@@ -231,40 +542,69 @@ def test_semantic_search(client: QdrantClient, model: BGEM3FlagModel):
             return_colbert_vecs=False
         )['dense_vecs'][0].tolist()
 
-        # 검색
-        results = client.query_points(
-            collection_name=COLLECTION_NAME,
-            query=query_vector,
-            limit=3,
-            with_payload=True
-        )
-
-        for i, hit in enumerate(results.points, 1):
+        # 검색 (페이지별로 가장 가까운 청크 하나)
+        for i, hit in enumerate(search_pages(client, query_vector, limit=3), 1):
             title = hit.payload.get("title", "Untitled")
             score = hit.score
-            preview = hit.payload.get("content_preview", "")[:100]
-            print(f"  {i}. [{score:.3f}] {title}")
+            heading = hit.payload.get("heading", "")
+            preview = hit.payload.get("chunk_preview", hit.payload.get("content_preview", ""))[:100]
+            print(f"  {i}. [{score:.3f}] {title}" + (f" › {heading}" if heading else ""))
             print(f"     {preview}...")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Notion 페이지 벡터 임베딩")
+    parser.add_argument(
+        "--recreate", action="store_true",
+        help="컬렉션을 지우고 모든 페이지를 다시 임베딩 (기본은 바뀐 페이지만 갱신)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="바뀐 페이지만 다시 임베딩 (기본 동작, 이전 버전 호환용)",
+    )
+    parser.add_argument(
+        "--page-id", action="append", dest="page_ids",
+        help="지정한 페이지만 다시 임베딩 (여러 번 지정 가능)",
+    )
+    parser.add_argument(
+        "--since",
+        help="이 시각(ISO 8601) 이후 수정된 페이지만 다시 임베딩",
+    )
+    args = parser.parse_args()
+    if args.recreate and (args.incremental or args.page_ids or args.since):
+        parser.error("--recreate cannot be combined with --incremental, --page-id or --since")
+    return args
+
+
 def main():
+    args = parse_args()
     start_time = datetime.now()
     print(f"Starting vector embedding at {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*60)
 
-    # 1. 데이터 로드
-    pages = load_pages()
+    # 1. 데이터 로드 (일부 페이지만 지정하면 전체 파일을 읽지 않고 인덱스로 조회)
+    subset = bool(args.page_ids or args.since)
+    pages = load_page_subset(args.page_ids, args.since) if subset else load_pages()
 
     # 2. 모델 초기화
     model = init_model()
 
-    # 3. Qdrant 초기화
-    client = init_qdrant()
+    # 3. Qdrant 초기화 (기존 컬렉션의 페이지별 해시와 비교해 바뀐 페이지만 갱신)
+    client = init_qdrant(recreate=args.recreate)
+    existing = None
+    if not args.recreate:
+        existing = load_point_hashes(client, [page["id"] for page in pages] if subset else None)
 
     # 4. 임베딩 및 저장
-    stats = process_pages(pages, model, client)
+    stats = process_pages(pages, model, client, existing)
+
+    # 5. 페이지 저장소에 더 이상 없는 페이지의 포인트 삭제
+    deleted = 0
+    if existing is not None and not subset:
+        with PageStore(PAGES_FILE) as store:
+            deleted = delete_points(client, [page_id for page_id in existing if page_id not in store])
 
-    # 5. 결과 출력
+    # 6. 결과 출력
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
 
@@ -272,18 +612,26 @@ def main():
     print("Embedding Complete!")
     print("="*60)
     print(f"Total pages: {stats['total']}")
-    print(f"Processed: {stats['processed']}")
+    print(f"Processed: {stats['processed']} ({stats['chunks']} chunks)")
     print(f"Skipped (empty): {stats['skipped_empty']}")
+    if existing is not None:
+        print(f"Unchanged: {stats['unchanged']}")
+        print(f"Payload only updated: {stats['payload_updated']}")
+        print(f"Deleted (removed pages): {deleted}")
     print(f"Errors: {stats['errors']}")
+    if "embedding_cache" in stats:
+        cache_stats = stats["embedding_cache"]
+        print(f"Embedding cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+              f"(hit rate {cache_stats['hit_rate']:.1%}, {cache_stats['size_bytes'] / 1024 / 1024:.1f}MB)")
     print(f"Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
 
-    # 6. 컬렉션 정보 확인
+    # 7. 컬렉션 정보 확인
     collection_info = client.get_collection(COLLECTION_NAME)
     print(f"\nQdrant Collection Info:")
     print(f"  Points count: {collection_info.points_count}")
     print(f"  Vector size: {collection_info.config.params.vectors.size}")
 
-    # 7. 의미 검색 테스트
+    # 8. 의미 검색 테스트
     test_semantic_search(client, model)
 
     print("\n✅ Vector embedding complete!")
@@ -0,0 +1,79 @@
+"""테스트 공용 설정: scripts/ 모듈을 import할 수 있도록 경로 추가, 가짜 Notion 서버 export 헬퍼"""
+
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_DIR / "scripts"
+EXPORTER = SCRIPTS_DIR / "notion_exporter.py"
+
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+# notion_exporter / snapshots가 import 시 만드는 data 디렉토리가 저장소에 생기지 않도록
+if "NOTION_EXPORT_DIR" not in os.environ:
+    os.environ["NOTION_EXPORT_DIR"] = tempfile.mkdtemp(prefix="notion_test_data_")
+    atexit.register(shutil.rmtree, os.environ["NOTION_EXPORT_DIR"], ignore_errors=True)
+
+from fake_notion import FakeNotionServer, generate_workspace  # noqa: E402
+from page_store import iter_pages, resolve_pages_path  # noqa: E402
+from serialization import load_json, resolve_artifact  # noqa: E402
+
+
+class FakeNotionTestCase(unittest.TestCase):
+    """가짜 Notion 서버를 띄우고 notion_exporter.py를 하위 프로세스로 실행하는 테스트 기반 클래스"""
+
+    workspace_args = {"pages": 8, "blocks_per_page": 6, "databases": 2, "items_per_db": 6, "seed": 3}
+
+    def setUp(self):
+        self.server = FakeNotionServer(("127.0.0.1", 0), workspace=generate_workspace(**self.workspace_args))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory(prefix="notion_export_test_")
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def run_python(self, data_dir: Path, args: list, env: dict = None, check: bool = True):
+        """가짜 서버와 data_dir을 쓰도록 환경 변수를 맞춰 scripts/에서 파이썬 하위 프로세스 실행"""
+        env = {
+            **os.environ,
+            "NOTION_TOKEN": "fake-test-token",
+            "NOTION_BASE_URL": self.server.base_url,
+            "NOTION_EXPORT_DIR": str(data_dir),
+            "NOTION_RATE_LIMIT": "1000",
+            **(env or {}),
+        }
+        result = subprocess.run(
+            [sys.executable, *args], cwd=SCRIPTS_DIR,
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        if check:
+            self.assertEqual(result.returncode, 0, result.stdout)
+        return result
+
+    def run_exporter_code(self, data_dir: Path, code: str, env: dict = None):
+        """NotionExporter를 직접 다루는 코드를 실행하고 마지막 줄에 출력한 JSON 반환"""
+        result = self.run_python(data_dir, ["-c", code], env)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def export(self, data_dir: Path, *args, env: dict = None) -> dict:
+        """export 실행 후 이번 실행의 export_stats 반환"""
+        self.run_python(data_dir, [str(EXPORTER), *args], env)
+        stats_files = sorted(Path(data_dir).glob("export_stats_*.json"), key=lambda path: path.stat().st_mtime)
+        return load_json(stats_files[-1])
+
+    def outputs(self, data_dir: Path) -> tuple:
+        """(ID별 페이지 레코드, databases.json)"""
+        pages = {page["id"]: page for page in iter_pages(resolve_pages_path(data_dir))}
+        return pages, load_json(resolve_artifact(data_dir, "databases.json"))
@@ -0,0 +1,93 @@
+"""background: prefetch / BackgroundWorker의 순서 유지, 예외 전달, 중단"""
+
+import threading
+import time
+import unittest
+
+import support  # noqa: F401
+
+from background import BackgroundWorker, prefetch
+
+
+class PrefetchTest(unittest.TestCase):
+    def test_items_in_order_on_background_thread(self):
+        threads = set()
+
+        def produce():
+            for number in range(20):
+                threads.add(threading.current_thread().name)
+                yield number
+
+        self.assertEqual(list(prefetch(produce(), maxsize=3, name="test-prefetch")), list(range(20)))
+        self.assertEqual(threads, {"test-prefetch"})
+
+    def test_producer_error_reaches_consumer(self):
+        def produce():
+            yield 1
+            raise ValueError("boom")
+
+        items = prefetch(produce())
+        self.assertEqual(next(items), 1)
+        with self.assertRaisesRegex(ValueError, "boom"):
+            next(items)
+
+    def test_closing_consumer_stops_producer(self):
+        produced = []
+
+        def produce():
+            for number in range(1000):
+                produced.append(number)
+                yield number
+
+        items = prefetch(produce(), maxsize=2)
+        self.assertEqual(next(items), 0)
+        items.close()
+        time.sleep(1)  # 생산 스레드가 멈춤을 확인하는 주기(0.5초)보다 길게
+        count = len(produced)
+        time.sleep(0.6)
+        self.assertEqual(len(produced), count)
+        self.assertLess(count, 10)
+
+
+class BackgroundWorkerTest(unittest.TestCase):
+    def test_close_waits_for_all_items(self):
+        handled = []
+        worker = BackgroundWorker(lambda item: handled.append((item, threading.current_thread().name)), name="test-worker")
+        for number in range(20):
+            worker.put(number)
+        worker.close()
+        self.assertEqual(handled, [(number, "test-worker") for number in range(20)])
+
+    def test_handler_error_reaches_producer(self):
+        def handle(item):
+            if item == 3:
+                raise ValueError("boom")
+
+        worker = BackgroundWorker(handle, maxsize=1)
+        with self.assertRaisesRegex(ValueError, "boom"):
+            for number in range(100):
+                worker.put(number)
+            worker.close()
+        self.assertIsInstance(worker.error, ValueError)
+
+    def test_abort_drops_pending_items(self):
+        started, release = threading.Event(), threading.Event()
+        handled = []
+
+        def handle(item):
+            started.set()
+            release.wait()
+            handled.append(item)
+
+        worker = BackgroundWorker(handle, maxsize=5)
+        for number in range(6):
+            worker.put(number)
+        started.wait()
+        threading.Timer(0.1, release.set).start()
+        worker.abort()
+        # 처리 중이던 첫 항목만 끝내고 큐에 남은 항목은 버림
+        self.assertEqual(handled, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""block_cache: 페이지 블록 캐시 적중, 동기화 블록 원본 변경 반영, 용량 초과 시 제거"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import FakeNotionTestCase
+
+from block_cache import BlockCache
+from fake_notion import notion_now, paragraph_block
+
+
+def synced_block(block_id: str, source_id: str = None) -> dict:
+    return {
+        "object": "block", "id": block_id, "type": "synced_block", "has_children": True,
+        "synced_block": {"synced_from": {"type": "block_id", "block_id": source_id} if source_id else None},
+    }
+
+
+class SyncedBlockCacheTest(FakeNotionTestCase):
+    workspace_args = {"pages": 4, "blocks_per_page": 4, "databases": 0, "items_per_db": 0, "seed": 5}
+
+    def setUp(self):
+        super().setUp()
+        ws = self.server.workspace
+        self.source_page, self.reference_page = ws["pages"][0], ws["pages"][1]
+        ws["children"]["synced-source"] = [paragraph_block("original synced text")]
+        ws["children"][self.source_page["id"]].append(synced_block("synced-source"))
+        ws["children"][self.reference_page["id"]].append(synced_block("synced-reference", "synced-source"))
+
+    def check_mode(self, *args):
+        data_dir = self.root / ("data" + "".join(args))
+        self.export(data_dir, *args)
+
+        # 원본만 수정: 원본 페이지의 last_edited_time만 바뀌고 참조하는 페이지는 그대로
+        ws = self.server.workspace
+        ws["children"]["synced-source"] = [paragraph_block("updated synced text")]
+        self.source_page["last_edited_time"] = notion_now()
+
+        stats = self.export(data_dir, *args)
+        pages, _ = self.outputs(data_dir)
+        for page in (self.source_page, self.reference_page):
+            self.assertIn("updated synced text", pages[page["id"]]["content"])
+        # 나머지 두 페이지는 캐시에서, 수정된 원본 페이지와 참조 페이지는 API로
+        self.assertEqual(stats["block_cache"]["hits"], 2)
+        self.assertEqual(stats["block_cache"]["misses"], 2)
+
+    def test_sync_export_refreshes_synced_reference(self):
+        self.check_mode()
+
+    def test_async_export_refreshes_synced_reference(self):
+        self.check_mode("--async")
+
+
+class BlockCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BlockCache(Path(self.tmp.name) / "block_cache.sqlite")
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_get_put_and_shared_blobs(self):
+        blocks = [paragraph_block("same")]
+        self.assertIsNone(self.cache.get("a", "t1"))
+        self.cache.put("a", "t1", blocks)
+        self.cache.put("b", "t1", blocks)
+        self.assertEqual(self.cache.get("a", "t1"), blocks)
+        self.assertIsNone(self.cache.get("a", "t2"))
+        # 같은 내용은 블롭 하나만 저장
+        self.assertEqual(self.cache.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 1)
+        self.assertEqual(self.cache.report()["hit_rate"], 0.3333)
+
+    def test_evict_drops_old_versions_first(self):
+        for version in ("t1", "t2"):
+            self.cache.put("a", version, [paragraph_block(f"a {version} " * 200)])
+        self.cache.put("b", "t1", [paragraph_block("b " * 200)])
+        self.cache.max_bytes = self.cache.size_bytes() - 1
+
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get("a", "t1"))
+        self.assertIsNotNone(self.cache.get("a", "t2"))
+        self.assertIsNotNone(self.cache.get("b", "t1"))
+
+        # 그다음은 오래 사용되지 않은 최신 버전부터
+        self.cache.conn.execute("UPDATE versions SET accessed_at = 0 WHERE page_id = 'b'")
+        self.cache.max_bytes = self.cache.size_bytes() - 1
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get("b", "t1"))
+        self.assertIsNotNone(self.cache.get("a", "t2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""embedding_cache: 캐시 적중, 배치 내 중복 제거, 용량 초과 시 LRU 제거"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import support  # noqa: F401
+
+from embedding_cache import EmbeddingCache
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts: list) -> list:
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5, 0.25] for text in texts]
+
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "cache.sqlite"
+        self.cache = EmbeddingCache(self.path, "model", 512)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_second_lookup_hits_cache(self):
+        encode = FakeEncoder()
+        first = self.cache.embed(["alpha", "beta"], encode)
+        second = self.cache.embed(["beta", "alpha"], encode)
+        self.assertEqual(encode.calls, [["alpha", "beta"]])
+        self.assertEqual(second, [first[1], first[0]])
+        self.assertEqual(self.cache.report()["hit_rate"], 0.5)
+
+    def test_duplicates_and_whitespace_encode_once(self):
+        encode = FakeEncoder()
+        vectors = self.cache.embed(["same text", "same  text", "same\ntext"], encode)
+        self.assertEqual(encode.calls, [["same text"]])
+        self.assertEqual(vectors[0], vectors[2])
+
+    def test_key_depends_on_model_and_max_length(self):
+        other = EmbeddingCache(self.path, "model", 1024)
+        try:
+            self.assertNotEqual(self.cache.key("text"), other.key("text"))
+        finally:
+            other.close()
+
+    def test_evict_removes_least_recently_used(self):
+        encode = FakeEncoder()
+        self.cache.embed(["old", "new"], encode)
+        with self.cache.conn:
+            self.cache.conn.execute("UPDATE embeddings SET accessed_at = 0 WHERE key = ?", (self.cache.key("old"),))
+        # 벡터 하나(float16 4차원 = 8바이트)만 남도록 상한 설정
+        self.cache.max_bytes = 8
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(set(self.cache.get_many([self.cache.key("old"), self.cache.key("new")])),
+                         {self.cache.key("new")})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""가짜 Notion 서버에서 증분 export: 워터마크 이후 수정된 페이지만 가져오고 결과는 전체 export와 같음"""
+
+import unittest
+
+from support import FakeNotionTestCase
+
+from serialization import load_json
+
+
+class IncrementalExportTest(FakeNotionTestCase):
+    def check_mode(self, *args):
+        incremental_dir = self.root / ("incremental" + "".join(args))
+        full_dir = self.root / ("full" + "".join(args))
+        self.export(incremental_dir, "--no-cache", *args)
+
+        # 데이터베이스 아이템 하나만 수정
+        item_id = next(iter(self.server.workspace["items"].values()))[0]["id"]
+        self.server.edit_page(item_id, "edited item text")
+
+        stats = self.export(incremental_dir, "--no-cache", "--incremental", *args)
+        self.assertEqual(stats["mode"], "incremental")
+        # 모든 아이템이 페이지로 export되어 있으므로 아이템 블록을 다시 가져오지 않음
+        self.assertEqual(stats["db_items_with_content"], 0)
+
+        self.export(full_dir, "--no-cache", *args)
+        incremental_pages, incremental_dbs = self.outputs(incremental_dir)
+        full_pages, full_dbs = self.outputs(full_dir)
+        self.assertEqual(incremental_pages, full_pages)
+        self.assertEqual(incremental_dbs, full_dbs)
+        self.assertIn("edited item text", incremental_pages[item_id]["content"])
+
+    def test_incremental_fetches_pages_after_watermark(self):
+        data_dir = self.root / "data"
+        self.export(data_dir, "--no-cache")
+        pages, _ = self.outputs(data_dir)
+        watermark = load_json(data_dir / "export_state.json")["last_edited_time"]
+        self.assertEqual(watermark, max(page["last_edited_time"] for page in pages.values()))
+
+        edited = self.server.edit_page(self.server.workspace["pages"][3]["id"], "edited after watermark")
+        added = self.server.add_page("New page", "added after watermark")
+        stats = self.export(data_dir, "--no-cache", "--incremental")
+        self.assertEqual(stats["since"], watermark)
+        # 워터마크와 같은 시각의 페이지는 다시 가져옴 (last_edited_time이 분 단위)
+        fetched = {page_id for page_id, page in pages.items() if page["last_edited_time"] >= watermark}
+        self.assertEqual(stats["pages_changed"], len(fetched | {edited, added}))
+
+        pages_after, _ = self.outputs(data_dir)
+        self.assertEqual(set(pages_after), set(pages) | {added})
+        self.assertIn("edited after watermark", pages_after[edited]["content"])
+        self.assertIn("added after watermark", pages_after[added]["content"])
+        self.assertGreater(load_json(data_dir / "export_state.json")["last_edited_time"], watermark)
+
+    def test_sync_incremental_matches_full(self):
+        self.check_mode()
+
+    def test_async_incremental_matches_full(self):
+        self.check_mode("--async")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""fake_notion / benchmark_exporter: 합성 워크스페이스, 녹화 후 재생, 오프라인 벤치마크"""
+
+import threading
+import unittest
+
+from support import SCRIPTS_DIR, FakeNotionTestCase
+
+from fake_notion import FakeNotionServer, generate_workspace
+from serialization import load_json
+
+
+class GenerateWorkspaceTest(unittest.TestCase):
+    def test_same_seed_same_workspace(self):
+        args = {"pages": 5, "blocks_per_page": 4, "databases": 1, "items_per_db": 3}
+        workspace = generate_workspace(seed=1, **args)
+        self.assertEqual(workspace, generate_workspace(seed=1, **args))
+        self.assertNotEqual(workspace, generate_workspace(seed=2, **args))
+        # 데이터베이스 아이템도 search 결과(pages)에 포함
+        self.assertEqual(len(workspace["pages"]), 5 + 3)
+        self.assertEqual({page["id"] for page in workspace["pages"]} - set(workspace["children"]), set())
+
+
+class RecordReplayTest(FakeNotionTestCase):
+    def start_server(self, **kwargs) -> FakeNotionServer:
+        server = FakeNotionServer(("127.0.0.1", 0), **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_replayed_export_matches_recording(self):
+        recording = self.root / "recording.jsonl"
+        recorder = self.start_server(record=str(recording), upstream=self.server.base_url)
+        self.export(self.root / "recorded", "--no-cache", env={"NOTION_BASE_URL": recorder.base_url})
+        recorder.record_file.close()
+        self.assertEqual(recorder.stats["requests"], self.server.stats["requests"])
+
+        replay = self.start_server(replay=str(recording))
+        stats = self.export(self.root / "replayed", "--no-cache", env={"NOTION_BASE_URL": replay.base_url})
+        self.assertEqual(stats["errors"], [])
+        self.assertEqual(self.outputs(self.root / "replayed"), self.outputs(self.root / "recorded"))
+
+
+class BenchmarkTest(FakeNotionTestCase):
+    def test_benchmark_compares_modes(self):
+        output = self.root / "benchmark.json"
+        self.run_python(self.root, [
+            str(SCRIPTS_DIR / "benchmark_exporter.py"), "--modes", "sync,async,cached", "--output", str(output),
+            "--pages", "4", "--blocks-per-page", "3", "--databases", "1", "--items-per-db", "2",
+        ])
+        results = {result["mode"]: result for result in load_json(output)["results"]}
+        self.assertEqual(set(results), {"sync", "async", "cached"})
+        for result in results.values():
+            self.assertEqual(result["pages"], 6)
+            self.assertEqual(result["errors"], 0)
+            self.assertEqual(result["api_calls"], result["server_requests"])
+        self.assertEqual(results["sync"]["endpoints"], results["async"]["endpoints"])
+        # 블록 캐시가 채워진 상태에서는 블록을 다시 요청하지 않음
+        self.assertNotIn("blocks.children.list", results["cached"]["endpoints"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+"""notion_exporter: 가짜 Notion 서버에서 크롤링 모드별 결과, 블록 처리, 통계 확인"""
+
+import os
+import unittest
+from collections import Counter
+from unittest import mock
+
+from support import FakeNotionTestCase
+
+import notion_exporter
+from fake_notion import paragraph_block, text_item
+from notion_exporter import extract_block_content, partition_pages
+from page_store import iter_pages, resolve_pages_path
+from serialization import load_json
+
+with mock.patch.dict(os.environ, {"NEO4J_PASSWORD": os.environ.get("NEO4J_PASSWORD", "test")}):
+    from graph_builder import collect_parents, resolve_parent_id
+
+
+def mention(page_id: str) -> dict:
+    return {"type": "mention", "plain_text": "@page", "mention": {"type": "page", "page": {"id": page_id}}}
+
+
+class ExtractBlockContentTest(unittest.TestCase):
+    def test_renders_text_links_and_counts_in_one_pass(self):
+        blocks = [
+            {"id": "b1", "type": "heading_1", "heading_1": {"rich_text": [text_item("제목")]}},
+            {"id": "b2", "type": "paragraph", "paragraph": {"rich_text": [text_item("본문 "), mention("page-a")]}},
+            {"id": "b3", "type": "code", "code": {"rich_text": [text_item("print(1)")]}},
+            {"id": "b4", "type": "table_row", "table_row": {"cells": [[text_item("a")], [mention("page-b")]]}},
+            {"id": "b5", "type": "image", "image": {"caption": [text_item("그림 설명")]}},
+            {"id": "b6", "type": "equation", "equation": {"expression": "e=mc^2"}},
+            {"id": "b7", "type": "link_to_page", "link_to_page": {"type": "page_id", "page_id": "page-c"}},
+            {"id": "b8", "type": "divider", "divider": {}},
+        ]
+        block_types = Counter()
+        data = extract_block_content(blocks, block_types)
+
+        self.assertEqual(data["content"], "제목\n본문 @page\n```\nprint(1)\n```\na | @page\n그림 설명\ne=mc^2")
+        self.assertEqual(sorted(data["links"]), ["page-a", "page-b", "page-c"])
+        self.assertEqual(data["word_count"], len(data["content"].split()))
+        self.assertEqual(data["block_count"], 8)
+        self.assertEqual(data["headings"], [{"offset": 0, "level": 1, "text": "제목"}])
+        self.assertEqual(block_types["divider"], 1)
+        self.assertEqual(sum(block_types.values()), 8)
+
+    def test_registered_renderer_is_used(self):
+        block = {"id": "b1", "type": "breadcrumb_note", "breadcrumb_note": {"label": "사용자 정의"}}
+        self.assertEqual(extract_block_content([block])["content"], "")
+        with mock.patch.dict(notion_exporter.BLOCK_RENDERERS):
+            notion_exporter.register_block_renderer("breadcrumb_note")(lambda content: content["label"])
+            self.assertEqual(extract_block_content([block])["content"], "사용자 정의")
+        self.assertNotIn("breadcrumb_note", notion_exporter.BLOCK_RENDERERS)
+
+
+class AsyncCrawlTest(FakeNotionTestCase):
+    workspace_args = {
+        "pages": 10, "blocks_per_page": 8, "depth": 2, "fanout": 3, "nested_ratio": 0.4,
+        "databases": 1, "items_per_db": 4, "seed": 11,
+    }
+
+    def test_async_matches_sync(self):
+        self.export(self.root / "sync", "--no-cache")
+        stats = self.export(self.root / "async", "--no-cache", "--async", "--concurrency", "4")
+        self.assertEqual(stats["errors"], [])
+        self.assertEqual(self.outputs(self.root / "async"), self.outputs(self.root / "sync"))
+
+    def test_async_retries_rate_limited_requests(self):
+        # 요청의 일부(5%)를 429로 응답해도 재시도 후 같은 결과
+        self.server.error_rate = 0.05
+        self.server.retry_after = 0.01
+        stats = self.export(self.root / "async", "--no-cache", "--async")
+        self.assertEqual(stats["errors"], [])
+        self.assertGreater(stats["rate_limit"]["rate_limited"], 0)
+        self.assertGreater(self.server.stats["injected_429"], 0)
+
+        self.server.error_rate = 0
+        self.export(self.root / "sync", "--no-cache")
+        self.assertEqual(self.outputs(self.root / "async"), self.outputs(self.root / "sync"))
+
+
+class ChildPageEdgeTest(FakeNotionTestCase):
+    workspace_args = {"pages": 4, "blocks_per_page": 4, "databases": 1, "items_per_db": 2, "seed": 7}
+
+    def setUp(self):
+        super().setUp()
+        ws = self.server.workspace
+        top_pages = [page for page in ws["pages"] if page["parent"].get("type") == "workspace"]
+        self.parent, self.child = top_pages[:2]
+        self.db_id = next(iter(ws["databases"]))
+        # 토글 안의 하위 페이지 (parent가 block_id) + 본문에 바로 놓인 하위 데이터베이스
+        self.child["parent"] = {"type": "block_id", "block_id": "toggle-with-child"}
+        ws["children"][self.child["id"]].append(paragraph_block("child page only text"))
+        ws["children"]["toggle-with-child"] = [
+            {"object": "block", "id": self.child["id"], "type": "child_page", "has_children": True,
+             "child_page": {"title": "Child"}},
+        ]
+        ws["children"][self.parent["id"]] += [
+            {"object": "block", "id": "toggle-with-child", "type": "toggle", "has_children": True,
+             "toggle": {"rich_text": []}},
+            {"object": "block", "id": self.db_id, "type": "child_database", "has_children": True,
+             "child_database": {"title": "Database"}},
+        ]
+
+    def check_mode(self, *args):
+        data_dir = self.root / ("data" + "".join(args))
+        stats = self.export(data_dir, "--no-cache", *args)
+        # 하위 페이지/데이터베이스의 블록은 요청하지 않음 (데이터베이스 ID로 요청하면 404)
+        self.assertEqual(stats["errors"], [])
+        pages, _ = self.outputs(data_dir)
+        parent = pages[self.parent["id"]]
+        self.assertNotIn("child page only text", parent["content"])
+        self.assertIn("child page only text", pages[self.child["id"]]["content"])
+        self.assertEqual(parent["child_pages"], [self.child["id"]])
+        self.assertEqual(parent["child_databases"], [self.db_id])
+
+        # graph_builder는 이 목록으로 CHILD_OF 부모를 찾음
+        _, block_parents, database_parents = collect_parents(pages.values())
+        self.assertEqual(resolve_parent_id(pages[self.child["id"]], block_parents, database_parents),
+                         self.parent["id"])
+        item = next(page for page in pages.values() if page["parent"].get("database_id") == self.db_id)
+        self.assertEqual(resolve_parent_id(item, block_parents, database_parents), self.parent["id"])
+
+    def test_sync_child_blocks_are_edges(self):
+        self.check_mode()
+
+    def test_async_child_blocks_are_edges(self):
+        self.check_mode("--async")
+
+
+def synced_block(block_id: str, source_id: str = None) -> dict:
+    return {
+        "object": "block", "id": block_id, "type": "synced_block", "has_children": True,
+        "synced_block": {"synced_from": {"type": "block_id", "block_id": source_id} if source_id else None},
+    }
+
+
+class SyncedBlockMemoTest(FakeNotionTestCase):
+    workspace_args = {
+        "pages": 4, "blocks_per_page": 4, "nested_ratio": 0, "databases": 0, "items_per_db": 0, "seed": 9,
+    }
+
+    def setUp(self):
+        super().setUp()
+        ws = self.server.workspace
+        self.source_page, *self.reference_pages = ws["pages"][:3]
+        # 원본 하위 트리는 blocks.children.list 2번 (원본 + 토글)
+        ws["children"]["synced-source"] = [
+            paragraph_block("shared synced text"),
+            {"object": "block", "id": "synced-toggle", "type": "toggle", "has_children": True,
+             "toggle": {"rich_text": [text_item("toggle")]}},
+        ]
+        ws["children"]["synced-toggle"] = [paragraph_block("nested synced text")]
+        ws["children"][self.source_page["id"]].append(synced_block("synced-source"))
+        for number, page in enumerate(self.reference_pages):
+            ws["children"][page["id"]].append(synced_block(f"synced-reference-{number}", "synced-source"))
+
+    def check_mode(self, *args):
+        data_dir = self.root / ("data" + "".join(args))
+        stats = self.export(data_dir, "--no-cache", *args)
+        self.assertEqual(stats["synced_blocks"], {"resolved": 1, "memo_hits": 2, "api_calls_saved": 4})
+        pages, _ = self.outputs(data_dir)
+        for page in [self.source_page, *self.reference_pages]:
+            self.assertIn("shared synced text", pages[page["id"]]["content"])
+            self.assertIn("nested synced text", pages[page["id"]]["content"])
+        # 페이지마다 1번 + 원본 하위 트리 2번
+        self.assertEqual(self.server.stats["endpoints"]["blocks.children.list"], len(pages) + 2)
+
+    def test_sync_synced_blocks_fetched_once(self):
+        self.check_mode()
+
+    def test_async_synced_blocks_fetched_once(self):
+        self.check_mode("--async")
+
+
+INTERRUPT_CODE = """
+import notion_exporter
+
+exporter = notion_exporter.NotionExporter(use_async={use_async}, use_cache=False)
+seen = []
+
+def interrupt(page):
+    seen.append(page["id"])
+    if len(seen) == {after}:
+        raise KeyboardInterrupt
+
+exporter.sinks.append(interrupt)
+exporter.run()
+"""
+
+
+class CheckpointResumeTest(FakeNotionTestCase):
+    workspace_args = {
+        "pages": 10, "blocks_per_page": 6, "nested_ratio": 0, "databases": 1, "items_per_db": 6, "seed": 4,
+    }
+
+    def check_mode(self, *args):
+        data_dir = self.root / ("data" + "".join(args))
+        env = {"EXPORT_CHECKPOINT_INTERVAL": "3"}
+        code = INTERRUPT_CODE.format(use_async="--async" in args, after=7)
+        result = self.run_python(data_dir, ["-c", code], env, check=False)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("--resume", result.stdout)
+        checkpoint = load_json(data_dir / "export_checkpoint.json")
+        self.assertEqual(len(checkpoint["completed_ids"]), 6)
+
+        # 체크포인트 이후에 기록된 7번째 페이지는 잘라내고 다시 가져옴 (페이지당 블록 요청 1번)
+        blocks_before = self.server.stats["endpoints"]["blocks.children.list"]
+        stats = self.export(data_dir, "--no-cache", "--resume", *args, env=env)
+        resumed_calls = self.server.stats["endpoints"]["blocks.children.list"] - blocks_before
+        self.assertEqual(resumed_calls, len(self.server.workspace["pages"]) - 6)
+        self.assertEqual(stats["total_pages"], len(self.server.workspace["pages"]))
+        self.assertFalse((data_dir / "export_checkpoint.json").exists())
+
+        full_dir = self.root / ("full" + "".join(args))
+        self.export(full_dir, "--no-cache", *args)
+        self.assertEqual(self.outputs(data_dir), self.outputs(full_dir))
+
+    def test_sync_resume_matches_full(self):
+        self.check_mode()
+
+    def test_async_resume_matches_full(self):
+        self.check_mode("--async")
+
+
+def shard_page(page_id: str, parent: dict = None) -> dict:
+    return {"id": page_id, "parent": parent or {"type": "workspace", "workspace": True}}
+
+
+class ShardedExportTest(FakeNotionTestCase):
+    workspace_args = {"pages": 12, "blocks_per_page": 5, "databases": 2, "items_per_db": 5, "seed": 6}
+
+    def test_partition_keeps_subtrees_together(self):
+        pages = [
+            shard_page("child", {"type": "page_id", "page_id": "root"}),
+            shard_page("root"),
+            shard_page("grandchild", {"type": "page_id", "page_id": "child"}),
+            shard_page("item-1", {"type": "database_id", "database_id": "db"}),
+            shard_page("other"),
+            shard_page("item-2", {"type": "database_id", "database_id": "db"}),
+            shard_page("orphan", {"type": "page_id", "page_id": "not-shared"}),
+        ]
+        shards = [[page["id"] for page in shard] for shard in partition_pages(pages, 3)]
+        # 가장 큰 그룹(root 하위 3개)부터 배정, 각 샤드는 입력 순서 유지
+        self.assertEqual(shards, [["child", "root", "grandchild"], ["item-1", "item-2"], ["other", "orphan"]])
+
+    def check_mode(self, *args):
+        single_dir = self.root / ("single" + "".join(args))
+        sharded_dir = self.root / ("sharded" + "".join(args))
+        self.export(single_dir, "--no-cache", *args)
+        stats = self.export(sharded_dir, "--no-cache", "--shards", "3", *args)
+        self.assertEqual(stats["shards"], 3)
+        self.assertEqual(stats["errors"], [])
+        self.assertFalse((sharded_dir / "shards").exists())
+        self.assertEqual(self.outputs(sharded_dir), self.outputs(single_dir))
+        # 샤드 파일을 search 순서대로 병합
+        self.assertEqual([page["id"] for page in iter_pages(resolve_pages_path(sharded_dir))],
+                         [page["id"] for page in iter_pages(resolve_pages_path(single_dir))])
+
+    def test_sync_sharded_matches_single(self):
+        self.check_mode()
+
+    def test_async_sharded_matches_single(self):
+        self.check_mode("--async")
+
+
+if __name__ == "__main__":
+    unittest.main()
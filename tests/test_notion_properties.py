@@ -0,0 +1,99 @@
+"""notion_properties: API 속성 축약, 스키마 축약, Qdrant/Neo4j용 평탄화"""
+
+import unittest
+
+import support  # noqa: F401
+
+from notion_properties import graph_list, graph_properties, normalize_properties, normalize_schema, property_values
+
+
+def rich_text(text: str) -> list:
+    return [{"plain_text": text}]
+
+
+API_PROPERTIES = {
+    "Name": {"type": "title", "title": rich_text("제목")},
+    "Status": {"type": "status", "status": {"name": "진행 중"}},
+    "Tags": {"type": "multi_select", "multi_select": [{"name": "a"}, {"name": "b"}, {}]},
+    "Due": {"type": "date", "date": {"start": "2024-01-01", "end": "2024-01-03"}},
+    "Score": {"type": "number", "number": 3},
+    "Done": {"type": "checkbox", "checkbox": False},
+    "Note": {"type": "rich_text", "rich_text": rich_text("메모")},
+    "Empty": {"type": "rich_text", "rich_text": []},
+    "Related": {"type": "relation", "relation": [{"id": "page-1"}, {"id": "page-2"}]},
+    "Owner": {"type": "people", "people": [{"id": "user-1"}, {"id": "user-2", "name": "홍길동"}]},
+    "Key": {"type": "unique_id", "unique_id": {"prefix": "TASK", "number": 7}},
+    "Formula": {"type": "formula", "formula": {"type": "string", "string": "결과"}},
+    "Created": {"type": "created_time", "created_time": "2024-01-01T00:00:00.000Z"},
+    "Rollup": {
+        "type": "rollup",
+        "rollup": {
+            "type": "array",
+            "array": [
+                {"type": "number", "number": 1},
+                {"type": "rich_text", "rich_text": rich_text("text")},
+                {"type": "multi_select", "multi_select": [{"name": "x"}]},
+                {"type": "date", "date": {"start": "2024-02-01"}},
+            ],
+        },
+    },
+}
+
+
+class NormalizePropertiesTest(unittest.TestCase):
+    def test_normalize_properties(self):
+        normalized = normalize_properties(API_PROPERTIES)
+        self.assertEqual(normalized["Status"], {"type": "status", "value": "진행 중"})
+        self.assertEqual(normalized["Tags"]["value"], ["a", "b"])
+        self.assertEqual(normalized["Due"]["value"], {"start": "2024-01-01", "end": "2024-01-03"})
+        self.assertEqual(normalized["Done"]["value"], False)
+        self.assertEqual(normalized["Owner"]["value"], ["user-1", "홍길동"])
+        self.assertEqual(normalized["Key"]["value"], "TASK-7")
+        self.assertEqual(normalized["Formula"]["value"], "결과")
+        self.assertEqual(normalized["Rollup"]["value"], [1, "text", "x"])
+        # 제목/생성 시각(지원하지 않는 타입)과 빈 값은 제외
+        for name in ("Name", "Created", "Empty"):
+            self.assertNotIn(name, normalized)
+
+    def test_property_values_accepts_raw_and_normalized(self):
+        normalized = normalize_properties(API_PROPERTIES)
+        self.assertEqual(property_values({"properties": API_PROPERTIES}), property_values({"properties": normalized}))
+
+    def test_normalize_schema(self):
+        schema = {
+            "Status": {"type": "select", "select": {"options": [{"name": "A"}, {"name": "B"}]}},
+            "Related": {"type": "relation", "relation": {"database_id": "db-1"}},
+            "Score": {"type": "number", "number": {"format": "number"}},
+        }
+        self.assertEqual(normalize_schema(schema), {
+            "Status": {"type": "select", "options": ["A", "B"]},
+            "Related": {"type": "relation", "database_id": "db-1"},
+            "Score": {"type": "number"},
+        })
+
+
+class GraphPropertiesTest(unittest.TestCase):
+    def test_graph_properties_flattens_dates_and_names(self):
+        flattened = graph_properties({"properties": normalize_properties(API_PROPERTIES)})
+        self.assertEqual(flattened["prop_Due"], "2024-01-01")
+        self.assertEqual(flattened["prop_Due_end"], "2024-01-03")
+        self.assertEqual(flattened["prop_Tags"], ["a", "b"])
+        self.assertEqual(flattened["prop_Score"], 3)
+
+    def test_mixed_lists_are_homogeneous(self):
+        flattened = graph_properties({"properties": normalize_properties(API_PROPERTIES)})
+        self.assertEqual(flattened["prop_Rollup"], ["1", "text", "x"])
+        for value in flattened.values():
+            if isinstance(value, list):
+                self.assertLessEqual(len({type(item) for item in value}), 1)
+
+    def test_graph_list(self):
+        self.assertEqual(graph_list([1, 2]), [1, 2])
+        self.assertEqual(graph_list([1, 2.5]), [1.0, 2.5])
+        self.assertEqual(graph_list([True, 1]), ["true", "1"])
+        self.assertEqual(graph_list(["a", {"start": "2024-01-01"}, None]), ["a"])
+        self.assertEqual(graph_list([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
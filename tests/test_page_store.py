@@ -0,0 +1,266 @@
+"""page_store: JSON Lines 기록/읽기, 필드별 내용 해시, 오프셋 인덱스 조회, 수정 시각 범위 조회, 압축 프레임, 이어 쓰기"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import support  # noqa: F401
+
+import page_store
+from page_store import (
+    LEGACY_PAGES_FILENAME,
+    PageReader,
+    PageStore,
+    PageWriter,
+    append_pages,
+    get_page_hashes,
+    has_appended,
+    index_path,
+    iter_pages,
+    iter_records,
+    merge_pages,
+    page_hashes,
+    resolve_pages_path,
+    write_index,
+)
+from serialization import dump_json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def make_page(page_id: str, edited: str, text: str = "") -> dict:
+    return {"id": page_id, "title": page_id, "content": text, "last_edited_time": edited}
+
+
+PAGES = [make_page(f"page-{number}", f"2024-01-{number + 1:02d}T00:00:00.000Z", "본문 " * number) for number in range(20)]
+
+
+class PageStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, pages: list) -> Path:
+        path = self.dir / name
+        with PageWriter(path) as writer:
+            for page in pages:
+                writer.write(page)
+        return path
+
+    def test_get_reads_single_record(self):
+        path = self.write("pages.jsonl", PAGES)
+        self.assertTrue(index_path(path).exists())
+        with PageStore(path) as store:
+            self.assertEqual(len(store), len(PAGES))
+            self.assertEqual(store.get("page-7"), PAGES[7])
+            self.assertIsNone(store.get("missing"))
+            self.assertIn("page-0", store)
+            self.assertEqual(list(store.get_many(["page-3", "missing", "page-1"])), [PAGES[1], PAGES[3]])
+
+    def test_iter_since_uses_edited_order(self):
+        path = self.write("pages.jsonl", PAGES)
+        with PageStore(path) as store:
+            pages = list(store.iter_since("2024-01-15T00:00:00.000Z"))
+        self.assertEqual(pages, PAGES[14:])
+
+    def test_duplicate_ids_keep_last_record(self):
+        stale = make_page("page-2", "2024-01-30T00:00:00.000Z", "이전 버전")
+        latest = make_page("page-2", "2024-01-01T00:00:00.000Z", "최신 버전")
+        path = self.write("pages.jsonl", [stale] + PAGES[:2] + [latest])
+        with PageStore(path) as store:
+            self.assertEqual(len(store), 3)
+            self.assertEqual(store.get("page-2"), latest)
+            # 이전 버전의 수정 시각으로는 조회되지 않아야 함
+            self.assertEqual(list(store.iter_since("2024-01-15T00:00:00.000Z")), [])
+            self.assertEqual(list(store.iter_since("2024-01-01T00:00:00.000Z")), PAGES[:2] + [latest])
+
+    def test_stale_index_is_rebuilt(self):
+        path = self.write("pages.jsonl", PAGES[:3])
+        with open(path, "ab") as f:
+            f.write(page_store.dumps(PAGES[3]) + b"\n")
+        with PageStore(path) as store:
+            self.assertEqual(store.get("page-3"), PAGES[3])
+            self.assertEqual(len(store), 4)
+
+    def test_write_index_matches_scan(self):
+        path = self.write("pages.jsonl", PAGES)
+        write_index(path, page_store.scan_entries(path))
+        with PageStore(path) as store:
+            self.assertEqual(list(store.get_many([page["id"] for page in PAGES])), PAGES)
+
+    @unittest.skipIf(zstandard is None, "zstandard not installed")
+    def test_compressed_pages_are_split_into_frames(self):
+        with mock.patch.object(page_store, "PAGE_FRAME_BYTES", 256):
+            path = self.write("pages.jsonl.zst", PAGES)
+        with PageStore(path) as store:
+            offsets = {store.index.record(number)[1] for number in range(len(store))}
+            self.assertGreater(len(offsets), 1)
+            self.assertEqual(store.get("page-19"), PAGES[19])
+            self.assertEqual(list(store.iter_since("2024-01-18T00:00:00.000Z")), PAGES[17:])
+        self.assertEqual(list(iter_pages(path)), PAGES)
+
+    def check_append(self, name: str):
+        path = self.write(name, PAGES)
+        size = path.stat().st_size
+        edited = make_page("page-4", "2024-02-01T00:00:00.000Z", "수정한 본문")
+        added = make_page("page-new", "2024-02-02T00:00:00.000Z", "새 페이지")
+        with mock.patch.object(page_store, "PAGE_COMPACT_RATIO", 10):
+            append_pages(path, [edited, added])
+            # 같은 페이지를 다시 수정해도 마지막 버전만 보임
+            edited = dict(edited, content="다시 수정한 본문")
+            append_pages(path, [edited])
+
+        # 파일 앞부분은 다시 기록하지 않고 끝에만 이어 씀
+        self.assertGreater(path.stat().st_size, size)
+        self.assertTrue(has_appended(path))
+        self.assertEqual(len(list(iter_records(path))), len(PAGES) + 3)
+
+        expected = {page["id"]: page for page in PAGES}
+        expected.update({edited["id"]: edited, added["id"]: added})
+        pages = list(iter_pages(path))
+        self.assertEqual(len(pages), len(expected))
+        self.assertEqual({page["id"]: page for page in pages}, expected)
+        self.assertEqual(len(PageReader(path)), len(expected))
+        with PageStore(path) as store:
+            self.assertEqual(store.get("page-4"), edited)
+            self.assertEqual(list(store.iter_since("2024-02-01T00:00:00.000Z")), [added, edited])
+
+        # 삭제분을 반영해 다시 기록하면 이전 버전도 정리됨
+        merge_pages(path, path, [], removed=["page-0"])
+        del expected["page-0"]
+        self.assertFalse(has_appended(path))
+        self.assertEqual({page["id"]: page for page in iter_records(path)}, expected)
+
+    def test_append_pages_patches_index(self):
+        self.check_append("pages.jsonl")
+
+    @unittest.skipIf(zstandard is None, "zstandard not installed")
+    def test_append_pages_compressed(self):
+        self.check_append("pages.jsonl.zst")
+
+    def test_append_pages_compacts_past_ratio(self):
+        path = self.write("pages.jsonl", PAGES[:2])
+        append_pages(path, [dict(PAGES[0], content="긴 본문 " * 100)])
+        self.assertFalse(has_appended(path))
+        self.assertEqual(len(list(iter_records(path))), 2)
+
+    def test_interrupted_append_is_compacted_on_open(self):
+        path = self.write("pages.jsonl", PAGES[:3])
+        edited = dict(PAGES[1], content="인덱스 갱신 전에 중단")
+        with open(path, "ab") as f:
+            f.write(page_store.dumps(edited) + b"\n")
+        with PageStore(path) as store:
+            self.assertEqual(len(store), 3)
+            self.assertEqual(store.get("page-1"), edited)
+        self.assertEqual(list(iter_records(path)), [PAGES[0], PAGES[2], edited])
+
+
+class PageFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writer_writes_one_line_per_page(self):
+        path = self.dir / "pages.jsonl"
+        with PageWriter(path) as writer:
+            for page in PAGES:
+                writer.write(page)
+        self.assertEqual(writer.count, len(PAGES))
+        self.assertEqual(len(path.read_bytes().splitlines()), len(PAGES))
+        self.assertEqual(list(iter_pages(path)), PAGES)
+
+        reader = PageReader(path)
+        self.assertEqual(len(reader), len(PAGES))
+        # 순회할 때마다 파일을 다시 읽음
+        self.assertEqual(list(reader), list(reader))
+
+    def test_failed_write_keeps_previous_file(self):
+        path = self.dir / "pages.jsonl"
+        with PageWriter(path) as writer:
+            writer.write(PAGES[0])
+        with self.assertRaises(RuntimeError):
+            with PageWriter(path) as writer:
+                writer.write(PAGES[1])
+                raise RuntimeError("export failed")
+        self.assertEqual(list(iter_pages(path)), [PAGES[0]])
+        self.assertEqual(sorted(item.name for item in self.dir.iterdir()), ["pages.jsonl", "pages.jsonl.idx"])
+
+    def test_legacy_json_array_is_read(self):
+        dump_json(PAGES[:3], self.dir / LEGACY_PAGES_FILENAME)
+        path = resolve_pages_path(self.dir)
+        self.assertEqual(path.name, LEGACY_PAGES_FILENAME)
+        self.assertEqual(list(PageReader(path)), PAGES[:3])
+        self.assertEqual(len(PageReader(path)), 3)
+
+        # JSON Lines 파일이 생기면 그 파일을 우선 사용
+        merge_pages(path, self.dir / page_store.PAGES_FILENAME, [PAGES[5]], removed=[PAGES[0]["id"]])
+        path = resolve_pages_path(self.dir)
+        self.assertEqual(path.name, page_store.PAGES_FILENAME)
+        self.assertEqual(list(iter_pages(path)), [PAGES[5], PAGES[1], PAGES[2]])
+
+
+class PageHashesTest(unittest.TestCase):
+    PAGE = {
+        "id": "page-1", "title": "제목", "content": "첫 줄\n둘째 줄",
+        "links": ["b", "a"], "tags": [{"name": "태그", "color": "red"}],
+    }
+
+    def changed_fields(self, **changes) -> set:
+        before, after = page_hashes(self.PAGE), page_hashes({**self.PAGE, **changes})
+        return {field for field in before if before[field] != after[field]}
+
+    def test_formatting_only_changes_keep_hashes(self):
+        self.assertEqual(self.changed_fields(content="  첫 줄\n\n둘째   줄 ", title=" 제목"), set())
+        self.assertEqual(self.changed_fields(links=["a", "b", "a"]), set())
+        self.assertEqual(self.changed_fields(tags=[{"name": "태그", "color": "blue"}]), set())
+
+    def test_each_field_has_its_own_hash(self):
+        self.assertEqual(self.changed_fields(content="다른 본문"), {"content"})
+        self.assertEqual(self.changed_fields(title="다른 제목"), {"title"})
+        self.assertEqual(self.changed_fields(links=["a"]), {"links"})
+        self.assertEqual(self.changed_fields(tags=[{"name": "다른 태그", "color": "red"}]), {"tags"})
+
+    def test_exporter_records_hashes(self):
+        from notion_exporter import build_page_data
+
+        page = {
+            "id": "page-1",
+            "created_time": "2024-01-01T00:00:00.000Z",
+            "last_edited_time": "2024-01-02T00:00:00.000Z",
+            "properties": {"title": {"type": "title", "title": [{"plain_text": "제목"}]}},
+        }
+        blocks = [{"id": "b1", "type": "paragraph", "paragraph": {"rich_text": [{"plain_text": "본문"}]}}]
+        record = build_page_data(page, blocks)
+        self.assertEqual(record["hashes"], page_hashes(record))
+        # 기록된 해시가 있으면 다시 계산하지 않음
+        self.assertIs(get_page_hashes(record), record["hashes"])
+        del record["hashes"]
+        self.assertEqual(get_page_hashes(record), page_hashes(record))
+
+
+class DataDirTest(unittest.TestCase):
+    def test_scripts_share_export_dir(self):
+        import block_cache
+        import notion_exporter
+        import snapshots
+
+        data_dir = Path(os.environ["NOTION_EXPORT_DIR"])
+        self.assertEqual(page_store.DATA_DIR, data_dir)
+        for module in (notion_exporter, snapshots, block_cache):
+            self.assertIs(module.DATA_DIR, page_store.DATA_DIR)
+        self.assertEqual(block_cache.BLOCK_CACHE_FILE.parent, data_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
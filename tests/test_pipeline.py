@@ -0,0 +1,142 @@
+"""pipeline: exporter sink로 넘기는 페이지, 큐/소비 스레드 동작, 증분 실행의 재임베딩 범위"""
+
+import unittest
+
+from support import FakeNotionTestCase
+
+from serialization import load_json
+
+try:
+    from pipeline import PageQueue, PipelineWorker
+except ImportError:  # vector_store가 FlagEmbedding을 필요로 함
+    PageQueue = PipelineWorker = None
+
+SINK_CODE = """
+import json
+import notion_exporter
+
+exporter = notion_exporter.NotionExporter(use_async={use_async}, use_cache=False, incremental={incremental})
+seen = []
+exporter.sinks.append(lambda page: seen.append(page["id"]))
+exporter.run()
+print(json.dumps(seen))
+"""
+
+# 모델은 텍스트 길이로 만든 4차원 벡터, Qdrant는 실행 사이에 상태가 남도록 로컬 디스크 모드
+PIPELINE_CODE = """
+import json
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+import notion_exporter
+import pipeline
+import vector_store
+
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        return {{"dense_vecs": np.array([[len(text), 1.0, 0.5, 0.25] for text in texts], dtype=float)}}
+
+
+def init_qdrant(recreate=False):
+    client = QdrantClient(path=str(pipeline.DATA_DIR / "qdrant"))
+    if not client.collection_exists(vector_store.COLLECTION_NAME):
+        client.create_collection(
+            collection_name=vector_store.COLLECTION_NAME,
+            vectors_config=VectorParams(size=4, distance=Distance.COSINE),
+        )
+    return client
+
+
+vector_store.init_model = FakeModel
+vector_store.init_qdrant = init_qdrant
+exporter = notion_exporter.NotionExporter(use_async={use_async}, use_cache=False, incremental={incremental})
+runner = pipeline.Pipeline(exporter, use_graph=False)
+stats = runner.run()
+points, _ = runner.qdrant.scroll(collection_name=vector_store.COLLECTION_NAME, limit=1000)
+runner.qdrant.close()
+previews = {{point.payload["notion_id"]: point.payload["content_preview"] for point in points if point.payload["chunk_index"] == 0}}
+print(json.dumps({{"reembedded": runner.reembedded, "previews": previews, "embedding": stats["embedding"]}}))
+"""
+
+
+class ExporterSinkTest(FakeNotionTestCase):
+    def export_with_sink(self, data_dir, incremental: bool, use_async: bool) -> list:
+        return self.run_exporter_code(data_dir, SINK_CODE.format(incremental=incremental, use_async=use_async))
+
+    def check_mode(self, use_async: bool):
+        data_dir = self.root / f"data_{use_async}"
+        seen = self.export_with_sink(data_dir, False, use_async)
+        pages, _ = self.outputs(data_dir)
+        self.assertEqual(sorted(seen), sorted(pages))
+
+        watermark = load_json(data_dir / "export_state.json")["last_edited_time"]
+        edited = self.server.edit_page(self.server.workspace["pages"][0]["id"], "edited for sink test")
+        seen = self.export_with_sink(data_dir, True, use_async)
+        # 증분 모드에서는 새로 가져온 페이지(워터마크 이후 수정)만 sink로 넘기고 이어 붙인 페이지는 저장소에만 기록
+        refetched = {page_id for page_id, page in pages.items() if page["last_edited_time"] >= watermark}
+        self.assertEqual(set(seen), refetched | {edited})
+        self.assertLess(len(seen), len(pages))
+        pages_after, _ = self.outputs(data_dir)
+        self.assertEqual(set(pages_after), set(pages))
+        self.assertIn("edited for sink test", pages_after[edited]["content"])
+
+    def test_sync_sinks(self):
+        self.check_mode(False)
+
+    def test_async_sinks(self):
+        self.check_mode(True)
+
+
+@unittest.skipIf(PageQueue is None, "FlagEmbedding not installed")
+class PipelineRunTest(FakeNotionTestCase):
+    def run_pipeline(self, incremental: bool, use_async: bool) -> dict:
+        code = PIPELINE_CODE.format(incremental=incremental, use_async=use_async)
+        return self.run_exporter_code(self.root / "data", code, {"EMBEDDING_CACHE": "0"})
+
+    def test_incremental_run_reembeds_only_edited_pages(self):
+        result = self.run_pipeline(False, True)
+        pages, _ = self.outputs(self.root / "data")
+        embedded = {page_id for page_id, page in pages.items() if page["content"].strip() or page["title"].strip()}
+        self.assertEqual(set(result["reembedded"]), embedded)
+        self.assertEqual(set(result["previews"]), embedded)
+
+        edited = self.server.edit_page(self.server.workspace["pages"][0]["id"], "edited for pipeline test")
+        result = self.run_pipeline(True, False)
+        self.assertEqual(result["reembedded"], [edited])
+        self.assertEqual(result["embedding"]["processed"], 1)
+        self.assertEqual(set(result["previews"]), embedded)
+        self.assertTrue(result["previews"][edited].startswith("edited for pipeline test"))
+
+
+@unittest.skipIf(PageQueue is None, "FlagEmbedding not installed")
+class PageQueueTest(unittest.TestCase):
+    def test_worker_receives_pages_in_order(self):
+        pages = PageQueue("test", maxsize=2)
+        worker = PipelineWorker(pages, lambda items: [page["id"] for page in items])
+        worker.start()
+        for number in range(10):
+            pages({"id": number})
+        pages.close()
+        worker.join()
+        self.assertEqual(worker.result, list(range(10)))
+        self.assertEqual(pages.count, 10)
+
+    def test_failed_worker_stops_producer(self):
+        def fail(items):
+            next(iter(items))
+            raise ValueError("boom")
+
+        pages = PageQueue("test", maxsize=1)
+        worker = PipelineWorker(pages, fail)
+        worker.start()
+        with self.assertRaises(RuntimeError):
+            for number in range(100):
+                pages({"id": number})
+        worker.join()
+        self.assertIsInstance(pages.error, ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""rate_limiter: 토큰 버킷 대기 시간, Retry-After, 지수 백오프 재시도"""
+
+import asyncio
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+import support  # noqa: F401
+
+import httpx
+from notion_client.errors import HTTPResponseError
+
+import rate_limiter
+from rate_limiter import BACKOFF_BASE, BACKOFF_MAX, RateLimiter, backoff_delay, is_retryable, retry_after_seconds
+
+
+def http_error(status: int, headers: dict = None) -> HTTPResponseError:
+    return HTTPResponseError(httpx.Response(status, headers=headers or {}))
+
+
+class Flaky:
+    """처음 몇 번은 지정한 에러를 내고 이후 성공하는 호출"""
+
+    def __init__(self, errors: list):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return kwargs
+
+
+class RetryHelpersTest(unittest.TestCase):
+    def test_retry_after_seconds(self):
+        self.assertEqual(retry_after_seconds(http_error(429, {"Retry-After": "7"})), 7.0)
+        self.assertIsNone(retry_after_seconds(http_error(429)))
+        self.assertIsNone(retry_after_seconds(ValueError()))
+        later = retry_after_seconds(http_error(429, {"Retry-After": formatdate(rate_limiter.time.time() + 30, usegmt=True)}))
+        self.assertTrue(25 <= later <= 30)
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(http_error(429)))
+        self.assertTrue(is_retryable(http_error(503)))
+        self.assertFalse(is_retryable(http_error(400)))
+        self.assertTrue(is_retryable(httpx.ConnectTimeout("timeout")))
+        self.assertFalse(is_retryable(ValueError()))
+
+    def test_backoff_delay(self):
+        for attempt in range(10):
+            ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+            delay = backoff_delay(attempt)
+            self.assertTrue(ceiling / 2 <= delay <= ceiling)
+        # Retry-After보다 짧게 기다리지 않음
+        self.assertGreaterEqual(backoff_delay(0, retry_after=10), 10)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_bucket_allows_burst_then_waits(self):
+        limiter = RateLimiter(rate=10, burst=2)
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1, delta=0.02)
+        self.assertAlmostEqual(limiter.reserve(), 0.2, delta=0.02)
+        self.assertEqual(limiter.stats["requests"], 4)
+
+    def test_call_retries_with_backoff(self):
+        limiter = RateLimiter(rate=1000, burst=10)
+        fn = Flaky([http_error(503), httpx.ConnectError("reset")])
+        with mock.patch.object(rate_limiter.time, "sleep") as sleep:
+            self.assertEqual(limiter.call(fn, endpoint="test", page_id="a"), {"page_id": "a"})
+        self.assertEqual(fn.calls, 3)
+        self.assertEqual(limiter.stats["retries"], 2)
+        delays = [call.args[0] for call in sleep.call_args_list if call.args[0] > 0]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(BACKOFF_BASE / 2 <= delays[0] <= BACKOFF_BASE)
+        self.assertTrue(BACKOFF_BASE <= delays[1] <= BACKOFF_BASE * 2)
+
+    def test_rate_limited_pauses_whole_bucket(self):
+        limiter = RateLimiter(rate=1000, burst=10)
+        fn = Flaky([http_error(429, {"Retry-After": "5"})])
+        with mock.patch.object(rate_limiter.time, "sleep") as sleep:
+            limiter.call(fn, endpoint="test")
+        self.assertEqual(limiter.stats["rate_limited"], 1)
+        # 429 이후의 대기는 재시도 지연이 아니라 버킷 일시 정지로 처리됨 → 다른 호출자도 기다림
+        self.assertGreaterEqual(max(call.args[0] for call in sleep.call_args_list), 5)
+        self.assertGreaterEqual(limiter.reserve(), 4)
+
+    def test_non_retryable_and_exhausted_errors_are_raised(self):
+        limiter = RateLimiter(rate=1000, burst=10, max_retries=2)
+        with mock.patch.object(rate_limiter.time, "sleep"):
+            with self.assertRaises(HTTPResponseError):
+                limiter.call(Flaky([http_error(404)]), endpoint="test")
+            fn = Flaky([http_error(500)] * 3)
+            with self.assertRaises(HTTPResponseError):
+                limiter.call(fn, endpoint="test")
+        self.assertEqual(fn.calls, 3)
+
+    def test_call_async_retries(self):
+        limiter = RateLimiter(rate=1000, burst=10)
+        fn = Flaky([http_error(502)])
+
+        async def call(**kwargs):
+            return fn(**kwargs)
+
+        async def no_sleep(seconds):
+            pass
+
+        with mock.patch.object(rate_limiter.asyncio, "sleep", no_sleep):
+            result = asyncio.run(limiter.call_async(call, endpoint="test", cursor="x"))
+        self.assertEqual(result, {"cursor": "x"})
+        self.assertEqual(limiter.stats["retries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
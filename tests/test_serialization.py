@@ -0,0 +1,66 @@
+"""serialization: 압축/비압축 JSON 산출물, zstd 프레임 단위 읽기"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import support  # noqa: F401
+
+from serialization import BinaryWriter, dump_json, dumps, load_json, loads, open_read, read_frame
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DATA = [{"id": "a", "title": "한글 제목", "items": [1, 2, {"nested": None}]}, {"id": "b", "items": []}]
+
+
+class SerializationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_dumps_is_compact_unless_indented(self):
+        self.assertNotIn(b"\n", dumps(DATA))
+        self.assertNotIn(b", ", dumps(DATA))
+        self.assertIn(b"\n  ", dumps(DATA, indent=True))
+        self.assertEqual(loads(dumps(DATA)), DATA)
+
+    def test_dump_json_roundtrip(self):
+        path = self.dir / "databases.json"
+        dump_json(DATA, path)
+        self.assertEqual(load_json(path), DATA)
+        self.assertNotIn(b"\n", path.read_bytes())
+
+    @unittest.skipIf(zstandard is None, "zstandard가 설치되지 않음")
+    def test_compressed_roundtrip(self):
+        path = self.dir / "databases.json.zst"
+        dump_json(DATA, path)
+        self.assertEqual(load_json(path), DATA)
+
+    @unittest.skipIf(zstandard is None, "zstandard가 설치되지 않음")
+    def test_frames_can_be_read_individually(self):
+        path = self.dir / "pages.jsonl.zst"
+        writer = BinaryWriter(path)
+        offsets = []
+        try:
+            for record in DATA:
+                offsets.append(writer.tell())
+                writer.write(dumps(record) + b"\n")
+                writer.end_frame()
+        finally:
+            writer.close()
+
+        with open(path, "rb") as f:
+            self.assertEqual([loads(read_frame(f, offset)) for offset in offsets], DATA)
+        # 여러 프레임을 이어서 읽어도 전체 내용이 나옴
+        with open_read(path) as f:
+            self.assertEqual([loads(line) for line in f.read().splitlines()], DATA)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""similarity_edges: 청크 벡터 평균으로 페이지 벡터 계산, 주어진 페이지만 조회"""
+
+import os
+import unittest
+from unittest import mock
+
+import support  # noqa: F401
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+with mock.patch.dict(os.environ, {"NEO4J_PASSWORD": os.environ.get("NEO4J_PASSWORD", "test")}):
+    import similarity_edges
+
+CHUNKS = {
+    "page-a": [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+    "page-b": [[1.0, 1.0, 0.0]],
+    "page-c": [[0.0, 1.0, 1.0], [0.0, 1.0, -1.0]],
+}
+
+
+class PageVectorsTest(unittest.TestCase):
+    def setUp(self):
+        self.qdrant = QdrantClient(":memory:")
+        self.qdrant.create_collection(
+            collection_name=similarity_edges.COLLECTION_NAME,
+            vectors_config=VectorParams(size=3, distance=Distance.DOT),
+        )
+        chunks = [(notion_id, index, vector) for notion_id, vectors in CHUNKS.items() for index, vector in enumerate(vectors)]
+        points = [
+            PointStruct(id=number, vector=vector, payload={"notion_id": notion_id, "chunk_index": index})
+            for number, (notion_id, index, vector) in enumerate(chunks)
+        ]
+        self.qdrant.upsert(collection_name=similarity_edges.COLLECTION_NAME, points=points)
+
+    def assert_vectors(self, vectors: dict, expected: dict):
+        self.assertEqual(set(vectors), set(expected))
+        for notion_id, vector in expected.items():
+            for actual, value in zip(vectors[notion_id], vector):
+                self.assertAlmostEqual(actual, value, places=5)
+
+    def test_page_vector_is_chunk_mean(self):
+        self.assert_vectors(similarity_edges.page_vectors(self.qdrant), {
+            "page-a": [1 / 3, 1 / 3, 1 / 3],
+            "page-b": [1.0, 1.0, 0.0],
+            "page-c": [0.0, 1.0, 0.0],
+        })
+
+    def test_fetch_vectors_scrolls_only_given_pages(self):
+        with mock.patch.object(similarity_edges, "page_vectors", wraps=similarity_edges.page_vectors) as scroll:
+            vectors = similarity_edges.fetch_vectors(self.qdrant, ["page-c", "page-missing"])
+            self.assertEqual(similarity_edges.fetch_vectors(self.qdrant, []), {})
+        self.assert_vectors(vectors, {"page-c": [0.0, 1.0, 0.0]})
+        self.assertEqual(scroll.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
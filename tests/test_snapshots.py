@@ -0,0 +1,120 @@
+"""snapshots: base + delta 기록, 임의 시점 복원, 변경분 계산, 보존 정책"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import support  # noqa: F401
+
+import snapshots
+from page_store import PageWriter, iter_pages
+from serialization import load_json, resolve_artifact
+from snapshots import SnapshotStore
+
+
+def make_page(page_id: str, text: str) -> dict:
+    return {"id": page_id, "title": page_id, "content": text}
+
+
+DATABASES = [{"id": "db-1", "title": "DB"}]
+
+
+class SnapshotStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.store = SnapshotStore(self.dir / "snapshots")
+        self.truth = {}
+        patcher = mock.patch.multiple(snapshots, SNAPSHOT_KEEP=0, SNAPSHOT_MAX_AGE_DAYS=0, SNAPSHOT_BASE_INTERVAL=3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, snapshot_id: str, pages: list, databases: list = DATABASES) -> dict:
+        path = self.dir / "pages.jsonl"
+        with PageWriter(path) as writer:
+            for page in pages:
+                writer.write(page)
+        self.truth[snapshot_id] = ({page["id"]: page for page in pages}, {db["id"]: db for db in databases})
+        return self.store.record(snapshot_id, path, databases)
+
+    def record_history(self) -> list:
+        pages = {f"page-{number}": make_page(f"page-{number}", f"본문 {number}") for number in range(5)}
+        self.record("20240101_000000", list(pages.values()))
+        pages["page-1"] = make_page("page-1", "수정")
+        self.record("20240102_000000", list(pages.values()))
+        pages["page-new"] = make_page("page-new", "추가")
+        del pages["page-2"]
+        self.record("20240103_000000", list(pages.values()))
+        del pages["page-new"]
+        pages["page-3"] = make_page("page-3", "수정")
+        self.record("20240104_000000", list(pages.values()), DATABASES + [{"id": "db-2", "title": "DB 2"}])
+        self.record("20240105_000000", list(pages.values()), DATABASES + [{"id": "db-2", "title": "DB 2"}])
+        return [entry["id"] for entry in self.store.snapshots]
+
+    def assert_rebuilds(self, snapshot_id: str):
+        output = self.dir / f"rebuild_{snapshot_id}"
+        counts = self.store.rebuild(snapshot_id, output)
+        pages, databases = self.truth[snapshot_id]
+        self.assertEqual({page["id"]: page for page in iter_pages(resolve_artifact(output, "pages.jsonl"))}, pages)
+        self.assertEqual({db["id"]: db for db in load_json(resolve_artifact(output, "databases.json"))}, databases)
+        self.assertEqual(counts, {"pages": len(pages), "databases": len(databases)})
+
+    def test_record_writes_deltas_and_periodic_bases(self):
+        ids = self.record_history()
+        entries = self.store.snapshots
+        self.assertEqual([bool(entry.get("base")) for entry in entries], [True, False, False, True, False])
+        self.assertNotIn("delta", entries[0])
+        self.assertEqual((entries[2]["added"], entries[2]["changed"], entries[2]["removed"]), (1, 0, 1))
+        self.assertEqual((entries[3]["added"], entries[3]["changed"], entries[3]["removed"]), (1, 1, 1))
+        self.assertEqual((entries[4]["added"], entries[4]["changed"], entries[4]["removed"]), (0, 0, 0))
+        for snapshot_id in ids:
+            self.assert_rebuilds(snapshot_id)
+
+    def test_same_second_ids_stay_ordered(self):
+        self.record("20240101_000000", [make_page("a", "1")])
+        entry = self.record("20240101_000000", [make_page("a", "2")])
+        self.assertEqual(entry["id"], "20240101_000000_1")
+
+    def test_changeset_folds_intermediate_changes(self):
+        ids = self.record_history()
+        changes = self.store.changeset(ids[0], ids[3])
+        self.assertEqual(sorted(page["id"] for page in changes["page"]["changed"]), ["page-1", "page-3"])
+        # 중간에 추가됐다가 삭제된 페이지는 나타나지 않음
+        self.assertEqual(changes["page"]["added"], [])
+        self.assertEqual(changes["page"]["removed"], ["page-2"])
+        self.assertEqual([db["id"] for db in changes["database"]["added"]], ["db-2"])
+        self.assertEqual(self.store.changeset(ids[3], ids[4]),
+                         {kind: {"added": [], "changed": [], "removed": []} for kind in ("page", "database")})
+        with self.assertRaises(ValueError):
+            self.store.changeset(ids[2], ids[1])
+
+    def test_prune_rebuilds_oldest_kept_snapshot_as_base(self):
+        ids = self.record_history()
+        with mock.patch.object(snapshots, "SNAPSHOT_KEEP", 3):
+            removed = self.store.prune()
+        self.assertEqual(removed, ids[:2])
+        self.assertEqual([entry["id"] for entry in self.store.snapshots], ids[2:])
+        for snapshot_id in ids[:2]:
+            self.assertFalse((self.dir / "snapshots" / f"delta_{snapshot_id}.jsonl").exists())
+        for snapshot_id in ids[2:]:
+            self.assert_rebuilds(snapshot_id)
+
+        with mock.patch.object(snapshots, "SNAPSHOT_KEEP", 1):
+            self.store.prune()
+        self.assertTrue(self.store.snapshots[0].get("base"))
+        self.assert_rebuilds(ids[-1])
+
+    def test_store_reloads_from_manifest(self):
+        ids = self.record_history()
+        reloaded = SnapshotStore(self.dir / "snapshots")
+        self.assertEqual([entry["id"] for entry in reloaded.snapshots], ids)
+        self.store = reloaded
+        self.assert_rebuilds(ids[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
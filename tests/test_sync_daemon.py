@@ -0,0 +1,94 @@
+"""sync_daemon: 가짜 Notion 서버에서 수정/삭제된 페이지만 Qdrant와 페이지 저장소에 반영"""
+
+import unittest
+
+from support import FakeNotionTestCase
+
+from page_store import iter_pages, resolve_pages_path
+
+try:
+    import sync_daemon
+except ImportError:  # vector_store가 FlagEmbedding을 필요로 함
+    sync_daemon = None
+
+# Qdrant는 실행 사이에 상태가 남도록 로컬 디스크 모드, 모델은 텍스트 길이로 만든 4차원 벡터
+DAEMON_CODE = """
+import json
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+import sync_daemon
+import vector_store
+
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        return {{"dense_vecs": np.array([[len(text), 1.0, 0.5, 0.25] for text in texts], dtype=float)}}
+
+
+def init_qdrant(recreate=False):
+    client = QdrantClient(path=str(sync_daemon.DATA_DIR / "qdrant"))
+    if not client.collection_exists(vector_store.COLLECTION_NAME):
+        client.create_collection(
+            collection_name=vector_store.COLLECTION_NAME,
+            vectors_config=VectorParams(size=4, distance=Distance.COSINE),
+        )
+    return client
+
+
+vector_store.init_model = FakeModel
+vector_store.init_qdrant = init_qdrant
+daemon = sync_daemon.SyncDaemon(use_graph=False, reconcile_interval={reconcile_interval})
+calls = []
+process_pages = vector_store.process_pages
+vector_store.process_pages = lambda pages, *args, **kwargs: calls.append([page["id"] for page in pages]) or process_pages(pages, *args, **kwargs)
+if {catch_up}:
+    daemon.catch_up()
+else:
+    daemon.run_once()
+points, _ = daemon.qdrant.scroll(collection_name=vector_store.COLLECTION_NAME, limit=1000)
+daemon.qdrant.close()
+daemon.close()
+previews = {{}}
+for point in points:
+    if point.payload["chunk_index"] == 0:
+        previews[point.payload["notion_id"]] = point.payload["content_preview"]
+print(json.dumps({{"previews": previews, "embedded": calls}}))
+"""
+
+
+@unittest.skipIf(sync_daemon is None, "FlagEmbedding not installed")
+class SyncDaemonTest(FakeNotionTestCase):
+    workspace_args = {"pages": 6, "blocks_per_page": 4, "databases": 1, "items_per_db": 3, "seed": 8}
+
+    def run_daemon(self, catch_up: bool = False, reconcile_interval: float = 3600) -> dict:
+        code = DAEMON_CODE.format(catch_up=catch_up, reconcile_interval=reconcile_interval)
+        env = {"EMBEDDING_CACHE": "0", "SYNC_SETTLE_SECONDS": "0"}
+        return self.run_exporter_code(self.root / "data", code, env)
+
+    def test_poll_applies_edits_and_deletions(self):
+        # 첫 실행: 페이지 저장소가 없으므로 전체 export 후 전체 임베딩
+        result = self.run_daemon(catch_up=True)
+        page_ids = {page["id"] for page in self.server.workspace["pages"]}
+        self.assertEqual(set(result["previews"]), page_ids)
+
+        edited = self.server.edit_page(self.server.workspace["pages"][0]["id"], "edited by sync test")
+        removed = self.server.workspace["pages"][1]["id"]
+        self.server.remove_page(removed)
+
+        # 폴링은 수정된 페이지만 다시 임베딩
+        self.assertEqual(self.run_daemon(reconcile_interval=3600)["embedded"], [[edited]])
+        # 삭제는 reconcile에서 반영, 변경 없는 페이지는 다시 임베딩하지 않음
+        result = self.run_daemon(reconcile_interval=0)
+        self.assertEqual(result["embedded"], [])
+
+        self.assertTrue(result["previews"][edited].startswith("edited by sync test"))
+        self.assertEqual(set(result["previews"]), page_ids - {removed})
+        pages = {page["id"]: page for page in iter_pages(resolve_pages_path(self.root / "data"))}
+        self.assertEqual(set(pages), page_ids - {removed})
+        self.assertIn("edited by sync test", pages[edited]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
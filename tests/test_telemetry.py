@@ -0,0 +1,94 @@
+"""telemetry: 엔드포인트별 지연 시간 히스토그램, 페이지별 비용 순위, 샤드 결과 합치기"""
+
+import asyncio
+import unittest
+
+from support import FakeNotionTestCase
+
+import httpx
+from notion_client.errors import HTTPResponseError
+
+from fake_notion import paragraph_block
+from telemetry import Telemetry
+
+
+class TelemetryTest(unittest.TestCase):
+    def test_endpoint_histogram_and_errors(self):
+        telemetry = Telemetry()
+        for seconds in (0.01, 0.2, 0.2, 12.0):
+            telemetry.record_call("search", seconds)
+        telemetry.record_call("search", 0.03, error=ValueError())
+        telemetry.record_sleep("search", 1.5)
+        telemetry.record_sleep("search", 0)
+
+        search = telemetry.report()["endpoints"]["search"]
+        self.assertEqual(search["calls"], 5)
+        self.assertEqual(search["errors"], 1)
+        self.assertEqual(search["histogram_ms"], {"<=50": 2, "<=250": 2, ">10000": 1})
+        self.assertEqual(list(search["histogram_ms"]), ["<=50", "<=250", ">10000"])
+        self.assertEqual(search["max_ms"], 12000.0)
+        self.assertEqual(search["mean_ms"], 2488.0)
+        self.assertEqual(telemetry.report()["sleep_seconds"], 1.5)
+
+    def test_calls_are_charged_to_current_page(self):
+        telemetry = Telemetry(top_pages=2)
+
+        async def fetch(page_id: str, calls: int):
+            with telemetry.track_page(page_id, page_id.upper()):
+                # 같은 페이지의 하위 작업도 contextvars로 같은 페이지에 집계
+                await asyncio.gather(*[child(calls) for _ in range(2)])
+
+        async def child(calls: int):
+            for _ in range(calls):
+                await asyncio.sleep(0)
+                telemetry.record_call("blocks.children.list", 0.001)
+
+        async def main():
+            await asyncio.gather(fetch("a", 1), fetch("b", 3), fetch("c", 2))
+
+        asyncio.run(main())
+        telemetry.record_call("search", 0.001)  # 페이지 밖의 호출
+
+        ranked = telemetry.report()["most_api_calls"]
+        self.assertEqual([(page["id"], page["api_calls"]) for page in ranked], [("b", 6), ("c", 4)])
+        self.assertEqual(ranked[0]["title"], "B")
+
+    def test_merge_adds_worker_reports(self):
+        worker = Telemetry()
+        with worker.track_page("slow"):
+            worker.record_call("blocks.children.list", 3.0)
+        worker.record_retry("blocks.children.list", HTTPResponseError(httpx.Response(429)))
+
+        telemetry = Telemetry()
+        telemetry.record_call("blocks.children.list", 0.1)
+        telemetry.merge(worker.report())
+        report = telemetry.report()
+        blocks = report["endpoints"]["blocks.children.list"]
+        self.assertEqual((blocks["calls"], blocks["retries"], blocks["rate_limited"]), (2, 1, 1))
+        self.assertEqual(blocks["max_ms"], 3000.0)
+        self.assertEqual([page["id"] for page in report["most_api_calls"]], ["slow"])
+
+
+class ExportTelemetryTest(FakeNotionTestCase):
+    workspace_args = {
+        "pages": 6, "blocks_per_page": 4, "nested_ratio": 0, "databases": 1, "items_per_db": 3, "seed": 2,
+    }
+
+    def test_export_stats_match_server_requests(self):
+        ws = self.server.workspace
+        expensive = ws["pages"][0]
+        # 블록 250개 → blocks.children.list 3번 (페이지당 최대 100개)
+        ws["children"][expensive["id"]] = [paragraph_block(f"block {number}") for number in range(250)]
+
+        for args in ((), ("--async",)):
+            self.server.stats["endpoints"].clear()
+            stats = self.export(self.root / ("data" + "".join(args)), "--no-cache", *args)
+            telemetry = stats["telemetry"]
+            calls = {name: endpoint["calls"] for name, endpoint in telemetry["endpoints"].items()}
+            self.assertEqual(calls, self.server.stats["endpoints"])
+            self.assertEqual(telemetry["most_api_calls"][0]["id"], expensive["id"])
+            self.assertEqual(telemetry["most_api_calls"][0]["api_calls"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
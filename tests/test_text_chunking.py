@@ -0,0 +1,98 @@
+"""text_chunking: 제목 위치 기반 섹션 나누기, 겹치는 구절, 코드 블록 유지"""
+
+import unittest
+
+import support  # noqa: F401
+
+from notion_exporter import extract_block_content
+from text_chunking import chunk_page_text, pack_lines, split_line, split_sections, split_units
+
+
+def block(block_type: str, text: str) -> dict:
+    return {"type": block_type, block_type: {"rich_text": [{"type": "text", "plain_text": text}]}}
+
+
+class SplitTest(unittest.TestCase):
+    def test_split_line_covers_text_with_overlap(self):
+        pieces = split_line("abcdefghij" * 30, 100, 20)
+        self.assertTrue(all(len(piece) <= 100 for piece in pieces))
+        self.assertEqual(pieces[0][-20:], pieces[1][:20])
+        self.assertTrue(("abcdefghij" * 30).endswith(pieces[-1]))
+
+    def test_code_block_is_one_unit(self):
+        units = split_units("intro\n```\n# install deps\npip install x\n```\n\noutro")
+        self.assertEqual(units, ["intro", "```\n# install deps\npip install x\n```", "outro"])
+
+    def test_sections_follow_heading_offsets(self):
+        content = "intro\nSetup\nstep one\nUsage\nrun it"
+        headings = [{"offset": 6, "level": 2, "text": "Setup"}, {"offset": 21, "level": 2, "text": "Usage"}]
+        self.assertEqual(split_sections(content, headings), [
+            ("", ["intro"]),
+            ("Setup", ["Setup", "step one"]),
+            ("Usage", ["Usage", "run it"]),
+        ])
+
+    def test_markdown_lines_are_not_headings(self):
+        # 코드 주석 등 '#'으로 시작하는 줄은 제목 위치가 없으면 경계가 아님
+        self.assertEqual(split_sections("# not a heading\nbody"), [("", ["# not a heading", "body"])])
+
+    def test_pack_lines_overlaps_previous_passage(self):
+        lines = [f"line {i:02d} " + "x" * 30 for i in range(10)]
+        passages = pack_lines(lines, 120, 45)
+        self.assertGreater(len(passages), 1)
+        for previous, passage in zip(passages, passages[1:]):
+            self.assertEqual(previous.split("\n")[-1], passage.split("\n")[0])
+        self.assertTrue(all(len(passage) <= 120 for passage in passages))
+
+    def test_pack_lines_never_exceeds_size(self):
+        # 겹칠 단위와 다음 단위가 함께 들어가지 않으면 겹침을 버림
+        passages = pack_lines(["a" * 50, "b" * 100, "c" * 100], 100, 60)
+        self.assertEqual(passages, ["a" * 50, "b" * 100, "c" * 100])
+        passages = pack_lines(["a" * 30, "b" * 30, "c" * 60], 100, 70)
+        self.assertEqual(passages, ["a" * 30 + "\n" + "b" * 30, "b" * 30 + "\n" + "c" * 60])
+        self.assertTrue(all(len(passage) <= 100 for passage in passages))
+
+
+class ChunkPageTest(unittest.TestCase):
+    def test_empty_and_title_only(self):
+        self.assertEqual(chunk_page_text("", ""), [])
+        self.assertEqual(chunk_page_text("Title", ""), [{"text": "Title", "heading": ""}])
+
+    def test_short_page_is_single_chunk(self):
+        self.assertEqual(chunk_page_text("Title", "hello"), [{"text": "Title\n\nhello", "heading": ""}])
+
+    def test_long_page_is_fully_covered(self):
+        lines = [f"sentence {i} " * 8 for i in range(200)]
+        chunks = chunk_page_text("Title", "\n".join(lines), chunk_chars=800, overlap=100)
+        self.assertGreater(len(chunks), 1)
+        text = "\n".join(chunk["text"] for chunk in chunks)
+        self.assertTrue(all(line in text for line in lines))
+        self.assertTrue(all(chunk["text"].startswith("Title\n\n") for chunk in chunks))
+
+    def test_exporter_headings_drive_sections(self):
+        blocks = [
+            block("paragraph", "intro " * 40),
+            block("heading_2", "Install"),
+            block("code", "# install deps\npip install x"),
+            block("paragraph", "more " * 60),
+            block("heading_2", "Usage"),
+            block("paragraph", "usage " * 60),
+        ]
+        data = extract_block_content(blocks)
+        # content와 word_count는 제목 표시 없이 그대로
+        self.assertIn("\nInstall\n", data["content"])
+        self.assertNotIn("## ", data["content"])
+        for heading in data["headings"]:
+            self.assertTrue(data["content"][heading["offset"]:].startswith(heading["text"]))
+
+        chunks = chunk_page_text("Page", data["content"], data["headings"], chunk_chars=400, overlap=50)
+        self.assertEqual([chunk["heading"] for chunk in chunks], ["", "Install", "Usage"])
+        for chunk in chunks:
+            self.assertEqual(chunk["text"].count("```") % 2, 0)
+
+    def test_no_headings_field_without_heading_blocks(self):
+        self.assertNotIn("headings", extract_block_content([block("paragraph", "text")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
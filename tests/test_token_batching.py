@@ -0,0 +1,61 @@
+"""token_batching: 토큰 예산 배치 계획, 입력 순서 복원"""
+
+import random
+import unittest
+
+import support  # noqa: F401
+
+from token_batching import encode_in_batches, plan_batches, token_lengths
+
+
+class FakeTokenizer:
+    """공백 단위 토큰 + 특수 토큰 2개"""
+
+    def __call__(self, texts, add_special_tokens=True, truncation=True, max_length=None):
+        ids = [[0] + text.split()[:max_length - 2] + [2] for text in texts]
+        return {"input_ids": ids}
+
+
+class TokenBatchingTest(unittest.TestCase):
+    def test_token_lengths(self):
+        self.assertEqual(token_lengths(FakeTokenizer(), ["a b c", "", "a " * 100], max_length=10), [5, 2, 10])
+        # 토크나이저가 없으면 글자 수로 추정
+        self.assertEqual(token_lengths(None, ["가나다라", "x" * 100], max_length=20), [4, 20])
+
+    def test_batches_respect_budget_and_max_batch(self):
+        rng = random.Random(0)
+        lengths = [rng.randint(1, 512) for _ in range(300)]
+        batches = plan_batches(lengths, token_budget=2048, max_batch=16)
+
+        self.assertEqual(sorted(index for batch in batches for index in batch), list(range(len(lengths))))
+        for batch in batches:
+            self.assertLessEqual(len(batch), 16)
+            self.assertLessEqual(len(batch) * max(lengths[index] for index in batch), 2048)
+        # 길이순으로 묶으므로 긴 텍스트가 앞 배치에 옴
+        self.assertEqual(max(lengths[index] for index in batches[0]), max(lengths))
+
+    def test_text_longer_than_budget_is_alone(self):
+        batches = plan_batches([10, 5000, 10], token_budget=100, max_batch=8)
+        self.assertEqual(batches, [[1], [0, 2]])
+
+    def test_empty_input(self):
+        self.assertEqual(plan_batches([]), [])
+        self.assertEqual(encode_in_batches([], lambda texts: [], []), [])
+
+    def test_encode_restores_input_order(self):
+        texts = ["x" * length for length in (5, 40, 1, 17, 40, 3)]
+        calls = []
+
+        def encode(batch):
+            calls.append(batch)
+            return [len(text) for text in batch]
+
+        vectors = encode_in_batches(texts, encode, [len(text) for text in texts], token_budget=60, max_batch=2)
+        self.assertEqual(vectors, [len(text) for text in texts])
+        self.assertGreater(len(calls), 1)
+        for batch in calls:
+            self.assertLessEqual(len(batch), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""vector_store: 해시/청크 수 비교로 바뀐 페이지만 다시 임베딩, 페이로드만 갱신, 줄어든 청크 삭제"""
+
+import contextlib
+import io
+import threading
+import unittest
+import uuid
+import warnings
+from unittest import mock
+
+import support  # noqa: F401
+
+import numpy as np
+
+try:
+    import vector_store
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, VectorParams
+except ImportError:  # FlagEmbedding 미설치
+    vector_store = None
+
+
+class FakeModel:
+    """텍스트 길이로 만든 4차원 벡터"""
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, **kwargs):
+        self.texts.extend(texts)
+        return {"dense_vecs": np.array([[len(text), 1.0, 0.5, 0.25] for text in texts], dtype=float)}
+
+
+class RecordingClient:
+    """QdrantClient 호출과 호출한 스레드 이름 기록"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def call(*args, **kwargs):
+            self.calls.append((name, threading.current_thread().name))
+            return method(*args, **kwargs)
+        return call
+
+
+def make_page(number: int, content: str, tags: list = None) -> dict:
+    return {
+        "id": str(uuid.UUID(int=number + 1)), "title": f"page {number}", "content": content,
+        "tags": tags or [], "last_edited_time": "2024-01-01T00:00:00.000Z",
+    }
+
+
+@unittest.skipIf(vector_store is None, "FlagEmbedding not installed")
+class IncrementalUpsertTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(vector_store, EMBEDDING_CACHE_ENABLED=False, _embedding_cache=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.qdrant = QdrantClient(":memory:")
+        self.qdrant.create_collection(
+            collection_name=vector_store.COLLECTION_NAME,
+            vectors_config=VectorParams(size=4, distance=Distance.COSINE),
+        )
+
+    def run_pages(self, pages: list, incremental: bool = True):
+        model, client = FakeModel(), RecordingClient(self.qdrant)
+        existing = vector_store.load_point_hashes(client) if incremental else None
+        stats = vector_store.process_pages(pages, model, client, existing=existing, quiet=True, window=2)
+        return stats, model, client
+
+    def page_points(self, page_id: str) -> list:
+        points, _ = self.qdrant.scroll(
+            collection_name=vector_store.COLLECTION_NAME,
+            scroll_filter=vector_store.page_filter([page_id]),
+            limit=100,
+        )
+        return sorted((point.payload for point in points), key=lambda payload: payload["chunk_index"])
+
+    def test_only_changed_pages_are_embedded(self):
+        long_text = "\n".join(f"긴 문단 {number} " + "내용 " * 100 for number in range(10))
+        empty = {**make_page(3, ""), "title": ""}
+        pages = [make_page(0, "짧은 본문"), make_page(1, long_text), make_page(2, "그대로"), empty]
+        stats, _, _ = self.run_pages(pages, incremental=False)
+        self.assertEqual((stats["processed"], stats["skipped_empty"]), (3, 1))
+        self.assertGreater(len(self.page_points(pages[1]["id"])), 1)
+
+        pages = [
+            make_page(0, "짧은 본문", tags=[{"name": "새 태그"}]),  # 페이로드만 변경
+            make_page(1, "짧아진 본문"),  # 다시 임베딩, 청크 수 감소
+            make_page(2, "그대로"),
+        ]
+        stats, model, client = self.run_pages(pages)
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(stats["unchanged"], 1)
+        self.assertEqual(stats["payload_updated"], 1)
+        self.assertEqual(stats["processed"], 1)
+        self.assertEqual(stats["errors"], 0)
+        self.assertTrue(all("짧아진 본문" in text for text in model.texts))
+
+        self.assertEqual([payload["tags"] for payload in self.page_points(pages[0]["id"])], [[{"name": "새 태그"}]])
+        self.assertEqual(len(self.page_points(pages[1]["id"])), 1)
+        # 준비 스레드는 Qdrant를 호출하지 않음 (남은 포인트 업서트만 업서트 스레드가 끝난 뒤 호출 스레드에서)
+        self.assertNotIn("prepare-texts", {thread for _, thread in client.calls})
+        self.assertEqual({thread for name, thread in client.calls if name in ("set_payload", "delete")}, {"qdrant-upsert"})
+
+    def test_payload_only_changes_without_embedding(self):
+        pages = [make_page(number, f"본문 {number}") for number in range(5)]
+        self.run_pages(pages, incremental=False)
+
+        for page in pages:
+            page["tags"] = [{"name": "태그", "color": "red"}]
+        stats, model, client = self.run_pages(pages)
+        self.assertEqual(model.texts, [])
+        self.assertEqual((stats["payload_updated"], stats["processed"], stats["unchanged"]), (5, 0, 0))
+        self.assertEqual([thread for name, thread in client.calls if name == "set_payload"], ["qdrant-upsert"] * 5)
+        for page in pages:
+            self.assertEqual(self.page_points(page["id"])[0]["tags"], [{"name": "태그", "color": "red"}])
+
+        stats, _, _ = self.run_pages(pages)
+        self.assertEqual((stats["unchanged"], stats["payload_updated"]), (5, 0))
+
+
+@unittest.skipIf(vector_store is None, "FlagEmbedding not installed")
+class InitQdrantTest(unittest.TestCase):
+    def setUp(self):
+        self.qdrant = QdrantClient(":memory:")
+        patcher = mock.patch.multiple(
+            vector_store, QdrantClient=lambda **kwargs: self.qdrant, VECTOR_DIM=4,
+            EMBEDDING_CACHE_ENABLED=False, _embedding_cache=None,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # 진행 상황 출력과 로컬 모드의 페이로드 인덱스 경고는 숨김
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.enterContext(warnings.catch_warnings())
+        warnings.simplefilter("ignore", UserWarning)
+
+    def points_count(self) -> int:
+        return self.qdrant.count(collection_name=vector_store.COLLECTION_NAME).count
+
+    def test_existing_collection_is_kept_unless_recreated(self):
+        client = vector_store.init_qdrant(recreate=False)
+        pages = [make_page(number, f"본문 {number}") for number in range(3)]
+        vector_store.process_pages(pages, FakeModel(), client, quiet=True)
+        self.assertEqual(self.points_count(), 3)
+
+        # 기본 실행은 기존 포인트를 유지하고 저장된 해시로 바뀐 페이지를 판단
+        client = vector_store.init_qdrant(recreate=False)
+        self.assertEqual(self.points_count(), 3)
+        hashes = vector_store.load_point_hashes(client)
+        self.assertEqual(set(hashes), {page["id"] for page in pages})
+        self.assertEqual(hashes[pages[0]["id"]][0], vector_store.embedding_hash(pages[0]))
+        self.assertEqual(set(vector_store.load_point_hashes(client, [pages[1]["id"]])), {pages[1]["id"]})
+
+        vector_store.init_qdrant(recreate=True)
+        self.assertEqual(self.points_count(), 0)
+
+    def test_dimension_change_recreates_collection(self):
+        vector_store.init_qdrant(recreate=False)
+        with mock.patch.object(vector_store, "VECTOR_DIM", 8):
+            client = vector_store.init_qdrant(recreate=False)
+        vectors = client.get_collection(vector_store.COLLECTION_NAME).config.params.vectors
+        self.assertEqual(vectors.size, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()